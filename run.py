@@ -215,6 +215,20 @@ def start_api():
         logger.error(f'Failed to authenticate user.')
         raise ServiceError("Unauthorized", status_code=401)
 
+    # Metrics (JWT protected like every non-public route)
+    @app.route('/metrics', methods=['GET'])
+    @format_response
+    def metrics():
+        """Return database query latency histogram, slowest components, recent slow queries and Drive cache stats."""
+        from src.utils.connectors.supabase import db
+        from src.utils.connectors.drive import GoogleDrive
+        reset = request.args.get('reset', '').lower() in ('1', 'true', 'yes')
+        metrics = db.get_query_metrics(reset=reset)
+        drive = GoogleDrive()
+        metrics['drive_download_cache'] = drive.get_download_cache_stats()
+        metrics['drive_folder_index'] = drive.get_folder_index_stats()
+        return metrics
+
     # Tools
     from src.app.tools.private import actions, etl
     app.register_blueprint(actions.bp, url_prefix='/actions')
@@ -6,7 +6,7 @@ from src.components.clients.accounts import read_account_details, get_forms, sub
 
 from src.components.clients.accounts import get_account_statements
 
-from src.utils.response import format_response
+from src.utils.response import format_response, get_page_args
 
 bp = Blueprint('accounts', __name__)
 
@@ -49,7 +49,8 @@ def read_account_contacts_route():
         value = request.args.get(key)
         if value:
             query[key] = value
-    return read_account_contacts(query=query)
+    limit, cursor = get_page_args()
+    return read_account_contacts(query=query, limit=limit, cursor=cursor)
 
 @bp.route('/contact/update', methods=['POST'])
 @format_response
@@ -83,7 +84,8 @@ def read_route():
         query['user_id'] = user_id
     if code:
         query['advisor_code'] = code
-    return read_accounts(query=query)
+    limit, cursor = get_page_args()
+    return read_accounts(query=query, limit=limit, cursor=cursor)
 
 
 @bp.route('/update', methods=['POST'])
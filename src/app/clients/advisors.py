@@ -4,7 +4,7 @@ from src.components.clients.advisors import (
     read_advisors,
     update_advisor,
 )
-from src.utils.response import format_response
+from src.utils.response import format_response, get_page_args
 
 bp = Blueprint('advisors', __name__)
 
@@ -40,4 +40,5 @@ def advisors_route():
         query['code'] = code
     if contact_id:
         query['contact_id'] = contact_id
-    return read_advisors(query=query)
+    limit, cursor = get_page_args()
+    return read_advisors(query=query, limit=limit, cursor=cursor)
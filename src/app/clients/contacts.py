@@ -10,7 +10,7 @@ from src.components.clients.contacts import (
     create_contact_screening_from_contact_id,
     read_contact_screenings
 )
-from src.utils.response import format_response
+from src.utils.response import format_response, get_page_args
 
 bp = Blueprint('contacts', __name__)
 
@@ -33,7 +33,8 @@ def contacts_route():
         query['id'] = id
     if email:
         query['email'] = email
-    return read_contacts(query=query)
+    limit, cursor = get_page_args()
+    return read_contacts(query=query, limit=limit, cursor=cursor)
 
 @bp.route('/update', methods=['POST'])
 @format_response
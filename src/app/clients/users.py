@@ -1,6 +1,6 @@
 from flask import Blueprint, request
 from src.components.clients.users import read_users, update_user, verify_password, sanitize_user
-from src.utils.response import format_response
+from src.utils.response import format_response, get_page_args
 from src.utils.logger import logger
 from src.utils.exception import ServiceError
 
@@ -36,7 +36,8 @@ def read_users_route():
         query['id'] = id
     if user_id:
         query['user_id'] = user_id
-    return read_users(query=query)
+    limit, cursor = get_page_args()
+    return read_users(query=query, limit=limit, cursor=cursor)
 
 @bp.route('/update', methods=['POST'])
 @format_response
@@ -24,9 +24,10 @@ def update_pending_aliases_route():
 @bp.route('/run_screening_process', methods=['GET'])
 @format_response
 def run_screenings_route():
-    """Run the screening process, optionally skipping the write-back step when apply_screenings is false."""
+    """Run the screening process (mode=delta by default, or mode=full), optionally skipping the write-back step when apply_screenings is false."""
     apply_screenings = request.args.get('apply_screenings', 'true').lower() == 'true'
-    return run_screenings(apply_screenings=apply_screenings)
+    mode = request.args.get('mode', 'delta').lower()
+    return run_screenings(apply_screenings=apply_screenings, mode=mode)
 
 @bp.route('/send_compliance_manual_update_email', methods=['POST'])
 @format_response
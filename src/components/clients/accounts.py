@@ -26,7 +26,9 @@ def link_account_contact(account_contact: dict = None) -> dict:
     return {'id': db.create(table=account_contact_table, data=account_contact)}
 
 @handle_exception
-def read_account_contacts(query: dict = None) -> list:
+def read_account_contacts(query: dict = None, limit: int = None, cursor: str = None) -> list | dict:
+    if limit is not None or cursor is not None:
+        return db.read_page(table=account_contact_table, query=query or {}, limit=limit, cursor=cursor)
     return db.read(table=account_contact_table, query=query or {})
 
 @handle_exception
@@ -185,7 +187,11 @@ def create_account(account: dict = None) -> dict:
     return {'id': account_id}
 
 @handle_exception
-def read_accounts(query: dict = None) -> list:
+def read_accounts(query: dict = None, limit: int = None, cursor: str = None) -> list | dict:
+    if limit is not None or cursor is not None:
+        page = db.read_page(table=table, query=query or {}, limit=limit, cursor=cursor)
+        page['data'] = _sanitize_accounts(page['data'])
+        return page
     accounts = db.read(table=table, query=query)
     return _sanitize_accounts(accounts)
 
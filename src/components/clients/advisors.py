@@ -25,6 +25,8 @@ def update_advisor(query: dict = None, advisor: dict = None):
     return {'id': advisor_id}
 
 @handle_exception
-def read_advisors(query=None):
+def read_advisors(query=None, limit: int = None, cursor: str = None):
+    if limit is not None or cursor is not None:
+        return db.read_page(table='advisor', query=query or {}, limit=limit, cursor=cursor)
     advisors = db.read(table='advisor', query=query)
     return advisors
@@ -3,10 +3,21 @@ from src.utils.connectors.supabase import db
 from src.utils.logger import logger
 from typing import Optional
 from datetime import datetime
+import os
 import re
 import unicodedata
+from src.utils.managers.sanctions_index_manager import SanctionsIndexCache
+from src.utils.sanctions_matching import (
+    SANCTIONS_LISTS,
+    SanctionsNameIndex,
+    build_sanctions_list_index,
+    normalize_name,
+    sanctions_list_entries,
+)
 from src.components.tools.public.reporting import (
+    download_sanctions_index,
     get_ofac_sdn_list,
+    get_sanctions_index_file,
     get_uk_sanctions_list,
     get_un_sanctions_list,
     get_ibkr_details,
@@ -21,6 +32,19 @@ contact_screening_table = 'contact_screening'
 _sanctions_lists_cache = None
 _ibkr_details_by_account_id_cache = None
 _sanctions_match_indexes_cache = None
+SanctionsIndexes = tuple[SanctionsNameIndex, SanctionsNameIndex, SanctionsNameIndex]
+# Fuzzy and phonetic hits are only reported as potential matches for manual
+# review; they never raise the risk score. Off until the thresholds are tuned.
+SANCTIONS_FUZZY_MATCHING = os.getenv('SANCTIONS_FUZZY_MATCHING', 'false').lower() in ('true', '1', 'yes')
+SANCTIONS_FUZZY_THRESHOLD = float(os.getenv('SANCTIONS_FUZZY_THRESHOLD', '0.92'))
+# Indexes published by the sanctions ETL, mapped from a directory shared by the
+# workers of one host and re-checked every SANCTIONS_INDEX_REFRESH_SECONDS.
+_sanctions_index_cache = SanctionsIndexCache(
+    directory=os.getenv('SANCTIONS_INDEX_DIR', '/app/cache/sanctions_index'),
+    locate=get_sanctions_index_file,
+    download=download_sanctions_index,
+    refresh_seconds=float(os.getenv('SANCTIONS_INDEX_REFRESH_SECONDS', '300')),
+)
 
 WEIGHTS = {
     'customerRisk': 0.30,
@@ -90,7 +114,9 @@ def create_contact(contact: dict = None):
     return {'id': contact_id}
 
 @handle_exception
-def read_contacts(query=None):
+def read_contacts(query=None, limit: int = None, cursor: str = None):
+    if limit is not None or cursor is not None:
+        return db.read_page(table=contact_table, query=query or {}, limit=limit, cursor=cursor)
     contacts = db.read(table=contact_table, query=query)
     return contacts
 
@@ -282,7 +308,8 @@ def _create_contact_screening(
     un_status: Optional[list[dict]] = None,
     uk_status=None,
     ofac_results=None,
-    created: Optional[str] = None
+    created: Optional[str] = None,
+    potential_matches: Optional[dict] = None,
 ):
     if not contact_id:
         raise Exception('contact_id is required')
@@ -293,7 +320,8 @@ def _create_contact_screening(
         'un_status': un_status,
         'uk_status': uk_status,
         'ofac_results': ofac_results,
-        'created': created
+        'created': created,
+        'potential_matches': potential_matches,
     })
 
 
@@ -303,7 +331,7 @@ def _build_contact_screening_payload(
     ibkr_detail: dict | None,
     account_contact_link: dict | None,
     created: Optional[str] = None,
-    sanctions_indexes: Optional[tuple[dict[str, list[dict]], dict[str, list[dict]], dict[str, list[dict]]]] = None,
+    sanctions_indexes: Optional[SanctionsIndexes] = None,
 ) -> dict:
     contact_id = contact.get('id') if isinstance(contact, dict) else None
     if not contact_id:
@@ -318,9 +346,14 @@ def _build_contact_screening_payload(
         raise Exception('linked account not found for screening')
 
     ofac_index, uk_index, un_index = sanctions_indexes or _get_sanctions_match_indexes()
-    ofac_results = _unique_rows(list(ofac_index.get(normalized_contact_name, [])))
-    uk_status = _unique_rows(list(uk_index.get(normalized_contact_name, [])))
-    un_matches = _unique_rows(list(un_index.get(normalized_contact_name, [])))
+    ofac_results, ofac_potential = _sanctions_hits(ofac_index, normalized_contact_name)
+    uk_status, uk_potential = _sanctions_hits(uk_index, normalized_contact_name)
+    un_matches, un_potential = _sanctions_hits(un_index, normalized_contact_name)
+    potential_matches = {
+        list_name: hits
+        for list_name, hits in (('ofac', ofac_potential), ('uk', uk_potential), ('un', un_potential))
+        if hits
+    }
     un_status = un_matches if len(un_matches) > 0 else None
     uk_status_value = uk_status if len(uk_status) > 0 else None
     ofac_results_value = ofac_results if len(ofac_results) > 0 else None
@@ -330,6 +363,7 @@ def _build_contact_screening_payload(
         ibkr_detail=ibkr_detail,
         account_contact_link=account_contact_link,
     )
+    # Only exact hits escalate; potential matches wait for manual review.
     if ofac_results or uk_status or un_matches:
         risk_score = max(risk_score, 9.0)
 
@@ -341,19 +375,12 @@ def _build_contact_screening_payload(
         'uk_status': uk_status_value,
         'ofac_results': ofac_results_value,
         'created': created or datetime.now().strftime('%Y%m%d%H%M%S'),
+        'potential_matches': potential_matches or None,
     }
 
 
 def _normalize_name(value: str) -> str:
-    if not value:
-        return ""
-    ascii_name = (
-        unicodedata.normalize("NFKD", str(value))
-        .encode("ascii", "ignore")
-        .decode("ascii")
-    )
-    normalized = re.sub(r"[^a-z0-9 ]+", " ", ascii_name.lower())
-    return " ".join(normalized.split())
+    return normalize_name(value)
 
 
 def _to_upper(value) -> str:
@@ -799,63 +826,96 @@ def _get_sanctions_lists():
     return _sanctions_lists_cache
 
 
-def _append_index(index: dict[str, list[dict]], key: str, row: dict):
-    if not key:
-        return
-    bucket = index.setdefault(key, [])
-    bucket.append(row)
-
-
-def _unique_rows(rows: list[dict]) -> list[dict]:
-    seen = set()
-    unique = []
-    for row in rows or []:
-        key = id(row)
-        if key in seen:
-            continue
-        seen.add(key)
-        unique.append(row)
-    return unique
+def _sanctions_hits(index: SanctionsNameIndex, normalized_name: str) -> tuple[list[dict], list[dict]]:
+    """
+    Rows of one list matching a contact name, as ``(exact, potential)``.
+    Exact matches are returned as stored. Fuzzy and phonetic matches (only
+    with SANCTIONS_FUZZY_MATCHING) are potential matches for manual review:
+    copies annotated with the score, match type and the listed name matched.
+    """
+    exact_hits, potential_hits = [], []
+    for hit in index.search(
+        normalized_name,
+        threshold=SANCTIONS_FUZZY_THRESHOLD,
+        limit=None,
+        fuzzy=SANCTIONS_FUZZY_MATCHING,
+        normalized=True,
+    ):
+        if hit['match_type'] == 'exact':
+            exact_hits.append(hit['row'])
+        else:
+            potential_hits.append({
+                **hit['row'],
+                'match_type': hit['match_type'],
+                'match_score': hit['score'],
+                'matched_name': hit['name'],
+            })
+    return exact_hits, potential_hits
 
 
 def _build_sanctions_match_indexes(
     sanctions_lists: tuple[list[dict], list[dict], list[dict]] | None = None,
-) -> tuple[dict[str, list[dict]], dict[str, list[dict]], dict[str, list[dict]]]:
-    ofac_sdn_list, uk_sanctions_list, un_sanctions_list = sanctions_lists or _get_sanctions_lists()
-
-    ofac_index: dict[str, list[dict]] = {}
-    for row in ofac_sdn_list:
-        if not isinstance(row, dict):
-            continue
-        _append_index(ofac_index, _normalize_name(row.get('name', '')), row)
-
-    uk_index: dict[str, list[dict]] = {}
-    for row in uk_sanctions_list:
-        if not isinstance(row, dict):
-            continue
-        for i in range(1, 7):
-            _append_index(uk_index, _normalize_name(row.get(f'Name {i}', '')), row)
-
-    un_index: dict[str, list[dict]] = {}
-    for row in un_sanctions_list:
-        if not isinstance(row, dict):
-            continue
-        _append_index(un_index, _normalize_name(row.get('name', '')), row)
-        aliases = row.get('aliases', '')
-        if isinstance(aliases, str) and aliases.strip():
-            for alias in aliases.split('|'):
-                _append_index(un_index, _normalize_name(alias), row)
+) -> SanctionsIndexes:
+    return tuple(
+        build_sanctions_list_index(list_name, rows)
+        for list_name, rows in zip(SANCTIONS_LISTS, sanctions_lists or _get_sanctions_lists())
+    )
 
-    return ofac_index, uk_index, un_index
 
+def _get_sanctions_match_indexes() -> SanctionsIndexes:
+    """
+    The published indexes of the three lists, hot-swapped by
+    ``_sanctions_index_cache`` when the ETL publishes a new version. Until
+    every list has a published index, fall back to building the indexes from
+    the lists once per process.
+    """
+    published = tuple(_sanctions_index_cache.get(list_name) for list_name in SANCTIONS_LISTS)
+    if all(index is not None for index in published):
+        return published
 
-def _get_sanctions_match_indexes() -> tuple[dict[str, list[dict]], dict[str, list[dict]], dict[str, list[dict]]]:
     global _sanctions_match_indexes_cache
     if _sanctions_match_indexes_cache is None:
+        logger.warning('Published sanctions indexes unavailable, building them from the lists.')
         _sanctions_match_indexes_cache = _build_sanctions_match_indexes()
     return _sanctions_match_indexes_cache
 
 
+@handle_exception
+def find_contact_ids_matching_sanctions_entries(entries_by_list: dict[str, list[dict]]) -> set[str]:
+    """
+    Ids of contacts whose name matches any of the given sanctions entries,
+    keyed by list ('ofac', 'uk', 'un'). The contact names are indexed once and
+    every entry name is searched with the thresholds a screening uses, so the
+    cost follows the number of entries rather than the number of contacts.
+    """
+    entry_names = {
+        normalize_name(name)
+        for list_name, rows in (entries_by_list or {}).items()
+        for name, _ in sanctions_list_entries(list_name, rows or [])
+    }
+    entry_names.discard('')
+    if not entry_names:
+        return set()
+
+    contacts = db.read(table=contact_table, query={}, columns=['id', 'name']) or []
+    contact_index = SanctionsNameIndex(
+        ((row.get('name'), {'id': row.get('id')}) for row in contacts if row.get('id')),
+        name='contacts',
+    )
+    matched_contact_ids = set()
+    for entry_name in entry_names:
+        for hit in contact_index.search(
+            entry_name,
+            threshold=SANCTIONS_FUZZY_THRESHOLD,
+            limit=None,
+            fuzzy=SANCTIONS_FUZZY_MATCHING,
+            normalized=True,
+        ):
+            matched_contact_ids.add(hit['row']['id'])
+    logger.info(f'{len(entry_names)} changed sanctions names matched {len(matched_contact_ids)} of {len(contacts)} contacts')
+    return matched_contact_ids
+
+
 def _get_ibkr_details_by_account_id() -> dict[str, dict]:
     global _ibkr_details_by_account_id_cache
     if _ibkr_details_by_account_id_cache is None:
@@ -911,7 +971,7 @@ def build_contact_screening_from_contact_id(
     contact_id: str = None,
     created: Optional[str] = None,
     sanctions_lists: tuple[list[dict], list[dict], list[dict]] | None = None,
-    sanctions_indexes: tuple[dict[str, list[dict]], dict[str, list[dict]], dict[str, list[dict]]] | None = None,
+    sanctions_indexes: SanctionsIndexes | None = None,
 ):
     """Build one screening payload without writing it to the database."""
     if not contact_id:
@@ -971,7 +1031,7 @@ def create_contact_screenings_batch_from_contact_ids(
 ) -> dict:
     """Build contact screenings with the normal single-contact logic and persist them in bulk."""
     if not contact_ids:
-        return {'inserted': 0, 'screening_errors': [], 'screening_error_contact_ids': []}
+        return {'inserted': 0, 'potential_matches': {}, 'screening_errors': [], 'screening_error_contact_ids': []}
 
     # Load all relational inputs once. The single-contact API intentionally keeps
     # its own reads, but the daily job must not repeat those reads 800+ times.
@@ -1024,6 +1084,16 @@ def create_contact_screenings_batch_from_contact_ids(
             screening_errors.append(f'{contact_id}: {error}')
             screening_error_contact_ids.append(contact_id)
 
+    # Fuzzy and phonetic hits are stored in potential_matches for manual
+    # review and returned with the batch result.
+    potential_matches = {
+        payload['contact_id']: payload['potential_matches']
+        for payload in payloads
+        if payload.get('potential_matches')
+    }
+    if potential_matches:
+        logger.warning(f'{len(potential_matches)} contact screenings have potential sanctions matches for manual review')
+
     inserted = 0
     if payloads and persist:
         result = db.create_many(
@@ -1036,6 +1106,7 @@ def create_contact_screenings_batch_from_contact_ids(
     return {
         'inserted': inserted,
         'payloads_built': len(payloads),
+        'potential_matches': potential_matches,
         'screening_errors': screening_errors,
         'screening_error_contact_ids': screening_error_contact_ids,
     }
@@ -2089,11 +2089,6 @@ def _upsert_document_processing_record(
     error: Optional[str],
 ):
     db = _get_db()
-    existing_records = db.read(
-        table=TABLE,
-        query={'document_id': document_id, 'process_type': TEXT_EXTRACTION_PROCESS_TYPE},
-    ) or []
-
     payload = {
         'document_id': document_id,
         'process_type': TEXT_EXTRACTION_PROCESS_TYPE,
@@ -2104,14 +2099,12 @@ def _upsert_document_processing_record(
         'error': error,
     }
 
-    if existing_records:
-        return db.update(
-            table=TABLE,
-            query={'document_id': document_id, 'process_type': TEXT_EXTRACTION_PROCESS_TYPE},
-            data=payload,
-        )
-
-    return db.create(table=TABLE, data=payload)
+    result = db.upsert_many(
+        table=TABLE,
+        rows=[payload],
+        conflict_columns=['document_id', 'process_type'],
+    )
+    return result['ids'][0]
 
 
 def upsert_document_text_extraction_record(
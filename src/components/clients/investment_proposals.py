@@ -17,6 +17,10 @@ import re
 import time
 
 TOTAL_ASSETS = 20
+# Candidates are cleaned, bounded, scored and sorted on this column: the
+# cash-flow YTM where the bond snapshot solved one, else Current Yield_x.
+# Current Yield_x itself is what proposals show.
+RANKING_YIELD_COLUMN = 'Ranking Yield_x'
 INVESTMENT_PROPOSAL_CONTEXT_TTL_SECONDS = 300
 _investment_proposal_context_cache: dict | None = None
 _investment_proposal_context_cached_at = 0.0
@@ -428,9 +432,18 @@ def _load_investment_proposal_context() -> dict:
         lambda value: _normalize_yield_percent(_to_float_or_none(value))
     )
 
+    # Rank on the cash-flow yield to maturity where the snapshot has one;
+    # older snapshots and bonds the solver could not price keep IBKR's yield.
+    merged_df[RANKING_YIELD_COLUMN] = merged_df['Current Yield_x']
+    if 'YTM' in merged_df.columns and 'YTM Method' in merged_df.columns:
+        ytm_percent = pd.to_numeric(merged_df['YTM'], errors='coerce') * 100
+        use_ytm = (merged_df['YTM Method'] == 'cashflow') & ytm_percent.notna()
+        merged_df.loc[use_ytm, RANKING_YIELD_COLUMN] = ytm_percent[use_ytm].round(4)
+        logger.info(f'Ranking {int(use_ytm.sum())} of {len(merged_df)} bonds on cash-flow YTM.')
+
     merged_df = (
         merged_df
-            .sort_values(by='Current Yield_x', ascending=False)
+            .sort_values(by=RANKING_YIELD_COLUMN, ascending=False)
             .reset_index(drop=True)
     )
 
@@ -618,9 +631,9 @@ def _clean_candidate_pool(candidate_df: pd.DataFrame) -> pd.DataFrame:
 
     cleaned = candidate_df.copy()
     cleaned = cleaned[cleaned['Ticker'].astype(str).str.strip() != '']
-    cleaned = cleaned[cleaned['Current Yield_x'].notna()]
-    cleaned = cleaned[cleaned['Current Yield_x'] > 0]
-    cleaned = cleaned[cleaned['Current Yield_x'] <= 25]
+    cleaned = cleaned[cleaned[RANKING_YIELD_COLUMN].notna()]
+    cleaned = cleaned[cleaned[RANKING_YIELD_COLUMN] > 0]
+    cleaned = cleaned[cleaned[RANKING_YIELD_COLUMN] <= 25]
     return cleaned.reset_index(drop=True)
 
 
@@ -628,7 +641,7 @@ def _bucket_selection_profile(candidate_df: pd.DataFrame) -> dict | None:
     if candidate_df.empty:
         return None
 
-    yields = candidate_df['Current Yield_x'].astype(float)
+    yields = candidate_df[RANKING_YIELD_COLUMN].astype(float)
     median_yield = float(yields.median())
     mad = float((yields - median_yield).abs().median())
     mad_floor = max(mad, 0.35)
@@ -652,8 +665,8 @@ def _screen_outliers_for_bucket(candidate_df: pd.DataFrame, selection_profile: d
         return candidate_df
 
     screened = candidate_df[
-        (candidate_df['Current Yield_x'] >= selection_profile['lower_bound'])
-        & (candidate_df['Current Yield_x'] <= selection_profile['upper_bound'])
+        (candidate_df[RANKING_YIELD_COLUMN] >= selection_profile['lower_bound'])
+        & (candidate_df[RANKING_YIELD_COLUMN] <= selection_profile['upper_bound'])
     ]
 
     if len(screened) >= max(3, min(5, len(candidate_df))):
@@ -674,15 +687,15 @@ def _score_candidates_for_bucket(candidate_df: pd.DataFrame, selection_profile:
     spread = float(selection_profile['spread'])
 
     scored = candidate_df.copy()
-    scored['_selector_score'] = scored['Current Yield_x'].apply(
+    scored['_selector_score'] = scored[RANKING_YIELD_COLUMN].apply(
         lambda candidate_yield: max(0.0, 1.0 - (abs(float(candidate_yield) - target_yield) / spread))
     )
-    scored['_distance_to_target'] = scored['Current Yield_x'].apply(
+    scored['_distance_to_target'] = scored[RANKING_YIELD_COLUMN].apply(
         lambda candidate_yield: abs(float(candidate_yield) - target_yield)
     )
 
     scored = scored.sort_values(
-        by=['_selector_score', '_distance_to_target', 'Current Yield_x'],
+        by=['_selector_score', '_distance_to_target', RANKING_YIELD_COLUMN],
         ascending=[False, True, False],
     )
     return scored
@@ -709,7 +722,7 @@ def _prepare_etf_candidates(etfs_df: pd.DataFrame, proposal_equity_df: pd.DataFr
     by the market-data ETL, rather than the legacy SPY-only estimate.
     """
     if etfs_df.empty:
-        return pd.DataFrame(columns=['Ticker', 'Symbol_x', 'Current Yield_x', 'S&P Equivalent_x'])
+        return pd.DataFrame(columns=['Ticker', 'Symbol_x', 'Current Yield_x', RANKING_YIELD_COLUMN, 'S&P Equivalent_x'])
 
     candidates = etfs_df.copy()
     display_symbol = (
@@ -734,6 +747,7 @@ def _prepare_etf_candidates(etfs_df: pd.DataFrame, proposal_equity_df: pd.DataFr
             f'of {fallback_yield:.4f}% until the ETL snapshot is refreshed.'
         )
         candidates['Current Yield_x'] = fallback_yield
+    candidates[RANKING_YIELD_COLUMN] = candidates['Current Yield_x']
     candidates['S&P Equivalent_x'] = 'ETF'
     # Keep the source columns so optional proposal metadata such as industry
     # can be preserved when it exists in the ETF snapshot.
@@ -930,9 +944,9 @@ def _populate_investment_proposal_from_distribution(
                 bucket = next(bucket_ref for bucket_ref in investment_proposal if bucket_ref['name'] == 'bonds_bb')
 
             selection_profile = bucket_selection_profiles.get(bucket['name'])
-            target_yield = float(selection_profile['target_yield']) if selection_profile else float(row['Current Yield_x'])
+            target_yield = float(selection_profile['target_yield']) if selection_profile else float(row[RANKING_YIELD_COLUMN])
             spread = float(selection_profile['spread']) if selection_profile else 1.0
-            selector_score = max(0.0, 1.0 - (abs(float(row['Current Yield_x']) - target_yield) / spread))
+            selector_score = max(0.0, 1.0 - (abs(float(row[RANKING_YIELD_COLUMN]) - target_yield) / spread))
 
             scored_remaining_pool.append({
                 **row.to_dict(),
@@ -944,7 +958,7 @@ def _populate_investment_proposal_from_distribution(
         if not remaining_pool.empty:
             remaining_pool = (
                 remaining_pool
-                    .sort_values(by=['_selector_score', 'Current Yield_x'], ascending=[False, False])
+                    .sort_values(by=['_selector_score', RANKING_YIELD_COLUMN], ascending=[False, False])
                     .groupby('Ticker')
                     .head(1)
             )
@@ -30,7 +30,12 @@ def sanitize_users(users: list = None):
     return [sanitize_user(user) for user in users or []]
 
 @handle_exception
-def read_users(query=None, include_sensitive: bool = False):
+def read_users(query=None, include_sensitive: bool = False, limit: int = None, cursor: str = None):
+    if limit is not None or cursor is not None:
+        page = db.read_page(table='user', query=query or {}, limit=limit, cursor=cursor)
+        if not include_sensitive:
+            page['data'] = sanitize_users(page['data'])
+        return page
     users = db.read(table='user', query=query)
     if include_sensitive:
         return users
@@ -1,5 +1,5 @@
 
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from src.utils.exception import ServiceError, handle_exception
 from src.components.tools.public.reporting import (
     get_nav_report,
@@ -8,10 +8,15 @@ from src.components.tools.public.reporting import (
     get_uk_sanctions_list,
     get_un_sanctions_list,
     compare_all_sanctions_today_vs_yesterday,
+    get_sanctions_changed_rows,
+)
+from src.components.clients.contacts import (
+    create_contact_screenings_batch_from_contact_ids,
+    find_contact_ids_matching_sanctions_entries,
 )
-from src.components.clients.contacts import create_contact_screenings_batch_from_contact_ids
 from src.utils.connectors.supabase import db
 import pandas as pd
+import pytz
 from src.utils.logger import logger
 from src.utils.connectors.gmail import GmailConnector
 
@@ -32,13 +37,78 @@ def _screen_created_date(value):
     except (TypeError, ValueError):
         return None
 
+def _last_screening_run() -> str | None:
+    """``created`` (%Y%m%d%H%M%S) of the most recent screening, or None if nothing was ever screened."""
+    latest = db.read(table='contact_screening', query={}, columns=['created'], order_by='-created', limit=1) or []
+    if not latest:
+        return None
+    return str(latest[0].get('created') or '') or None
+
+def _screening_run_backup_timestamp(created: str) -> str | None:
+    """
+    A screening ``created`` (%Y%m%d%H%M%S, host local time) as the
+    America/Costa_Rica %Y%m%d%H%M timestamp used in sanctions backup names.
+    """
+    try:
+        created_at = datetime.strptime(str(created), '%Y%m%d%H%M%S')
+    except (TypeError, ValueError):
+        return None
+    return created_at.astimezone(pytz.timezone('America/Costa_Rica')).strftime('%Y%m%d%H%M')
+
+def _contact_ids_changed_since(since: str) -> set:
+    """Contacts created or updated, or linked to an account, at or after ``since``."""
+    contact_ids = set()
+    for column in ('created', 'updated'):
+        for row in db.read(table='contact', query={column: {'gte': since}}, columns=['id']) or []:
+            contact_ids.add(row.get('id'))
+        for row in db.read(table='account_contact', query={column: {'gte': since}}, columns=['contact_id']) or []:
+            contact_ids.add(row.get('contact_id'))
+    contact_ids.discard(None)
+    return contact_ids
+
 @handle_exception
-def run_screenings(apply_screenings: bool = True) -> dict:
-    """Screen every contact linked to an account using one loaded set of lists."""
-    comparison = compare_all_sanctions_today_vs_yesterday() or {}
-    if comparison.get('all_available') and comparison.get('all_same'):
+def run_screenings(apply_screenings: bool = True, mode: str = 'delta') -> dict:
+    """
+    Screen contacts linked to an account using one loaded set of lists.
+
+    ``mode='full'`` screens every linked contact, unless no list changed since
+    yesterday. ``mode='delta'`` screens only the linked contacts whose name
+    matches an entry added, modified or removed since the newest snapshot
+    taken at or before the last screening run, plus contacts created, updated
+    or linked since that run; it falls back to a full run when no such
+    snapshot exists or nothing was ever screened. Contacts already screened today are skipped in both modes.
+    """
+    if mode not in ('delta', 'full'):
+        raise ServiceError(
+            message=f"Unknown screening mode: {mode}. Use 'delta' or 'full'.",
+            status_code=400,
+            code='invalid_screening_mode',
+        )
+
+    comparison = {}
+    last_run = _last_screening_run() if mode == 'delta' else None
+    baseline_before = _screening_run_backup_timestamp(last_run) if last_run else None
+    if mode == 'full':
+        comparison = compare_all_sanctions_today_vs_yesterday() or {}
+    elif not baseline_before:
+        logger.info('Delta screening needs a previous run; running a full screening.')
+        mode = 'full'
+    else:
+        # Diff against the newest snapshot the last run could have seen, so
+        # list changes from days without a run, and backups that landed after
+        # the run on its day, are rescreened too.
+        comparison = compare_all_sanctions_today_vs_yesterday(baseline_before=baseline_before) or {}
+        if not comparison.get('all_available'):
+            logger.info(f'No sanctions snapshot at or before the last screening run ({last_run}); running a full screening.')
+            mode = 'full'
+    lists_unchanged = bool(comparison.get('all_available') and comparison.get('all_same'))
+
+    # A fallback from delta never skips: lists may have changed on the days
+    # since the last run even if they did not change since yesterday.
+    if mode == 'full' and lists_unchanged:
         return {
             'apply_screenings': apply_screenings,
+            'mode': mode,
             'screenings_skipped': True,
             'skip_reason': 'OFAC, UK, and UN sanctions lists unchanged vs yesterday',
             'contacts_targeted': 0,
@@ -46,41 +116,76 @@ def run_screenings(apply_screenings: bool = True) -> dict:
             'screening_errors': [],
         }
 
-    sanctions_lists = (
-        get_ofac_sdn_list() or [],
-        get_uk_sanctions_list() or [],
-        get_un_sanctions_list() or [],
-    )
-    links = db.read(table='account_contact', query={}) or []
-    screenings = db.read(table='contact_screening', query={}) or []
+    # ``created`` is stored as %Y%m%d%H%M%S text, so today's screenings are a
+    # lexicographic range that Postgres can filter without shipping history.
     today = date.today()
+    today_start = today.strftime('%Y%m%d') + '000000'
+    tomorrow_start = (today + timedelta(days=1)).strftime('%Y%m%d') + '000000'
+    screenings = db.read(
+        table='contact_screening',
+        query={'created': {'gte': today_start, 'lt': tomorrow_start}},
+        columns=['contact_id', 'created'],
+    ) or []
     screened_today = {
         row.get('contact_id')
         for row in screenings
         if row.get('contact_id')
         and _screen_created_date(row.get('created')) == today
     }
-    contact_ids = list(dict.fromkeys(
-        link.get('contact_id') for link in links
-        if link.get('account_id') and link.get('contact_id')
-    ))
+    # account_contact grows with every account, so stream it in batches.
+    contact_ids = {}
+    for batch in db.read_iter(table='account_contact', query={}, columns=['account_id', 'contact_id']):
+        for link in batch:
+            if link.get('account_id') and link.get('contact_id'):
+                contact_ids.setdefault(link.get('contact_id'), None)
+    contact_ids = list(contact_ids)
     result = {
         'apply_screenings': apply_screenings,
+        'mode': mode,
         'screenings_skipped': False,
+        'contacts_linked': len(contact_ids),
         'contacts_targeted': len(contact_ids),
         'screenings_executed': 0,
         'screening_errors': [],
     }
+
+    if mode == 'delta':
+        changed_entries = {
+            list_name: get_sanctions_changed_rows(comparison.get(list_name))
+            for list_name in ('ofac', 'uk', 'un')
+        }
+        matched_contact_ids = find_contact_ids_matching_sanctions_entries(changed_entries) if not lists_unchanged else set()
+        changed_contact_ids = _contact_ids_changed_since(last_run)
+        delta_contact_ids = matched_contact_ids | changed_contact_ids
+        contact_ids = [contact_id for contact_id in contact_ids if contact_id in delta_contact_ids]
+        result.update({
+            'last_run': last_run,
+            'baseline_before': baseline_before,
+            'baseline_snapshots': {
+                list_name: ((comparison.get(list_name) or {}).get('yesterday_snapshot') or {}).get('file_name')
+                for list_name in ('ofac', 'uk', 'un')
+            },
+            'changed_sanctions_entries': {list_name: len(rows) for list_name, rows in changed_entries.items()},
+            'contacts_matching_changed_entries': len(matched_contact_ids),
+            'contacts_changed_since_last_run': len(changed_contact_ids),
+        })
+
     contact_ids = [contact_id for contact_id in contact_ids if contact_id not in screened_today]
     result['contacts_targeted'] = len(contact_ids)
-    if not apply_screenings:
+    if not apply_screenings or not contact_ids:
         return result
 
+    sanctions_lists = (
+        get_ofac_sdn_list() or [],
+        get_uk_sanctions_list() or [],
+        get_un_sanctions_list() or [],
+    )
     batch_result = create_contact_screenings_batch_from_contact_ids(
         contact_ids=contact_ids,
         sanctions_lists=sanctions_lists,
     )
     result['screenings_executed'] = batch_result.get('inserted', 0)
+    result['potential_matches'] = batch_result.get('potential_matches', {})
     result['screening_errors'] = batch_result.get('screening_errors', [])
     result['screening_error_contact_ids'] = batch_result.get('screening_error_contact_ids', [])
     return result
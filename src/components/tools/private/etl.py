@@ -1,22 +1,44 @@
 from pandas.tseries.offsets import BDay
 from datetime import datetime
 import os
+import numpy as np
 import pandas as pd
-import base64
 import time
 import pytz
 import pandas as pd
 import requests
 import re
+import csv
 import json
+import math
+import hashlib
+import inspect
+import tempfile
+import threading
 import xml.etree.ElementTree as ET
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO, StringIO, TextIOWrapper
 
 from src.utils.connectors.drive import GoogleDrive
 from src.utils.connectors.flex_query_api import getFlexQuery
 from src.utils.connectors.ibkr_trading_api import IBKRTradingAPI
 from src.utils.exception import handle_exception
-from src.components.tools.public.reporting import get_bond_report
+from src.utils.managers.bar_store_manager import BarStore
+from src.utils.managers.conid_cache_manager import ConidCache
+from src.utils.managers.task_scheduler_manager import TaskScheduler
+from src.utils.sanctions_matching import build_sanctions_list_index
+from src.utils.bond_math import (
+    get_bond_duration_array,
+    get_bond_price_cluster_array,
+    get_bond_ytm_array,
+    get_current_yield_array,
+    get_first_valid_price_array,
+    get_years_to_date_array,
+    get_day_count_array,
+    solve_bond_analytics,
+)
+from src.components.tools.public.reporting import SANCTIONS_INDEX_FILENAMES, UN_SANCTIONS_XML_URL, get_bond_report
 from src.utils.logger import logger
 
 logger.announcement('Initializing Reporting Service', type='info')
@@ -127,6 +149,7 @@ def extract_data(etl_config) -> dict:
             preexisting_batch_files = set()
             batch_file_inspection_error = str(e)
 
+    tasks = []
     for file_config in etl_config.get('files', []):
         step_name = file_config.get('name', 'unknown')
         extract_func = file_config.get('extract_func')
@@ -147,12 +170,15 @@ def extract_data(etl_config) -> dict:
                     )
                 })
             continue
-        try:
-            extract_func(file_config)
-            steps.append({'name': step_name, 'status': 'success'})
-        except Exception as e:
-            logger.error(f'Error during {step_name}: {e}')
-            steps.append({'name': step_name, 'status': 'failed', 'error': str(e)})
+        tasks.append(_build_task(file_config, extract_func))
+
+    # Independent extracts overlap; dependencies and provider limits come from the config.
+    run = _get_scheduler(etl_config, 'etl-extract').run(_prune_dependencies(tasks))
+    for entry in run['tasks']:
+        entry.pop('result', None)
+        if entry.get('status') == 'failed':
+            logger.error(f"Error during {entry['name']}: {entry.get('error')}")
+        steps.append(entry)
 
     failed_steps = [step for step in steps if step.get('status') != 'success']
     overall_status = 'success' if not failed_steps else 'partial'
@@ -166,6 +192,8 @@ def extract_data(etl_config) -> dict:
             'skipped': len([s for s in steps if s.get('status') == 'skipped']),
             'failed': len(failed_steps)
         },
+        'wall_ms': run['wall_ms'],
+        'cpu_ms': run['cpu_ms'],
         'steps': steps
     }
 
@@ -183,7 +211,7 @@ def extract_flex_query(config):
     attempt = 1
     while attempt <= max_attempts:
         try:
-            flex_query_data = getFlexQuery(query_id)
+            flex_query_data = getFlexQuery(query_id, as_frame=True)
             break
         except Exception as e:
             if attempt == max_attempts:
@@ -200,18 +228,60 @@ def extract_flex_query(config):
     Drive.upload_file(
         file_name=config['backup_name'],
         mime_type='text/csv',
-        file_data=(
-            flex_query_data.to_dict(orient='records')
-            if isinstance(flex_query_data, pd.DataFrame)
-            else flex_query_data
-        ),
+        file_data=flex_query_data,
         parent_folder_id=batch_folder_id
     )
     logger.announcement(f'Flex Query {query_id} uploaded.', type='success')
-    time.sleep(2)
 
     return {'name': query_id, 'status': 'success'}
 
+def _publish_sanctions_index(list_name: str, df: pd.DataFrame):
+    """
+    Build the name index of a sanctions list and publish it to the resources
+    folder next to the list, when the list itself is published there. API
+    workers map the published file instead of downloading the list and
+    building the index themselves. The index is tagged with the SHA-256 of the
+    list CSV, so workers only swap when the contents actually changed.
+
+    The new index is uploaded before older versions are deleted: workers pick
+    the most recent index file, so there is always one to map.
+    """
+    try:
+        csv_text = df.to_csv(index=False)
+        signature = hashlib.sha256(csv_text.encode('utf-8')).hexdigest()
+        # Round-trip through CSV so indexed rows look like the rows the list getters return.
+        rows = pd.read_csv(StringIO(csv_text)).fillna('').to_dict(orient='records')
+        index = build_sanctions_list_index(list_name, rows, signature=signature)
+        index_filename = SANCTIONS_INDEX_FILENAMES[list_name]
+        with tempfile.TemporaryDirectory() as directory:
+            index_path = os.path.join(directory, index_filename)
+            index.save(index_path)
+            with open(index_path, 'rb') as f:
+                index_bytes = f.read()
+
+        index_file = Drive.upload_stream(
+            file_name=index_filename,
+            mime_type='application/octet-stream',
+            source=index_bytes,
+            parent_folder_id=resources_folder_id
+        )
+    except Exception as e:
+        # The list itself was extracted; workers keep serving the previous index.
+        logger.error(f'Could not publish {list_name} sanctions index: {e}')
+        return None
+    try:
+        older_files = [
+            file for file in Drive.get_files_in_folder(resources_folder_id)
+            if file.get('name') == index_filename and file.get('id') != (index_file or {}).get('id')
+        ]
+        for older_file in older_files:
+            Drive.delete_file(file_id=older_file['id'])
+    except Exception as e:
+        # Workers pick the most recent index, so a leftover older file is harmless.
+        logger.warning(f'Could not delete older {list_name} sanctions indexes: {e}')
+    logger.info(f'Published {list_name} sanctions index {signature[:12]}: {len(index.rows)} rows, {len(index)} names, {len(index_bytes)} bytes')
+    return {'name': index_filename, 'signature': signature, 'rows': len(index.rows), 'names': len(index)}
+
 def extract_ofac_sdn_list(config=None):
     logger.announcement('Extracting OFAC SDN list.', type='info')
     sdn_url = 'https://sanctionslistservice.ofac.treas.gov/api/PublicationPreview/exports/SDN.CSV'
@@ -229,7 +299,7 @@ def extract_ofac_sdn_list(config=None):
         if row['type'] == 'Individual' or row['type'] == 'individual':
             df.at[index, 'name'] = row['name'].split(',')[1] + ' ' + row['name'].split(',')[0]
     
-    Drive.upload_file(file_name='ofac_sdn_list.csv', mime_type='text/csv', file_data=df.to_dict(orient='records'), parent_folder_id=batch_folder_id)
+    Drive.upload_stream(file_name='ofac_sdn_list.csv', mime_type='text/csv', source=df, parent_folder_id=batch_folder_id)
     logger.announcement('OFAC SDN list extracted and uploaded to batch folder.', type='success')
 
 def extract_uk_sanctions_list(config=None):
@@ -255,96 +325,119 @@ def extract_uk_sanctions_list(config=None):
     df = pd.read_csv(StringIO(csv_text), dtype=str, keep_default_na=False)
     df = df.fillna('')
 
-    Drive.upload_file(
+    Drive.upload_stream(
         file_name='uk_sanctions_list.csv',
         mime_type='text/csv',
-        file_data=df.to_dict(orient='records'),
+        source=df,
         parent_folder_id=batch_folder_id
     )
     logger.announcement('UK sanctions list extracted and uploaded to batch folder.', type='success')
 
-def extract_un_sanctions_list(config=None):
-    logger.announcement('Extracting UN sanctions list.', type='info')
+UN_SANCTIONS_COLUMNS = [
+    'name', 'entity_number', 'type', 'program', 'title', 'similarity', 'call_sign', 'vessel_type',
+    'tonnage', 'gross_registered_tonnage', 'vessel_flag', 'vessel_owner', 'more_info', 'aliases', 'source',
+]
+UN_SANCTIONS_CHUNK_BYTES = 256 * 1024
 
-    un_sanctions_response = requests.get('https://scsanctions.un.org/resources/xml/en/name/consolidated.xml?_gl=1*b6x5x9*_ga*MTM1Mzg4ODEzNS4xNzc3NjU0MjY4*_ga_TK9BQL5X7Z*czE3Nzc2NTQyNjgkbzEkZzEkdDE3Nzc2NTU1NzEkajYwJGwwJGgw')
-    un_sanctions_response.raise_for_status()
-    root = ET.fromstring(un_sanctions_response.content)
+def _un_sanctions_row(element) -> dict:
+    """One output row for an INDIVIDUAL or ENTITY element of the UN consolidated list."""
 
     def _clean_text(value):
         if value is None:
             return ''
         return str(value).strip()
 
-    def _join_name_parts(element, parts):
-        values = [_clean_text(element.findtext(part)) for part in parts]
-        return ' '.join([value for value in values if value != ''])
-
-    un_rows = []
-
-    for individual in root.findall('./INDIVIDUALS/INDIVIDUAL'):
-        primary_name = _join_name_parts(individual, ['FIRST_NAME', 'SECOND_NAME', 'THIRD_NAME', 'FOURTH_NAME'])
-        if primary_name == '':
-            primary_name = _clean_text(individual.findtext('NAME_ORIGINAL_SCRIPT'))
-
-        aliases = []
-        for alias in individual.findall('INDIVIDUAL_ALIAS'):
-            alias_name = _clean_text(alias.findtext('ALIAS_NAME'))
-            if alias_name != '':
-                aliases.append(alias_name)
-
-        un_rows.append({
-            'name': primary_name,
-            'entity_number': _clean_text(individual.findtext('REFERENCE_NUMBER')),
-            'type': 'Individual',
-            'program': _clean_text(individual.findtext('UN_LIST_TYPE')),
-            'title': _clean_text(individual.findtext('DESIGNATION/VALUE')),
-            'similarity': '',
-            'call_sign': '',
-            'vessel_type': '',
-            'tonnage': '',
-            'gross_registered_tonnage': '',
-            'vessel_flag': '',
-            'vessel_owner': '',
-            'more_info': _clean_text(individual.findtext('COMMENTS1')),
-            'aliases': '|'.join(aliases),
-            'source': 'UN'
-        })
+    is_individual = element.tag == 'INDIVIDUAL'
+    primary_name = ' '.join(
+        value for value in (
+            _clean_text(element.findtext(part))
+            for part in ['FIRST_NAME', 'SECOND_NAME', 'THIRD_NAME', 'FOURTH_NAME']
+        )
+        if value != ''
+    )
+    if primary_name == '' and is_individual:
+        primary_name = _clean_text(element.findtext('NAME_ORIGINAL_SCRIPT'))
 
-    for entity in root.findall('./ENTITIES/ENTITY'):
-        primary_name = _join_name_parts(entity, ['FIRST_NAME', 'SECOND_NAME', 'THIRD_NAME', 'FOURTH_NAME'])
-        aliases = []
-        for alias in entity.findall('ENTITY_ALIAS'):
-            alias_name = _clean_text(alias.findtext('ALIAS_NAME'))
-            if alias_name != '':
-                aliases.append(alias_name)
-
-        un_rows.append({
-            'name': primary_name,
-            'entity_number': _clean_text(entity.findtext('REFERENCE_NUMBER')),
-            'type': 'Entity',
-            'program': _clean_text(entity.findtext('UN_LIST_TYPE')),
-            'title': '',
-            'similarity': '',
-            'call_sign': '',
-            'vessel_type': '',
-            'tonnage': '',
-            'gross_registered_tonnage': '',
-            'vessel_flag': '',
-            'vessel_owner': '',
-            'more_info': _clean_text(entity.findtext('COMMENTS1')),
-            'aliases': '|'.join(aliases),
-            'source': 'UN'
-        })
+    aliases = []
+    for alias in element.findall('INDIVIDUAL_ALIAS' if is_individual else 'ENTITY_ALIAS'):
+        alias_name = _clean_text(alias.findtext('ALIAS_NAME'))
+        if alias_name != '':
+            aliases.append(alias_name)
 
-    df = pd.DataFrame(un_rows).fillna('')
-    un_timestamp = datetime.now(cst).strftime('%Y%m%d%H%M')
+    return {
+        'name': primary_name,
+        'entity_number': _clean_text(element.findtext('REFERENCE_NUMBER')),
+        'type': 'Individual' if is_individual else 'Entity',
+        'program': _clean_text(element.findtext('UN_LIST_TYPE')),
+        'title': _clean_text(element.findtext('DESIGNATION/VALUE')) if is_individual else '',
+        'similarity': '',
+        'call_sign': '',
+        'vessel_type': '',
+        'tonnage': '',
+        'gross_registered_tonnage': '',
+        'vessel_flag': '',
+        'vessel_owner': '',
+        'more_info': _clean_text(element.findtext('COMMENTS1')),
+        'aliases': '|'.join(aliases),
+        'source': 'UN'
+    }
 
-    Drive.upload_file(
-        file_name=f'un_sanctions_list_{un_timestamp}.csv',
-        mime_type='text/csv',
-        file_data=df.to_dict(orient='records'),
-        parent_folder_id=batch_folder_id
-    )
+def _iter_un_sanctions_rows(chunks):
+    """
+    Parse the UN consolidated XML incrementally from an iterable of byte
+    chunks and yield one row per INDIVIDUALS/INDIVIDUAL and ENTITIES/ENTITY.
+    Each element is detached from the tree once its row is built, so only the
+    element being read is held in memory, never the whole document.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    open_elements = []
+
+    def _drain():
+        for event, element in parser.read_events():
+            if event == 'start':
+                open_elements.append(element)
+                continue
+            open_elements.pop()
+            if len(open_elements) != 2:
+                continue
+            if (open_elements[1].tag, element.tag) in (('INDIVIDUALS', 'INDIVIDUAL'), ('ENTITIES', 'ENTITY')):
+                yield _un_sanctions_row(element)
+                open_elements[1].remove(element)
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from _drain()
+    parser.close()
+    yield from _drain()
+
+def extract_un_sanctions_list(config=None):
+    logger.announcement('Extracting UN sanctions list.', type='info')
+
+    # Rows go to a temporary CSV file as the XML is downloaded and parsed, so
+    # parsing overlaps the download and memory does not grow with the list.
+    row_count = 0
+    with tempfile.TemporaryFile() as csv_file:
+        csv_text = TextIOWrapper(csv_file, encoding='utf-8', newline='')
+        writer = csv.DictWriter(csv_text, fieldnames=UN_SANCTIONS_COLUMNS, lineterminator='\n')
+        writer.writeheader()
+        with requests.get(UN_SANCTIONS_XML_URL, stream=True) as un_sanctions_response:
+            un_sanctions_response.raise_for_status()
+            for row in _iter_un_sanctions_rows(un_sanctions_response.iter_content(chunk_size=UN_SANCTIONS_CHUNK_BYTES)):
+                writer.writerow(row)
+                row_count += 1
+        csv_text.flush()
+        csv_text.detach()
+        logger.info(f'Parsed {row_count} UN sanctions entries.')
+
+        un_timestamp = datetime.now(cst).strftime('%Y%m%d%H%M')
+        csv_file.seek(0)
+        Drive.upload_stream(
+            file_name=f'un_sanctions_list_{un_timestamp}.csv',
+            mime_type='text/csv',
+            source=csv_file,
+            parent_folder_id=batch_folder_id
+        )
+        csv_file.seek(0)
     logger.announcement('UN sanctions list extracted and uploaded to batch folder.', type='success')
     return {'status': 'success'}
 
@@ -439,7 +532,7 @@ def extract_account_details_backup(config=None):
 
     most_recent_file = Drive.get_most_recent_file(candidate_files)
 
-    raw_details = Drive.download_file(file_id=most_recent_file['id'], parse=True)
+    raw_details = Drive.download_file(file_id=most_recent_file['id'], parse=True, file_info=most_recent_file)
     details = raw_details if isinstance(raw_details, list) else []
     enriched_details = _append_missing_account_details(details)
     file_name = account_details_config['backup_name']
@@ -453,11 +546,10 @@ def extract_account_details_backup(config=None):
         Drive.delete_file(file_id=existing_file['id'])
 
     json_bytes = json.dumps(enriched_details, default=str).encode('utf-8')
-    json_base64 = base64.b64encode(json_bytes).decode('utf-8')
-    Drive.upload_file(
+    Drive.upload_stream(
         file_name=file_name,
         mime_type='application/json',
-        file_data=json_base64,
+        source=json_bytes,
         parent_folder_id=backup_folder_id
     )
 
@@ -494,12 +586,12 @@ def extract_bond_snapshot(config=None):
             retry_count += 1
             time.sleep(2)
 
-        first_snapshot = ibkr_trading_api.get_market_data_snapshot(','.join(conids[:100]))
-        second_snapshot = ibkr_trading_api.get_market_data_snapshot(','.join(conids[101:200]))
-        third_snapshot = ibkr_trading_api.get_market_data_snapshot(','.join(conids[201:300]))
-        fourth_snapshot = ibkr_trading_api.get_market_data_snapshot(','.join(conids[301:400]))
-        fifth_snapshot = ibkr_trading_api.get_market_data_snapshot(','.join(conids[401:500]))
-        df = pd.DataFrame(first_snapshot + second_snapshot + third_snapshot + fourth_snapshot + fifth_snapshot)
+        snapshot = _get_market_data_snapshot_in_chunks(
+            api_client=ibkr_trading_api,
+            conids=conids[:500],
+            chunk_size=100
+        )
+        df = pd.DataFrame(snapshot)
         df.columns = df.columns.str.capitalize()
 
         df['Financial Instrument'] = df['Symbol'] + ' ' + df['Contract_description_2']
@@ -576,7 +668,7 @@ def extract_bond_snapshot(config=None):
             raise Exception('Missing report config for bonds_snapshot')
         file_name = report_config['backup_name']
         backup_folder_id = report_config['backup_folder_id']
-        Drive.upload_file(file_name=file_name, mime_type='text/csv', file_data=df.to_dict(orient='records'), parent_folder_id=backup_folder_id)
+        Drive.upload_stream(file_name=file_name, mime_type='text/csv', source=df, parent_folder_id=backup_folder_id)
         return df
 
     except Exception as e:
@@ -613,57 +705,98 @@ def _initialize_ibkr_market_data_client():
     time.sleep(2)
     return api_client
 
+# Ticker to conid mappings rarely change, so resolutions persist between runs.
+_conid_cache = None
+_conid_cache_lock = threading.Lock()
+
+def _get_conid_cache():
+    global _conid_cache
+    with _conid_cache_lock:
+        if _conid_cache is None:
+            _conid_cache = ConidCache(
+                os.getenv('IBKR_CONID_CACHE_PATH', '/app/cache/ibkr_conids.json'),
+                ttl_seconds=float(os.getenv('IBKR_CONID_CACHE_TTL_DAYS', '30')) * 86400,
+                negative_ttl_seconds=float(os.getenv('IBKR_CONID_CACHE_NEGATIVE_TTL_HOURS', '24')) * 3600,
+                name='ibkr_conid_cache',
+            )
+    return _conid_cache
+
+def _lookup_conid(api_client, ticker: str, sec_type: str) -> tuple[str | None, str | None, bool]:
+    """
+    Resolve one ticker through IBKR's security search.
+
+    Returns (conid, failure reason, cacheable). Request errors are not
+    cacheable so a transient outage does not become a negative entry.
+    """
+    try:
+        results = api_client.get_securities_by_symbol(ticker, sec_type)
+    except Exception as exc:
+        return None, f'error={exc}', False
+
+    if not isinstance(results, list):
+        return None, 'reason=unexpected_response', True
+
+    exact_matches = [
+        item for item in results
+        if str(item.get('symbol', '')).upper() == ticker.upper()
+    ]
+    candidates = exact_matches or results
+
+    selected = None
+    for item in candidates:
+        sections = item.get('sections', [])
+        section_types = [
+            str(section.get('secType', '')).upper()
+            for section in sections
+            if isinstance(section, dict)
+        ]
+        if not section_types or sec_type.upper() in section_types:
+            selected = item
+            break
+
+    if not selected:
+        return None, f'reason=no_{sec_type}_contract', True
+
+    conid = selected.get('conid')
+    if conid is None:
+        return None, 'reason=no_conid', True
+    return str(conid), None, True
+
 def _resolve_snapshot_conids(
     api_client,
     tickers: list[str],
     sec_type: str = 'STK',
     return_mapping: bool = False,
+    stats: dict | None = None,
 ) -> list[str] | tuple[list[str], dict[str, str]]:
     conids = []
     conid_to_ticker = {}
     seen = set()
+    cache = _get_conid_cache()
+    run_stats = {'cache_hits': 0, 'cache_negative_hits': 0, 'lookups': 0}
 
     logger.info(f'IBKR {sec_type} resolution started: {len(tickers)} configured tickers')
 
     for ticker in tickers:
-        try:
-            results = api_client.get_securities_by_symbol(ticker, sec_type)
-        except Exception as exc:
-            logger.warning(f'MARKET_DATA_SYMBOL_FAILED ticker={ticker} stage=resolve error={exc}')
-            continue
-
-        if not isinstance(results, list):
-            logger.warning(f'MARKET_DATA_SYMBOL_FAILED ticker={ticker} stage=resolve reason=unexpected_response')
-            continue
-
-        exact_matches = [
-            item for item in results
-            if str(item.get('symbol', '')).upper() == ticker.upper()
-        ]
-        candidates = exact_matches or results
-
-        selected = None
-        for item in candidates:
-            sections = item.get('sections', [])
-            section_types = [
-                str(section.get('secType', '')).upper()
-                for section in sections
-                if isinstance(section, dict)
-            ]
-            if not section_types or sec_type.upper() in section_types:
-                selected = item
-                break
-
-        if not selected:
-            logger.warning(f'MARKET_DATA_SYMBOL_FAILED ticker={ticker} stage=resolve reason=no_{sec_type}_contract')
+        cached = cache.get(sec_type, ticker)
+        if cached is not None and cached['conid'] is None:
+            run_stats['cache_negative_hits'] += 1
+            logger.warning(f'MARKET_DATA_SYMBOL_FAILED ticker={ticker} stage=resolve {cached["reason"]} cached=true')
             continue
 
-        conid = selected.get('conid')
-        if conid is None:
-            logger.warning(f'MARKET_DATA_SYMBOL_FAILED ticker={ticker} stage=resolve reason=no_conid')
-            continue
+        if cached is not None:
+            run_stats['cache_hits'] += 1
+            conid = cached['conid']
+        else:
+            run_stats['lookups'] += 1
+            conid, failure, cacheable = _lookup_conid(api_client, ticker, sec_type)
+            if conid is None:
+                if cacheable:
+                    cache.put_negative(sec_type, ticker, failure)
+                logger.warning(f'MARKET_DATA_SYMBOL_FAILED ticker={ticker} stage=resolve {failure}')
+                continue
+            cache.put(sec_type, ticker, conid)
 
-        conid = str(conid)
         if conid in seen:
             logger.warning(f'MARKET_DATA_SYMBOL_FAILED ticker={ticker} stage=resolve reason=duplicate_conid conid={conid}')
             continue
@@ -673,9 +806,149 @@ def _resolve_snapshot_conids(
         conid_to_ticker[conid] = ticker
         logger.info(f'MARKET_DATA_SYMBOL_RESOLVED ticker={ticker} conid={conid}')
 
-    logger.info(f'IBKR {sec_type} resolution complete: resolved={len(conids)} failed={len(tickers) - len(conids)}')
+    cache.save()
+    if stats is not None:
+        stats.update(run_stats)
+    logger.info(
+        f'IBKR {sec_type} resolution complete: resolved={len(conids)} failed={len(tickers) - len(conids)} '
+        f'cache_hits={run_stats["cache_hits"]} cache_negative_hits={run_stats["cache_negative_hits"]} '
+        f'lookups={run_stats["lookups"]}'
+    )
     return (conids, conid_to_ticker) if return_mapping else conids
 
+# Historical daily bars kept between snapshot runs; see _get_daily_bars.
+BAR_STORE_MAX_TAIL_DAYS = 365
+# Refetch the full window this often even without a detected adjustment.
+BAR_STORE_FULL_REFRESH_DAYS = int(os.getenv('IBKR_BAR_STORE_FULL_REFRESH_DAYS', '30'))
+_bar_store = None
+_bar_store_lock = threading.Lock()
+
+def _get_bar_store():
+    global _bar_store
+    with _bar_store_lock:
+        if _bar_store is None:
+            _bar_store = BarStore(
+                os.getenv('IBKR_BAR_STORE_PATH', '/app/cache/ibkr_bars.sqlite3'),
+                name='ibkr_bar_store',
+            )
+    return _bar_store
+
+def _fetch_full_daily_history(fetch_history, conid: str) -> list:
+    history = fetch_history(
+        conid=str(conid),
+        period='5y',
+        bar='1d',
+        source='Last',
+        outside_rth=True,
+    )
+    bars = history.get('data', []) if isinstance(history, dict) else []
+
+    # IBKR caps a daily response at 1,000 bars. A five-year request
+    # therefore needs a second, backward-looking page for the older
+    # portion of the requested period.
+    if bars:
+        parsed_timestamps = pd.to_datetime(
+            [bar.get('t') for bar in bars if isinstance(bar, dict)],
+            unit='ms',
+            errors='coerce',
+        )
+        parsed_timestamps = parsed_timestamps[parsed_timestamps.notna()]
+        if len(parsed_timestamps) > 0:
+            latest_timestamp = parsed_timestamps.max()
+            oldest_timestamp = parsed_timestamps.min()
+            required_start = latest_timestamp - pd.DateOffset(years=5)
+            if oldest_timestamp > required_start:
+                older_history = fetch_history(
+                    conid=str(conid),
+                    period='5y',
+                    bar='1d',
+                    start_time=oldest_timestamp.strftime('%Y%m%d-%H:%M:%S'),
+                    direction=-1,
+                    source='Last',
+                    outside_rth=True,
+                )
+                older_bars = older_history.get('data', []) if isinstance(older_history, dict) else []
+                bars = list(bars) + list(older_bars or [])
+    return bars
+
+def _same_bar(stored: dict, fetched: dict | None) -> bool:
+    if not isinstance(fetched, dict):
+        return False
+    for key in ('o', 'h', 'l', 'c'):
+        stored_value, fetched_value = stored.get(key), fetched.get(key)
+        if stored_value is None or fetched_value is None:
+            if stored_value is not None or fetched_value is not None:
+                return False
+            continue
+        try:
+            if not math.isclose(float(stored_value), float(fetched_value), rel_tol=1e-6):
+                return False
+        except (TypeError, ValueError):
+            return False
+    return True
+
+def _get_daily_bars(fetch_history, conid: str) -> tuple[list, str]:
+    """
+    Return about five years of daily bars for a conid, fetching from IBKR only
+    what the local bar store is missing.
+
+    The first call for a conid pages through the full five-year window and
+    stores it. Later calls only request the days since the second-to-last
+    stored bar: the last one is replaced in case it was written before the
+    close, and the one before it is compared with what IBKR returns now. A
+    mismatch means the history was adjusted (e.g. a split), so the series is
+    replaced by a full fetch, as it also is every BAR_STORE_FULL_REFRESH_DAYS.
+    ``fetch_history`` has the signature of get_historical_market_data. Returns
+    the bars and the fetch mode: 'full', 'tail', 'refetch' or 'stored' (store
+    disabled or IBKR returned nothing new).
+    """
+    store = _get_bar_store()
+    now_ms = time.time() * 1000
+    day_ms = 86_400_000
+
+    if not store.enabled:
+        return _fetch_full_daily_history(fetch_history, conid), 'full'
+
+    info = store.series_info(conid, '1d')
+    full_fetch_age_days = (time.time() - info['complete_at']) / 86_400 if info['complete_at'] else None
+    stored_tail = store.tail_bars(conid, '1d', 2) if info['complete'] else []
+    check_bar = stored_tail[0] if len(stored_tail) == 2 else None
+    since = check_bar['t'] if check_bar else info['last']
+    gap_days = (now_ms - since) / day_ms if since is not None else None
+
+    mode = 'full'
+    if (
+        full_fetch_age_days is not None
+        and full_fetch_age_days <= BAR_STORE_FULL_REFRESH_DAYS
+        and gap_days is not None
+        and gap_days <= BAR_STORE_MAX_TAIL_DAYS
+    ):
+        history = fetch_history(
+            conid=str(conid),
+            period=f'{int(gap_days) + 2}d',
+            bar='1d',
+            source='Last',
+            outside_rth=True,
+        )
+        tail = history.get('data', []) if isinstance(history, dict) else []
+        fetched_check_bar = next(
+            (bar for bar in tail if isinstance(bar, dict) and str(bar.get('t')) == str(check_bar['t'])),
+            None,
+        ) if check_bar and tail else None
+        if check_bar and tail and not _same_bar(check_bar, fetched_check_bar):
+            logger.info(f'MARKET_DATA_HISTORY_ADJUSTED conid={conid} t={check_bar["t"]}; refetching full window')
+            mode = 'refetch'
+        else:
+            mode = 'tail' if store.put_bars(conid, '1d', tail) else 'stored'
+
+    if mode in ('full', 'refetch'):
+        # Only a successful full fetch lets later runs switch to tail requests.
+        if store.replace_series(conid, '1d', _fetch_full_daily_history(fetch_history, conid)):
+            store.mark_complete(conid, '1d')
+
+    # Six years leaves room for the five-year anchor to fall on a non-trading day.
+    return store.get_bars(conid, '1d', since=int(now_ms - 6 * 366 * day_ms)), mode
+
 def _extract_equity_like_snapshot(
     tickers: list[str],
     config_name: str,
@@ -685,8 +958,9 @@ def _extract_equity_like_snapshot(
     dev_mode: bool | None = None,
 ):
     api_client = _initialize_ibkr_market_data_client()
+    resolution_stats = {}
     conids, conid_to_ticker = _resolve_snapshot_conids(
-        api_client, tickers, sec_type='STK', return_mapping=True
+        api_client, tickers, sec_type='STK', return_mapping=True, stats=resolution_stats
     )
 
     if not conids:
@@ -695,8 +969,7 @@ def _extract_equity_like_snapshot(
     snapshot = _get_market_data_snapshot_in_chunks(
         api_client=api_client,
         conids=conids,
-        chunk_size=75,
-        sleep_seconds=0.25
+        chunk_size=75
     )
     # Keep the identity from the security search through the snapshot call.
     # Collect row-level failures so the report is marked failed with useful
@@ -743,7 +1016,10 @@ def _extract_equity_like_snapshot(
 
     logger.info(
         f'MARKET_DATA_SNAPSHOT_SUMMARY type={snapshot_type} requested={len(conids)} '
-        f'returned={len(returned_conids)} failed={len(conids) - len(returned_conids)}'
+        f'returned={len(returned_conids)} failed={len(conids) - len(returned_conids)} '
+        f'conid_cache_hits={resolution_stats.get("cache_hits", 0)} '
+        f'conid_cache_negative_hits={resolution_stats.get("cache_negative_hits", 0)} '
+        f'conid_lookups={resolution_stats.get("lookups", 0)}'
     )
     if validation_failures:
         sample = ', '.join(validation_failures[:10])
@@ -782,41 +1058,8 @@ def _extract_equity_like_snapshot(
     def _average_annual_return(conid, ticker):
         try:
             logger.info(f'MARKET_DATA_HISTORY_START ticker={ticker} conid={conid}')
-            history = api_client.get_historical_market_data(
-                conid=str(conid),
-                period='5y',
-                bar='1d',
-                source='Last',
-                outside_rth=True,
-            )
-            bars = history.get('data', []) if isinstance(history, dict) else []
-
-            # IBKR caps a daily response at 1,000 bars. A five-year request
-            # therefore needs a second, backward-looking page for the older
-            # portion of the requested period.
-            if bars:
-                parsed_timestamps = pd.to_datetime(
-                    [bar.get('t') for bar in bars if isinstance(bar, dict)],
-                    unit='ms',
-                    errors='coerce',
-                )
-                parsed_timestamps = parsed_timestamps[parsed_timestamps.notna()]
-                if len(parsed_timestamps) > 0:
-                    latest_timestamp = parsed_timestamps.max()
-                    oldest_timestamp = parsed_timestamps.min()
-                    required_start = latest_timestamp - pd.DateOffset(years=5)
-                    if oldest_timestamp > required_start:
-                        older_history = api_client.get_historical_market_data(
-                            conid=str(conid),
-                            period='5y',
-                            bar='1d',
-                            start_time=oldest_timestamp.strftime('%Y%m%d-%H:%M:%S'),
-                            direction=-1,
-                            source='Last',
-                            outside_rth=True,
-                        )
-                        older_bars = older_history.get('data', []) if isinstance(older_history, dict) else []
-                        bars = list(bars) + list(older_bars or [])
+            bars, fetch_mode = _get_daily_bars(fetch_history, conid)
+            logger.info(f'MARKET_DATA_HISTORY_BARS ticker={ticker} conid={conid} mode={fetch_mode} bars={len(bars)}')
 
             rows = []
             for bar in bars:
@@ -871,13 +1114,24 @@ def _extract_equity_like_snapshot(
         dev_mode = os.getenv('DEV_MODE', 'false').lower() in ('true', '1', 'yes')
 
     if snapshot_type in {'ETF', 'STOCK'} and dev_mode:
-        historical_yields = []
+        history_targets = []
         for _, row in df.iterrows():
             conid = str(row['Conidex']).split('@', 1)[0]
-            ticker = conid_to_ticker.get(conid, row.get('Financial Instrument', 'unknown'))
-            historical_yields.append(_average_annual_return(conid, ticker))
-            # Avoid bursting the IBKR historical-data endpoint for the equity list.
-            time.sleep(0.1)
+            history_targets.append((conid, conid_to_ticker.get(conid, row.get('Financial Instrument', 'unknown'))))
+        # Resolve the SSO headers once; workers must not swap the client's credentials.
+        fetch_history = api_client.get_historical_market_data_fetcher()
+        # IBKR allows five concurrent history requests per session.
+        history_workers = max(1, min(int(os.getenv('IBKR_HISTORY_MAX_WORKERS', '4')), 5))
+        # The store's counters are process-wide; report this run's share.
+        stats_before = _get_bar_store().stats()
+        with ThreadPoolExecutor(max_workers=history_workers, thread_name_prefix='ibkr_history') as executor:
+            historical_yields = list(executor.map(lambda target: _average_annual_return(*target), history_targets))
+        stats_after = _get_bar_store().stats()
+        logger.info(
+            f'MARKET_DATA_HISTORY_SUMMARY type={snapshot_type} conids={len(history_targets)} '
+            f'bars_written={stats_after["bars_written"] - stats_before["bars_written"]} '
+            f'store_errors={stats_after["errors"] - stats_before["errors"]}'
+        )
         df['Current Yield'] = historical_yields
     elif snapshot_type in {'ETF', 'STOCK'}:
         logger.info(
@@ -909,10 +1163,10 @@ def _extract_equity_like_snapshot(
             raise Exception(f'Missing report config for {config_name}')
 
         file_name = market_data_snapshot_config['backup_name']
-        Drive.upload_file(
+        Drive.upload_stream(
             file_name=file_name,
             mime_type='text/csv',
-            file_data=df.to_dict(orient='records'),
+            source=df,
             parent_folder_id=market_data_snapshot_config['backup_folder_id']
         )
     return df
@@ -971,26 +1225,14 @@ def _collect_watchlist_bond_conids(api_client, watchlist_id: str, max_retries: i
 
     return unique_conids
 
-def _get_market_data_snapshot_in_chunks(api_client, conids: list, chunk_size: int = 75, sleep_seconds: float = 0.25) -> list:
-    """Fetch market snapshots in smaller chunks to stay under IBKR conid limits."""
+def _get_market_data_snapshot_in_chunks(api_client, conids: list, chunk_size: int = 75) -> list:
+    """Fetch market snapshots in chunks small enough for IBKR's conid limit; chunks are primed and polled together."""
     if chunk_size <= 0:
         raise ValueError('chunk_size must be greater than zero')
 
-    snapshots = []
     total_chunks = (len(conids) + chunk_size - 1) // chunk_size
-
-    for chunk_index, start in enumerate(range(0, len(conids), chunk_size), start=1):
-        chunk = conids[start:start + chunk_size]
-        if not chunk:
-            continue
-
-        logger.info(f'Fetching market snapshot chunk {chunk_index}/{total_chunks} ({len(chunk)} conids)')
-        snapshots.extend(api_client.get_market_data_snapshot(','.join(chunk)))
-
-        if sleep_seconds > 0 and chunk_index < total_chunks:
-            time.sleep(sleep_seconds)
-
-    return snapshots
+    logger.info(f'Fetching market snapshot for {len(conids)} conids in {total_chunks} chunks')
+    return api_client.get_market_data_snapshots(conids, chunk_size=chunk_size)
 
 def extract_ust_bond_snapshot(config=None):
     
@@ -1015,8 +1257,7 @@ def extract_ust_bond_snapshot(config=None):
     snapshot = _get_market_data_snapshot_in_chunks(
         api_client=ibkr_trading_api,
         conids=ust_conids[:350],
-        chunk_size=75,
-        sleep_seconds=0.25
+        chunk_size=75
     )
     df = pd.DataFrame(snapshot)
     df.columns = df.columns.str.capitalize()
@@ -1071,10 +1312,10 @@ def extract_ust_bond_snapshot(config=None):
         raise Exception('Missing report config for ust_bonds_snapshot')
 
     file_name = market_data_snapshot_config['backup_name']
-    Drive.upload_file(
+    Drive.upload_stream(
         file_name=file_name,
         mime_type='text/csv',
-        file_data=df.to_dict(orient='records'),
+        source=df,
         parent_folder_id=market_data_snapshot_config['backup_folder_id']
     )
     return df
@@ -1105,7 +1346,11 @@ def extract_sovereign_bond_snapshot():
         retry_count += 1
         time.sleep(2)
     
-    snapshot = ibkr_trading_api.get_market_data_snapshot(','.join(ust_conids[:350]))
+    snapshot = _get_market_data_snapshot_in_chunks(
+        api_client=ibkr_trading_api,
+        conids=ust_conids[:350],
+        chunk_size=75
+    )
     df = pd.DataFrame(snapshot)
     df.columns = df.columns.str.capitalize()
 
@@ -1280,32 +1525,36 @@ def transform_data(etl_config) -> dict:
     
     configs_to_process = _resolve_pipeline_reports(etl_config)
 
-    processed_reports = []
+    tasks = []
     for config in configs_to_process:
         if not config.get('backup_folder_id'):
             logger.warning(f"Skipping report '{config.get('name')}' because backup_folder_id is empty.")
             continue
-        try:
-            report_result = process_report(config)
-            processed_reports.append(report_result)
-        except Exception as e:
-            logger.error(f"Failed transforming report '{config.get('name')}': {e}")
-            processed_reports.append({
-                'name': config.get('name'),
-                'status': 'failed',
-                'error': str(e)
-            })
+        # Transforms only talk to Drive, so they are not held by the extract provider limits.
+        tasks.append({**_build_task(config, process_report), 'provider': None})
+
+    run = _get_scheduler(etl_config, 'etl-transform').run(_prune_dependencies(tasks))
+    processed_reports = []
+    for entry in run['tasks']:
+        report_result = entry.pop('result', None) or {}
+        if entry.get('status') == 'failed':
+            logger.error(f"Failed transforming report '{entry['name']}': {entry.get('error')}")
+        processed_reports.append({**report_result, **entry})
     logger.announcement('Files processed.', type='success')
 
     logger.announcement('Backups successfully transformed into reports.', type='success')
     failed_reports = [report for report in processed_reports if report.get('status') != 'success']
+    unchanged_reports = [report for report in processed_reports if (report.get('manifest') or {}).get('state') == 'unchanged']
     return {
         'status': 'success' if not failed_reports else 'partial',
         'summary': {
             'total': len(processed_reports),
             'successful': len(processed_reports) - len(failed_reports),
+            'unchanged': len(unchanged_reports),
             'failed': len(failed_reports)
         },
+        'wall_ms': run['wall_ms'],
+        'cpu_ms': run['cpu_ms'],
         'reports': processed_reports
     }
 
@@ -1340,11 +1589,25 @@ def process_report(config):
         # Get most recent file
         most_recent_file = Drive.get_most_recent_file(files)
 
+        # Skip the download, transform and upload when this exact input was
+        # already turned into an output that still exists.
+        fingerprint = _input_fingerprint(config, most_recent_file)
+        manifest_entry = _get_manifest_entry(config_name)
+        if _is_unchanged(manifest_entry, fingerprint):
+            logger.info(f'{config_name}: backup {most_recent_file.get("name")} unchanged since last run, skipping transform.')
+            return {
+                'name': config_name,
+                'status': 'success',
+                'backup_file': most_recent_file.get('name'),
+                'output_file': output_filename,
+                'manifest': {'state': 'unchanged', **manifest_entry},
+            }
+
         # For very large files that do not require row-level transformations,
         # avoid parsing into DataFrame/records to reduce memory and runtime.
         if config.get('raw_passthrough', False):
             try:
-                raw_file = Drive.download_file(file_id=most_recent_file['id'], parse=False)
+                raw_file = Drive.download_file(file_id=most_recent_file['id'], parse=False, file_info=most_recent_file)
             except:
                 try:
                     raw_file = Drive.export_file(
@@ -1357,7 +1620,6 @@ def process_report(config):
                     raise Exception(f'Error downloading file: {most_recent_file}')
 
             output_mime_type = 'application/json' if output_filename.lower().endswith('.json') else 'text/csv'
-            file_payload = base64.b64encode(raw_file).decode('utf-8')
 
             try:
                 existing_files = [
@@ -1369,22 +1631,28 @@ def process_report(config):
             except:
                 pass
 
-            Drive.upload_file(
+            output_file = Drive.upload_stream(
                 file_name=output_filename,
                 mime_type=output_mime_type,
-                file_data=file_payload,
+                source=raw_file,
                 parent_folder_id=resources_folder_id
             )
+            if config.get('sanctions_index'):
+                _publish_sanctions_index(
+                    config['sanctions_index'],
+                    pd.read_csv(BytesIO(raw_file), dtype=str, keep_default_na=False, encoding='utf-8'),
+                )
             return {
                 'name': config_name,
                 'status': 'success',
                 'backup_file': most_recent_file.get('name'),
-                'output_file': output_filename
+                'output_file': output_filename,
+                'manifest': _record_manifest_entry(config_name, fingerprint, output_file, previous=manifest_entry),
             }
 
         # Download file and read into dataframe
         try:
-            f = Drive.download_file(file_id=most_recent_file['id'], parse=True)
+            f = Drive.download_file(file_id=most_recent_file['id'], parse=True, file_info=most_recent_file, as_dataframe=True)
         except:
             try:
                 f = Drive.export_file(file_id=most_recent_file['id'], mime_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', parse=True)
@@ -1412,13 +1680,12 @@ def process_report(config):
                 logger.error(f'Error serializing JSON output for {output_filename}: {json_error}')
                 raise
 
-            file_payload = base64.b64encode(json_bytes).decode('utf-8')
+            file_payload = json_bytes
         else:
             if isinstance(transformed_content, pd.DataFrame):
-                csv_content = transformed_content.to_dict(orient='records')
+                file_payload = transformed_content
             else:
-                csv_content = pd.DataFrame(transformed_content).to_dict(orient='records')
-            file_payload = csv_content
+                file_payload = pd.DataFrame(transformed_content)
         
         # Delete all existing output files with the same name to avoid duplicates.
         try:
@@ -1431,7 +1698,10 @@ def process_report(config):
         except:
             pass
 
-        Drive.upload_file(file_name=output_filename, mime_type=output_mime_type, file_data=file_payload, parent_folder_id=resources_folder_id)
+        output_file = Drive.upload_stream(file_name=output_filename, mime_type=output_mime_type, source=file_payload, parent_folder_id=resources_folder_id)
+        if config.get('sanctions_index'):
+            _publish_sanctions_index(config['sanctions_index'], file_payload)
+        manifest = _record_manifest_entry(config_name, fingerprint, output_file, previous=manifest_entry)
     except:
         logger.error(f'Error processing {config} file.')
         raise Exception(f'Error processing {config} file.')
@@ -1440,7 +1710,8 @@ def process_report(config):
         'name': config_name,
         'status': 'success',
         'backup_file': most_recent_file.get('name'),
-        'output_file': output_filename
+        'output_file': output_filename,
+        'manifest': manifest
     }
 
 # Clients
@@ -1465,8 +1736,7 @@ def process_open_positions_template(df):
     if existing_file:
         Drive.delete_file(file_id=existing_file['id'])
 
-    full_dict = df.to_dict(orient='records')
-    Drive.upload_file(file_name='ibkr_open_positions_all.csv', mime_type='text/csv', file_data=full_dict, parent_folder_id=resources_folder_id)
+    Drive.upload_stream(file_name='ibkr_open_positions_all.csv', mime_type='text/csv', source=df, parent_folder_id=resources_folder_id)
     
     # Generate template (extract bonds and details)
     df = df[(df['AssetClass'] == 'BOND') & (df['LevelOfDetail'] == 'LOT')]
@@ -1658,16 +1928,37 @@ def process_bonds(df):
         except:
             df[column] = df[column]
 
-    df['CY'] = df.apply(lambda row: get_current_yield(row['Coupon'], row['Last'], row['Ask'], row['Bid']), axis=1)
-    df['Price'] = df.apply(lambda row: get_first_valid_price(row['Ask'], row['Bid'], row['Last']), axis=1)
-    df['Frequency'] = df['Payment Frequency'].apply(get_payment_frequency_from_text)
-    df['Price Cluster'] = df['Price'].apply(get_bond_price_cluster)
-    df['Size Preasure'] = df.apply(lambda row: get_size_preasure(row['Ask Size'], row['Bid Size']), axis=1)
-    df['Duration'] = df.apply(lambda row: get_bond_duration(row['Maturity'], 
-        row['Coupon']/100, # Convert coupon percentage to decimal
-        row['Price'],
-        row['Frequency']), 
-        axis=1)
+    # Column-wide NumPy versions of the scalar helpers in src.utils.bond_math.
+    df['CY'] = get_current_yield_array(df['Coupon'], df['Last'], df['Ask'], df['Bid'])
+    df['Price'] = get_first_valid_price_array(df['Ask'], df['Bid'], df['Last'])
+    df['Frequency'] = df['Payment Frequency'].map(get_payment_frequency_from_text)
+    df['Price Cluster'] = get_bond_price_cluster_array(df['Price'])
+    # Ask size minus bid size, as the row-wise version computed it.
+    df['Size Preasure'] = df['Ask Size'] - df['Bid Size']
+
+    # Yield, duration and convexity from each bond's coupon schedule. The
+    # approximate formulas only fill rows the solver cannot price.
+    analytics = solve_bond_analytics(
+        df['Maturity'],
+        df['Coupon'],
+        df['Price'],
+        df['Frequency'],
+        day_count=get_day_count_array(
+            df['Payment Frequency'],
+            df['Financial Instrument'].astype(str) + ' ' + df['Company Name'].astype(str),
+        ),
+    )
+    solved = analytics['converged']
+    approximate_duration = get_bond_duration_array(
+        df['Maturity'],
+        df['Coupon'] / 100, # Convert coupon percentage to decimal
+        df['Price'],
+        df['Frequency'],
+    )
+    df['Duration'] = np.where(solved, analytics['macaulay_duration'], approximate_duration)
+    df['Modified Duration'] = analytics['modified_duration']
+    df['Convexity'] = analytics['convexity']
+    df['Accrued Interest'] = analytics['accrued_interest']
 
     duration_failures = int(df['Duration'].isna().sum())
     if duration_failures:
@@ -1686,21 +1977,16 @@ def process_bonds(df):
 
     #Calculate years to maturity
     today = pd.Timestamp.today()
-    df['Years to Maturity'] = df.apply(lambda row: get_years_to_date(today, row['Maturity']), axis=1)
-    df['YTM'] = df.apply(lambda row: get_bond_ytm(row['Price'], row['Coupon'], row['Years to Maturity']), axis=1)
-
-    def get_rating_level(rating):
-        """
-        Get the level for a single rating from the ratings dictionary.
-        Returns None if rating is not found.
-        """
-        if pd.isna(rating) or rating not in ratings:
-            return None
-        return ratings[rating]["Level"]
+    df['Years to Maturity'] = get_years_to_date_array(today, df['Maturity'])
+    approximate_ytm = get_bond_ytm_array(df['Price'], df['Coupon'], df['Years to Maturity'])
+    df['YTM'] = np.where(solved, analytics['ytm'], approximate_ytm)
+    df['YTM Method'] = np.where(solved, 'cashflow', np.where(np.isnan(approximate_ytm), None, 'approximate'))
+    logger.info(f'Solved cash-flow yield for {int(solved.sum())} of {len(df)} bonds.')
 
-    # Get levels for both SP and Moodys ratings
-    df['SP_Level'] = df['SP'].apply(get_rating_level)
-    df['Moodys_Level'] = df['Moodys'].apply(get_rating_level)
+    # Get levels for both SP and Moodys ratings; unknown ratings map to NaN.
+    rating_levels = {rating: info["Level"] for rating, info in ratings.items()}
+    df['SP_Level'] = df['SP'].map(rating_levels)
+    df['Moodys_Level'] = df['Moodys'].map(rating_levels)
 
     # Coerce to numeric before row-wise max to avoid float/string comparison errors.
     level_columns = ['SP_Level', 'Moodys_Level']
@@ -1712,22 +1998,11 @@ def process_bonds(df):
     # Drop the temporary columns
     df = df.drop(['SP_Level', 'Moodys_Level'], axis=1)
 
-    # Create S&P Equivalent column by mapping Rating Level to S&P rating
-    def get_sp_equivalent(level):
-        """
-        Get the S&P equivalent rating for a given level from the ratings dictionary.
-        Returns None if level is not found.
-        """
-        if pd.isna(level):
-            return None
-        
-        # Find the first rating entry that matches the level
-        for rating, info in ratings.items():
-            if info["Level"] == level:# and info["Source"] == "S&P":
-                return rating
-        return None
-
-    df['S&P Equivalent'] = df['Rating Level'].apply(get_sp_equivalent)
+    # Create S&P Equivalent column by mapping Rating Level to the first rating with that level
+    sp_equivalents = {}
+    for rating, info in ratings.items():
+        sp_equivalents.setdefault(info["Level"], rating)
+    df['S&P Equivalent'] = df['Rating Level'].map(sp_equivalents)
 
     return df
 
@@ -1743,7 +2018,10 @@ market_data_report_configs = [
         'backup_name': 'bonds_snapshot' + '_' + today_date + '.csv',
         'extract_func': extract_bond_snapshot,
         'transform_func': process_bonds,
-        'output_filename': 'ibkr_bonds_snapshot.csv'
+        # Years to maturity, yields and accrued interest are computed as of today.
+        'date_dependent': True,
+        'output_filename': 'ibkr_bonds_snapshot.csv',
+        'provider': 'ibkr_gateway'
     },
     {
         'name': 'ust_bonds_snapshot',
@@ -1753,7 +2031,10 @@ market_data_report_configs = [
         'backup_name': 'ust_bonds_snapshot' + '_' + today_date + '.csv',
         'extract_func': extract_ust_bond_snapshot,
         'transform_func': process_bonds,
-        'output_filename': 'ibkr_ust_bonds_snapshot.csv'
+        # Years to maturity, yields and accrued interest are computed as of today.
+        'date_dependent': True,
+        'output_filename': 'ibkr_ust_bonds_snapshot.csv',
+        'provider': 'ibkr_gateway'
     },
     {
         'name': 'stocks_snapshot',
@@ -1763,7 +2044,8 @@ market_data_report_configs = [
         'backup_name': 'stock' + '_' + today_date + '.csv',
         'extract_func': extract_stock_snapshot,
         'transform_func': None,
-        'output_filename': 'ibkr_stocks_snapshot.csv'
+        'output_filename': 'ibkr_stocks_snapshot.csv',
+        'provider': 'ibkr_gateway'
     },
     {
         'name': 'etfs_snapshot',
@@ -1773,7 +2055,8 @@ market_data_report_configs = [
         'backup_name': 'etfs_snapshot' + '_' + today_date + '.csv',
         'extract_func': extract_etf_snapshot,
         'transform_func': None,
-        'output_filename': 'ibkr_etfs_snapshot.csv'
+        'output_filename': 'ibkr_etfs_snapshot.csv',
+        'provider': 'ibkr_gateway'
     }
 ]
 
@@ -1786,7 +2069,8 @@ clients_report_configs = [
         'backup_name': 'account_details' + '_' + yesterday_date + '.json',
         'extract_func': extract_account_details_backup,
         'transform_func': None,
-        'output_filename': 'ibkr_account_details.json'
+        'output_filename': 'ibkr_account_details.json',
+        'provider': 'ibkr_web_api'
     },
     {
         'name': 'tasks_for_subaccounts',
@@ -1827,6 +2111,9 @@ clients_report_configs = [
         'extract_func': extract_flex_query,
         'transform_func': process_open_positions_template,
         'output_filename': 'ibkr_open_positions_template.csv',
+        # Merged with the latest bond snapshot (get_bond_report).
+        'extra_inputs': ['ibkr_bonds_snapshot.csv'],
+        'provider': 'ibkr_flex'
     },
     {
         'name': '734782',
@@ -1836,7 +2123,8 @@ clients_report_configs = [
         'backup_name': '734782' + '_' + yesterday_date + '.csv',
         'extract_func': extract_flex_query,
         'transform_func': None,
-        'output_filename': 'ibkr_nav_in_base.csv'
+        'output_filename': 'ibkr_nav_in_base.csv',
+        'provider': 'ibkr_flex'
     },
     {
         'name': '732383',
@@ -1846,7 +2134,8 @@ clients_report_configs = [
         'backup_name': '732383' + '_' + first_date + '_' + yesterday_date + '.csv',
         'extract_func': extract_flex_query,
         'transform_func': None,
-        'output_filename': 'ibkr_client_fees.csv'
+        'output_filename': 'ibkr_client_fees.csv',
+        'provider': 'ibkr_flex'
     },
     {
         'name': '794867',
@@ -1856,7 +2145,8 @@ clients_report_configs = [
         'backup_name': '794867' + '_' + first_date + '_' + yesterday_date + '.csv',
         'extract_func': extract_flex_query,
         'transform_func': None,
-        'output_filename': 'ibkr_deposits_withdrawals.csv'
+        'output_filename': 'ibkr_deposits_withdrawals.csv',
+        'provider': 'ibkr_flex'
     },
     {
         'name': 'ofac_sdn_list',
@@ -1866,7 +2156,9 @@ clients_report_configs = [
         'backup_name': 'ofac_sdn_list' + '_' + today_date + '.csv',
         'extract_func': extract_ofac_sdn_list,
         'transform_func': None,
-        'output_filename': 'ofac_sdn_list.csv'
+        'output_filename': 'ofac_sdn_list.csv',
+        'sanctions_index': 'ofac',
+        'provider': 'ofac'
     },
     {
         'name': 'uk_sanctions_list',
@@ -1877,7 +2169,9 @@ clients_report_configs = [
         'extract_func': extract_uk_sanctions_list,
         'transform_func': None,
         'output_filename': 'uk_sanctions_list.csv',
-        'raw_passthrough': True
+        'sanctions_index': 'uk',
+        'raw_passthrough': True,
+        'provider': 'fcdo'
     },
     {
         'name': 'un_sanctions_list',
@@ -1888,18 +2182,35 @@ clients_report_configs = [
         'extract_func': extract_un_sanctions_list,
         'transform_func': None,
         'output_filename': 'un_sanctions_list.csv',
-        'raw_passthrough': True
+        'sanctions_index': 'un',
+        'raw_passthrough': True,
+        'provider': 'un'
     }
 ]
 
+# Pipeline scheduling. Each report may set 'provider' (the upstream its
+# extract calls) and 'depends_on' (names of reports in the same pipeline
+# that must finish first). 'providers' caps concurrency and spaces requests
+# per provider; 'max_workers' bounds the pool for both extract and transform.
 clients_etl = {
     'name': 'clients',
     'files': clients_report_configs,
+    'max_workers': 4,
+    'providers': {
+        # Flex Web Service throttles per token; run one query at a time.
+        'ibkr_flex': {'concurrency': 1, 'min_interval_seconds': 2},
+        'ibkr_web_api': {'concurrency': 1},
+    },
 }
 
 market_data_etl = {
     'name': 'market_data',
     'files': market_data_report_configs,
+    'max_workers': 4,
+    'providers': {
+        # Every snapshot opens an SSO session for the same gateway user.
+        'ibkr_gateway': {'concurrency': 1},
+    },
 }
 
 ETL_CONFIGS = [clients_etl, market_data_etl]
@@ -1934,165 +2245,167 @@ def _get_file_config(file_name, etl_configs=None):
 
     return None
 
+def _build_task(file_config, func):
+    return {
+        'name': file_config.get('name', 'unknown'),
+        'fn': lambda: func(file_config),
+        'depends_on': list(file_config.get('depends_on') or []),
+        'provider': file_config.get('provider'),
+    }
+
+def _prune_dependencies(tasks):
+    # A dependency on a report that has no task in this stage (e.g. a manually
+    # supplied source) is already satisfied.
+    names = {task['name'] for task in tasks}
+    return [{**task, 'depends_on': [name for name in task['depends_on'] if name in names]} for task in tasks]
+
+def _get_scheduler(etl_config, name):
+    max_workers = etl_config.get('max_workers') or int(os.getenv('ETL_MAX_WORKERS', '4'))
+    return TaskScheduler(max_workers=max_workers, provider_limits=etl_config.get('providers'), name=name)
+
+# Transform manifest: per report, the fingerprint of the inputs last
+# transformed and the output it produced. The fingerprint covers the backup
+# file, the resources files listed in 'extra_inputs', today's date for
+# 'date_dependent' transforms and a hash of the transform code. Bump the
+# version to force every report to be re-transformed.
+ETL_MANIFEST_VERSION = 2
+_manifest_lock = threading.Lock()
+
+def _manifest_path():
+    return os.getenv('ETL_MANIFEST_PATH', '/app/cache/etl_manifest.json')
+
+def _load_manifest():
+    try:
+        with open(_manifest_path(), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f'Ignoring unreadable ETL manifest: {e}')
+        return {}
+
+def _get_manifest_entry(config_name):
+    with _manifest_lock:
+        return _load_manifest().get(config_name)
+
+@lru_cache(maxsize=None)
+def _transform_revision(transform_func):
+    """Name of the transform and a hash of its module and of the src modules it calls directly."""
+    modules = {inspect.getmodule(transform_func)}
+    for name in transform_func.__code__.co_names:
+        value = transform_func.__globals__.get(name)
+        module = inspect.getmodule(value) if callable(value) else None
+        if module is not None and module.__name__.startswith('src.'):
+            modules.add(module)
+    digest = hashlib.sha1()
+    for module in sorted(modules, key=lambda module: module.__name__):
+        try:
+            digest.update(inspect.getsource(module).encode('utf-8'))
+        except (OSError, TypeError):
+            digest.update(module.__name__.encode('utf-8'))
+    return f'{transform_func.__module__}.{transform_func.__qualname__}:{digest.hexdigest()[:16]}'
+
+def _extra_input_revisions(config):
+    """Revision of each resources file a transform reads besides its backup."""
+    names = config.get('extra_inputs') or []
+    if not names:
+        return None
+    files = Drive.get_files_in_folder(resources_folder_id) or []
+    revisions = {}
+    for name in names:
+        matching_files = [file for file in files if file.get('name') == name]
+        latest = Drive.get_most_recent_file(matching_files) if matching_files else None
+        revisions[name] = {
+            'file_id': latest.get('id'),
+            'modified_time': latest.get('modifiedTime'),
+            'checksum': latest.get('md5Checksum'),
+        } if latest else None
+    return revisions
+
+def _input_fingerprint(config, input_file):
+    transform_func = config.get('transform_func')
+    return {
+        'version': ETL_MANIFEST_VERSION,
+        'input_file_id': input_file.get('id'),
+        'input_modified_time': input_file.get('modifiedTime'),
+        'input_checksum': input_file.get('md5Checksum'),
+        'extra_inputs': _extra_input_revisions(config),
+        'as_of': datetime.now(cst).strftime('%Y-%m-%d') if config.get('date_dependent') else None,
+        'transform': _transform_revision(transform_func) if transform_func is not None else None,
+        'raw_passthrough': bool(config.get('raw_passthrough', False)),
+        'output_filename': config.get('output_filename'),
+    }
+
+def _is_unchanged(manifest_entry, fingerprint):
+    if os.getenv('ETL_INCREMENTAL', 'true').lower() not in ('true', '1', 'yes'):
+        return False
+    if not manifest_entry or manifest_entry.get('fingerprint') != fingerprint:
+        return False
+    # The output may have been removed or replaced by hand since the last run.
+    try:
+        return any(
+            file.get('id') == manifest_entry.get('output_file_id')
+            for file in Drive.get_files_in_folder(resources_folder_id)
+        )
+    except Exception as e:
+        logger.warning(f'Could not verify previous output {manifest_entry.get("output_file_id")}: {e}')
+        return False
+
+def _record_manifest_entry(config_name, fingerprint, output_file, previous=None):
+    entry = {
+        'fingerprint': fingerprint,
+        'output_file_id': (output_file or {}).get('id'),
+        'output_modified_time': (output_file or {}).get('modifiedTime'),
+        'transformed_at': datetime.now(cst).isoformat(),
+    }
+    path = _manifest_path()
+    with _manifest_lock:
+        manifest = _load_manifest()
+        manifest[config_name] = entry
+        try:
+            directory = os.path.dirname(path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f'Could not persist ETL manifest: {e}')
+    return {'state': 'updated' if previous else 'new', **entry}
+
 def _run_steps(steps):
     stage_overview = {}
+    timeline = []
+    pipeline_started = time.perf_counter()
     for step in steps:
         step_name = step['name']
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
         try:
             stage_overview[step_name] = step['fn']()
         except Exception as e:
             logger.error(f'Error in {step_name} stage: {e}')
             stage_overview[step_name] = {'status': 'failed', 'error': str(e)}
+        # Stages that fan out report their workers' CPU time; add it to this thread's.
+        stage_cpu_ms = (time.thread_time() - cpu_started) * 1000 + (stage_overview[step_name].get('cpu_ms') or 0)
+        timeline.append({
+            'name': step_name,
+            'status': stage_overview[step_name].get('status'),
+            'started_ms': round((started - pipeline_started) * 1000, 1),
+            'wall_ms': round((time.perf_counter() - started) * 1000, 1),
+            'cpu_ms': round(stage_cpu_ms, 1),
+        })
 
     failed_stages = [name for name, value in stage_overview.items() if value.get('status') != 'success']
     overall_status = 'success' if not failed_stages else 'partial'
     return {
         'status': overall_status,
-        'overview': stage_overview
+        'overview': stage_overview,
+        'timeline': timeline
     }
 
 # Process bonds helper functions
 
-def get_bond_price_cluster(price):
-    """
-    Returns the price cluster label for a given bond price.
-    
-    Args:
-        price (float): Bond price
-        
-    Returns:
-        str: Price cluster label ('Deep Discount', 'Discount', 'Par', 'Premium', or 'High Premium')
-    """
-    # Define same bins and labels as cluster_bonds_by_price
-    bins = [0, 70, 95, 105, 120, float('inf')]
-    labels = ['Deep Discount', 'Discount', 'Par', 'Premium', 'High Premium']
-    
-    # Find which bin the price falls into
-    for i in range(len(bins)-1):
-        if bins[i] <= price < bins[i+1]:
-            return labels[i]
-            
-    return None  # Return None if price doesn't fall in any bin
-
-def get_first_valid_price(ask, bid, last):
-    """
-    Returns the first valid price from bid, ask, or last price in that order.
-    Returns None if no valid price is found.
-    """
-    
-    if pd.notnull(ask) and ask != 0:
-        return ask
-    elif pd.notnull(bid) and bid != 0:
-        return bid
-    elif pd.notnull(last) and last != 0:
-        return last
-    else:
-        return None
-
-def get_size_preasure(BID_size, ASK_size):
-
-    try:
-        size_preasure = BID_size - ASK_size
-        return size_preasure
-    except Exception as e:
-        return None
-
-def get_current_yield(coupon, last, ask, bid):
-    """
-    Calculate current yield using first available price (Last, Ask, or Bid)
-    
-    Args:
-        coupon (float): Bond coupon rate
-        last (float): Last traded price
-        ask (float): Ask price
-        bid (float): Bid price
-        
-    Returns:
-        float: Current yield or None if no valid price available
-    """
-
-    if coupon is None or coupon == 0 or not isinstance(coupon, (int, float)):
-        return None
-    else:
-        if pd.notnull(last) and last != 0:
-            return coupon / last
-        elif pd.notnull(ask) and ask != 0:
-            return coupon / ask
-        elif pd.notnull(bid) and bid != 0:
-            return coupon / bid
-        else:
-            return None
-
-def get_bond_duration(maturity_date, coupon_rate, price, frequency):
-    
-    """
-    Calculate the Macaulay Duration for a bond
-    
-    Args:
-        maturity_date: The maturity date of the bond (datetime.date)
-        coupon_rate: Annual coupon rate as decimal (e.g. 0.05 for 5%)
-        price: Clean price of the bond as percentage of par (e.g. 100 for par)
-        frequency: Number of coupon payments per year (default=2 for semi-annual)
-        
-    Returns:
-        duration: Macaulay Duration in years
-    """
-
-    try:
-        # Default to semi-annual frequency if not provided because it's the most common frequency.
-        if frequency is None or pd.isna(frequency) or frequency <= 0:
-            frequency = 2
-
-        if pd.isna(maturity_date):
-            raise ValueError("maturity_date is missing")
-        if pd.isna(coupon_rate) or pd.isna(price):
-            raise ValueError(
-                f"coupon_rate or price is missing (coupon_rate={coupon_rate!r}, price={price!r})"
-            )
-        if price <= 0:
-            raise ValueError(f"price must be positive, got {price!r}")
-
-        # pandas Timestamp is datetime-compatible, but datetime is imported as
-        # the class (not the datetime module). Normalize all supported inputs
-        # through pandas instead of accessing the nonexistent datetime.datetime.
-        maturity_date = pd.Timestamp(maturity_date).date()
-        today = datetime.now().date()
-        
-        # Time to maturity in years
-        t = (maturity_date - today).days / 360.0
-
-        if t <= 0:
-            return 0
-
-        # Convert annual rates to per-period rates
-        period_coupon = coupon_rate / frequency
-
-        periods = max(1, int(t * frequency))  # Ensure at least 1 period
-        r = ( ( coupon_rate * 100 ) / price) / frequency
-
-        # Calculate present value of each cash flow
-        pv_factors = [(1 + r) ** (-i) for i in range(1, periods + 1)]
-        cash_flows = [period_coupon * 100] * periods
-        cash_flows[-1] += 100  # Add principal repayment at maturity
-        
-        # Calculate weighted present values
-        weighted_pvs = [cf * pvf * (i/frequency) for i, (cf, pvf) in enumerate(zip(cash_flows, pv_factors), 1)]
-        
-        # Macaulay Duration formula
-        duration = sum(weighted_pvs) / price
-
-    except Exception:
-        # Keep the row-level ETL running, but make the failure visible in logs
-        # and preserve it as missing data rather than a valid duration of zero.
-        logger.exception(
-            "Bond duration calculation failed "
-            f"(maturity_date={maturity_date!r}, coupon_rate={coupon_rate!r}, "
-            f"price={price!r}, frequency={frequency!r})"
-        )
-        return None
-
-    return duration
-
 def get_payment_frequency_from_text(frequency_text):
     """
     Convert payment frequency text to number of payments per year.
@@ -2131,41 +2444,6 @@ def get_payment_frequency_from_text(frequency_text):
     # Default to semi-annual if no match found (most common for bonds)
     return 2
 
-def get_bond_ytm(price, coupon, years_to_maturity):
-    try:
-        # Use the first available price (Last, Ask, or Bid)
-        price = price if pd.notnull(price) else None
-                
-        if price is None or years_to_maturity == 0:
-            return None
-            
-        numerator = coupon + ((100 - price) / years_to_maturity)
-        denominator = (100 + price) / 2
-        
-        return numerator / denominator
-    except:
-        return None
-
-def get_years_to_date(start_date, end_date):
-    """
-    Calculate years to maturity from today to a given maturity date.
-    
-    Args:
-        maturity_date (datetime): The maturity date of the bond
-        
-    Returns:
-        float: Number of years to maturity, or None if invalid input
-    """
-    try:
-        if pd.isna(end_date):
-            return None
-            
-        years = (end_date - start_date).total_seconds() / (365.25 * 24 * 60 * 60)
-        return years if years > 0 else None
-        
-    except:
-        return None
-
 def extract_rating_from_text(rating_text):
     """
     Extract rating information from text in formats like:
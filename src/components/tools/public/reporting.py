@@ -1,8 +1,12 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
 from src.utils.logger import logger
 import csv
 import io
+import os
 import threading
+import numpy as np
 import pandas as pd
 import pandas as pd
 import re
@@ -13,6 +17,7 @@ import pytz
 from src.utils.connectors.drive import GoogleDrive
 from src.utils.exception import ServiceError, handle_exception
 from src.utils.connectors.ibkr_web_api import IBKRWebAPI
+from src.utils.managers.disk_cache_manager import DiskCache
 
 logger.announcement('Initializing Reporting Service', type='info')
 Drive = GoogleDrive()
@@ -20,6 +25,17 @@ ibkr_web_api = IBKRWebAPI()
 _ending_balances_cache = {'key': None, 'rows': None}
 _activity_statement_file_cache = {}
 _ending_balances_cache_lock = threading.Lock()
+# Sanctions backups as compared day to day: the row hash column of each backup
+# revision persists on disk, and the latest parsed snapshots stay in memory so
+# repeated comparisons neither re-download nor re-hash them.
+_sanctions_row_hash_cache = DiskCache(
+    directory=os.getenv('SANCTIONS_ROW_HASH_CACHE_DIR', '/app/cache/sanctions_row_hashes'),
+    max_bytes=int(os.getenv('SANCTIONS_ROW_HASH_CACHE_MAX_BYTES', str(64 * 1024 ** 2))),
+    name='Sanctions row hash cache',
+)
+SANCTIONS_SNAPSHOT_CACHE_SIZE = 6
+_sanctions_snapshot_cache = OrderedDict()
+_sanctions_snapshot_cache_lock = threading.Lock()
 
 activity_statement_folders = {
     'I6413690': '1qJhG-9F_YteWY-hCP1EaIhbJQ1DW71_h',
@@ -35,6 +51,14 @@ ofac_backup_folder_id = '13W9sXMbFvWtXPsEy6FiZJrQDHV3WYDD6'
 uk_backup_folder_id = '1-57AG_nFE2elzOygdc7PGqdB4Y9k_7h6'
 un_backup_folder_id = '1AwTRSLSi0D3kzyhFx9Be53ugvo7uJgpd'
 
+# Name indexes published by the sanctions extractors. The names must not contain
+# the list file names ('ofac_sdn_list', ...) matched by the list getters.
+SANCTIONS_INDEX_FILENAMES = {
+    'ofac': 'sanctions_index_ofac.idx',
+    'uk': 'sanctions_index_uk.idx',
+    'un': 'sanctions_index_un.idx',
+}
+
 UN_SANCTIONS_XML_URL = 'https://scsanctions.un.org/resources/xml/en/name/consolidated.xml?_gl=1*b6x5x9*_ga*MTM1Mzg4ODEzNS4xNzc3NjU0MjY4*_ga_TK9BQL5X7Z*czE3Nzc2NTQyNjgkbzEkZzEkdDE3Nzc2NTU1NzEkajYwJGwwJGgw'
 
 logger.announcement('Initialized Reporting Service', type='success')
@@ -55,7 +79,7 @@ def get_clients_report():
     if len(clients_file) != 1:
         logger.error('Clients file not found or multiple files found')
         raise Exception('Clients file not found or multiple files found')
-    clients = Drive.download_file(file_id=clients_file[0]['id'], parse=True)
+    clients = Drive.download_file(file_id=clients_file[0]['id'], parse=True, file_info=clients_file[0])
     return clients
 
 @handle_exception
@@ -70,7 +94,7 @@ def get_client_fees_report():
     if len(clients_file) != 1:
         logger.error('Clients file not found or multiple files found')
         raise Exception('Clients file not found or multiple files found')
-    clients = Drive.download_file(file_id=clients_file[0]['id'], parse=True)
+    clients = Drive.download_file(file_id=clients_file[0]['id'], parse=True, file_info=clients_file[0])
     return clients
 
 @handle_exception
@@ -85,7 +109,7 @@ def get_nav_report():
     if len(nav_file) != 1:
         logger.error('Nav file not found or multiple files found')
         raise Exception('Nav file not found or multiple files found')
-    nav = Drive.download_file(file_id=nav_file[0]['id'], parse=True)
+    nav = Drive.download_file(file_id=nav_file[0]['id'], parse=True, file_info=nav_file[0])
     return nav
 
 @handle_exception
@@ -100,7 +124,7 @@ def get_bond_report():
     if len(rtd_file) != 1:
         logger.error('RTD file not found or multiple files found')
         raise Exception('RTD file not found or multiple files found')
-    rtd = Drive.download_file(file_id=rtd_file[0]['id'], parse=True)
+    rtd = Drive.download_file(file_id=rtd_file[0]['id'], parse=True, file_info=rtd_file[0])
     return rtd  
 
 @handle_exception
@@ -115,7 +139,7 @@ def get_stocks_report():
     if len(rtd_file) != 1:
         logger.error('Stocks file not found or multiple files found')
         raise Exception('Stocks file not found or multiple files found')
-    rtd = Drive.download_file(file_id=rtd_file[0]['id'], parse=True)
+    rtd = Drive.download_file(file_id=rtd_file[0]['id'], parse=True, file_info=rtd_file[0])
     return rtd
 
 @handle_exception
@@ -130,7 +154,7 @@ def get_etfs_report():
     if len(rtd_file) != 1:
         logger.error('ETFs file not found or multiple files found')
         raise Exception('ETFs file not found or multiple files found')
-    rtd = Drive.download_file(file_id=rtd_file[0]['id'], parse=True)
+    rtd = Drive.download_file(file_id=rtd_file[0]['id'], parse=True, file_info=rtd_file[0])
     return rtd
 
 @handle_exception
@@ -145,7 +169,7 @@ def get_ust_bond_report():
     if len(rtd_file) != 1:
         logger.error('UST Bonds file not found or multiple files found')
         raise Exception('UST Bonds file not found or multiple files found')
-    rtd = Drive.download_file(file_id=rtd_file[0]['id'], parse=True)
+    rtd = Drive.download_file(file_id=rtd_file[0]['id'], parse=True, file_info=rtd_file[0])
     return rtd
 
 @handle_exception
@@ -160,7 +184,7 @@ def get_open_positions_report():
     if len(open_positions_file) != 1:
         logger.error('Open positions file not found or multiple files found')
         raise Exception('Open positions file not found or multiple files found')
-    open_positions = Drive.download_file(file_id=open_positions_file[0]['id'], parse=True)
+    open_positions = Drive.download_file(file_id=open_positions_file[0]['id'], parse=True, file_info=open_positions_file[0])
     return open_positions
 
 @handle_exception
@@ -170,7 +194,7 @@ def get_ofac_sdn_list():
     if len(ofac_sdn_list_file) != 1:
         logger.error('OFAC SDN list file not found or multiple files found')
         raise Exception('OFAC SDN list file not found or multiple files found')
-    ofac_sdn_list = Drive.download_file(file_id=ofac_sdn_list_file[0]['id'], parse=True)
+    ofac_sdn_list = Drive.download_file(file_id=ofac_sdn_list_file[0]['id'], parse=True, file_info=ofac_sdn_list_file[0])
     return ofac_sdn_list
 
 def _normalize_day_reference(day_reference) -> date:
@@ -182,16 +206,11 @@ def _normalize_day_reference(day_reference) -> date:
         return datetime.strptime(day_reference, '%Y-%m-%d').date()
     raise ValueError('Invalid day_reference. Use date, datetime, or YYYY-MM-DD string.')
 
-def _rows_signature(rows: list) -> str:
-    canonical_rows = []
-    for row in rows or []:
-        if isinstance(row, dict):
-            canonical_rows.append(dict(sorted(row.items())))
-        else:
-            canonical_rows.append(row)
-    canonical_rows.sort(key=lambda item: json.dumps(item, sort_keys=True, default=str))
-    payload = json.dumps(canonical_rows, sort_keys=True, default=str).encode('utf-8')
-    return hashlib.sha256(payload).hexdigest()
+def _rows_signature(rows: list, row_hashes: np.ndarray | None = None) -> str:
+    """Order-independent signature of a snapshot: SHA-256 of its sorted row hashes."""
+    if row_hashes is None:
+        row_hashes = _row_hashes(rows)
+    return hashlib.sha256(np.sort(row_hashes).tobytes()).hexdigest()
 
 def _canonicalize_row(row) -> str:
     if isinstance(row, dict):
@@ -200,95 +219,211 @@ def _canonicalize_row(row) -> str:
         normalized = row
     return json.dumps(normalized, sort_keys=True, default=str)
 
-def _row_change_summary(today_rows: list, yesterday_rows: list, sample_size: int = 3) -> dict:
-    today_map = {_canonicalize_row(row): row for row in (today_rows or [])}
-    yesterday_map = {_canonicalize_row(row): row for row in (yesterday_rows or [])}
+def _row_hashes(rows: list) -> np.ndarray:
+    """First 8 bytes of the SHA-1 of every canonical row, in row order."""
+    return np.fromiter(
+        (int.from_bytes(hashlib.sha1(_canonicalize_row(row).encode('utf-8')).digest()[:8], 'little') for row in rows),
+        dtype=np.uint64,
+        count=len(rows),
+    )
+
+def _new_row_positions(row_hashes: np.ndarray, other_row_hashes: np.ndarray) -> np.ndarray:
+    """Position of one row per distinct hash of ``row_hashes`` missing from ``other_row_hashes``, in hash order."""
+    unique_hashes, first_positions = np.unique(row_hashes, return_index=True)
+    return first_positions[~np.isin(unique_hashes, other_row_hashes)]
+
+def _row_delta(
+    today_rows: list,
+    yesterday_rows: list,
+    today_hashes: np.ndarray | None = None,
+    yesterday_hashes: np.ndarray | None = None,
+) -> tuple[list, list]:
+    """
+    Rows only in today's snapshot (added or modified entries) and rows only in
+    yesterday's (removed entries and the old version of modified ones).
+    """
+    today_rows = today_rows or []
+    yesterday_rows = yesterday_rows or []
+    today_hashes = _row_hashes(today_rows) if today_hashes is None else today_hashes
+    yesterday_hashes = _row_hashes(yesterday_rows) if yesterday_hashes is None else yesterday_hashes
+    return (
+        [today_rows[i] for i in _new_row_positions(today_hashes, yesterday_hashes).tolist()],
+        [yesterday_rows[i] for i in _new_row_positions(yesterday_hashes, today_hashes).tolist()],
+    )
 
-    added_keys = sorted(set(today_map.keys()) - set(yesterday_map.keys()))
-    removed_keys = sorted(set(yesterday_map.keys()) - set(today_map.keys()))
+def _row_change_summary(
+    today_rows: list,
+    yesterday_rows: list,
+    sample_size: int = 3,
+    today_hashes: np.ndarray | None = None,
+    yesterday_hashes: np.ndarray | None = None,
+) -> dict:
+    added_rows, removed_rows = _row_delta(today_rows, yesterday_rows, today_hashes, yesterday_hashes)
 
     return {
-        'added_count': len(added_keys),
-        'removed_count': len(removed_keys),
-        'added_samples': [today_map[k] for k in added_keys[:sample_size]],
-        'removed_samples': [yesterday_map[k] for k in removed_keys[:sample_size]],
+        'added_count': len(added_rows),
+        'removed_count': len(removed_rows),
+        'added_samples': added_rows[:sample_size],
+        'removed_samples': removed_rows[:sample_size],
     }
 
+def get_sanctions_changed_rows(comparison: dict) -> list:
+    """
+    Entries of one list that changed between the two snapshots of a
+    ``compare_*_today_vs_yesterday`` result: added and modified entries as
+    they are today, removed ones as they were yesterday. Empty when the
+    snapshots are identical or one of them is missing.
+    """
+    if not comparison or not comparison.get('both_available') or comparison.get('is_same'):
+        return []
+    today_snapshot = comparison.get('today_snapshot') or {}
+    yesterday_snapshot = comparison.get('yesterday_snapshot') or {}
+    added_rows, removed_rows = _row_delta(
+        today_rows=today_snapshot.get('rows') or [],
+        yesterday_rows=yesterday_snapshot.get('rows') or [],
+        today_hashes=today_snapshot.get('row_hashes'),
+        yesterday_hashes=yesterday_snapshot.get('row_hashes'),
+    )
+    return added_rows + removed_rows
+
 @handle_exception
-def get_ofac_sdn_backup_for_day(day_reference) -> dict | None:
+def get_ofac_sdn_backup_for_day(day_reference=None, before: str | None = None) -> dict | None:
     return _get_sanctions_backup_for_day(
         day_reference=day_reference,
         backup_folder_id=ofac_backup_folder_id,
         file_prefix='ofac_sdn_list_',
+        before=before,
     )
 
 @handle_exception
-def get_uk_sanctions_backup_for_day(day_reference) -> dict | None:
+def get_uk_sanctions_backup_for_day(day_reference=None, before: str | None = None) -> dict | None:
     return _get_sanctions_backup_for_day(
         day_reference=day_reference,
         backup_folder_id=uk_backup_folder_id,
         file_prefix='uk_sanctions_list_',
+        before=before,
     )
 
 @handle_exception
-def get_un_sanctions_backup_for_day(day_reference) -> dict | None:
+def get_un_sanctions_backup_for_day(day_reference=None, before: str | None = None) -> dict | None:
     return _get_sanctions_backup_for_day(
         day_reference=day_reference,
         backup_folder_id=un_backup_folder_id,
         file_prefix='un_sanctions_list_',
+        before=before,
     )
 
-def _get_sanctions_backup_for_day(day_reference, backup_folder_id: str, file_prefix: str) -> dict | None:
-    target_day = _normalize_day_reference(day_reference)
-    day_prefix = target_day.strftime('%Y%m%d')
-    target_prefix = f'{file_prefix}{day_prefix}'
-
+def _backup_timestamp(file_name: str, file_prefix: str) -> str | None:
+    """%Y%m%d%H%M timestamp in a backup name ('<prefix><timestamp>.csv'), or None if it has none."""
+    timestamp = file_name[len(file_prefix):len(file_prefix) + 12]
+    return timestamp if len(timestamp) == 12 and timestamp.isdigit() else None
+
+def _get_sanctions_backup_for_day(
+    day_reference,
+    backup_folder_id: str,
+    file_prefix: str,
+    before: str | None = None,
+) -> dict | None:
+    """
+    Newest backup of a sanctions list taken on ``day_reference``. With
+    ``before`` (a %Y%m%d%H%M timestamp in America/Costa_Rica time, as in the
+    backup names), the newest backup taken at or before that moment on any day
+    instead, so a backup that landed later the same day is never selected.
+    """
     files_in_backup_folder = Drive.get_files_in_folder(backup_folder_id) or []
-    matching_files = [
-        f for f in files_in_backup_folder
-        if f.get('name', '').startswith(target_prefix)
-    ]
+    if before is not None:
+        matching_files = []
+        for f in files_in_backup_folder:
+            timestamp = _backup_timestamp(f.get('name', ''), file_prefix) if f.get('name', '').startswith(file_prefix) else None
+            if timestamp is not None and timestamp <= before:
+                matching_files.append(f)
+    else:
+        target_prefix = f"{file_prefix}{_normalize_day_reference(day_reference).strftime('%Y%m%d')}"
+        matching_files = [
+            f for f in files_in_backup_folder
+            if f.get('name', '').startswith(target_prefix)
+        ]
     if not matching_files:
         return None
 
     matching_files.sort(key=lambda f: f.get('name', ''), reverse=True)
     selected_file = matching_files[0]
-    rows = Drive.download_file(file_id=selected_file['id'], parse=True) or []
-    return {
-        'day': target_day.isoformat(),
-        'file_id': selected_file.get('id'),
-        'file_name': selected_file.get('name'),
-        'rows': rows,
-        'rows_signature': _rows_signature(rows),
-    }
+    if before is not None:
+        target_day = datetime.strptime(_backup_timestamp(selected_file['name'], file_prefix), '%Y%m%d%H%M').date()
+    else:
+        target_day = _normalize_day_reference(day_reference)
+    revision = selected_file.get('md5Checksum') or selected_file.get('modifiedTime')
+    snapshot_key = (selected_file['id'], revision)
+    with _sanctions_snapshot_cache_lock:
+        snapshot = _sanctions_snapshot_cache.get(snapshot_key) if revision else None
+        if snapshot is not None:
+            _sanctions_snapshot_cache.move_to_end(snapshot_key)
+    if snapshot is None:
+        rows = Drive.download_file(file_id=selected_file['id'], parse=True, file_info=selected_file) or []
+        row_hashes = _get_backup_row_hashes(selected_file['id'], revision, rows)
+        snapshot = {
+            'file_id': selected_file.get('id'),
+            'file_name': selected_file.get('name'),
+            'rows': rows,
+            'row_hashes': row_hashes,
+            'rows_signature': _rows_signature(rows, row_hashes),
+        }
+        if revision:
+            with _sanctions_snapshot_cache_lock:
+                _sanctions_snapshot_cache[snapshot_key] = snapshot
+                while len(_sanctions_snapshot_cache) > SANCTIONS_SNAPSHOT_CACHE_SIZE:
+                    _sanctions_snapshot_cache.popitem(last=False)
+    return {'day': target_day.isoformat(), **snapshot}
+
+def _get_backup_row_hashes(file_id: str, revision: str | None, rows: list) -> np.ndarray:
+    """Row hash column of a backup, read from the row hash cache when this revision was hashed before."""
+    cached = _sanctions_row_hash_cache.get(file_id, revision) if revision else None
+    if cached is not None and len(cached) == 8 * len(rows):
+        return np.frombuffer(cached, dtype=np.uint64)
+    row_hashes = _row_hashes(rows)
+    if revision:
+        _sanctions_row_hash_cache.put(file_id, revision, row_hashes.tobytes())
+    return row_hashes
 
 @handle_exception
-def compare_ofac_sdn_today_vs_yesterday(reference_day: date | None = None) -> dict:
+def compare_ofac_sdn_today_vs_yesterday(reference_day: date | None = None, baseline_before: str | None = None) -> dict:
     return _compare_sanctions_today_vs_yesterday(
         snapshot_fetcher=get_ofac_sdn_backup_for_day,
         reference_day=reference_day,
+        baseline_before=baseline_before,
     )
 
 @handle_exception
-def compare_uk_sanctions_today_vs_yesterday(reference_day: date | None = None) -> dict:
+def compare_uk_sanctions_today_vs_yesterday(reference_day: date | None = None, baseline_before: str | None = None) -> dict:
     return _compare_sanctions_today_vs_yesterday(
         snapshot_fetcher=get_uk_sanctions_backup_for_day,
         reference_day=reference_day,
+        baseline_before=baseline_before,
     )
 
 @handle_exception
-def compare_un_sanctions_today_vs_yesterday(reference_day: date | None = None) -> dict:
+def compare_un_sanctions_today_vs_yesterday(reference_day: date | None = None, baseline_before: str | None = None) -> dict:
     return _compare_sanctions_today_vs_yesterday(
         snapshot_fetcher=get_un_sanctions_backup_for_day,
         reference_day=reference_day,
+        baseline_before=baseline_before,
     )
 
-def _compare_sanctions_today_vs_yesterday(snapshot_fetcher, reference_day: date | None = None) -> dict:
+def _compare_sanctions_today_vs_yesterday(
+    snapshot_fetcher,
+    reference_day: date | None = None,
+    baseline_before: str | None = None,
+) -> dict:
+    # With ``baseline_before`` the older snapshot is the newest backup taken at
+    # or before that moment (e.g. the last screening run) instead of yesterday's.
     today = reference_day or datetime.now(pytz.timezone('America/Costa_Rica')).date()
-    yesterday = today - timedelta(days=1)
-
     today_snapshot = snapshot_fetcher(today)
-    yesterday_snapshot = snapshot_fetcher(yesterday)
+    if baseline_before is not None:
+        yesterday_snapshot = snapshot_fetcher(before=baseline_before)
+        yesterday = date.fromisoformat(yesterday_snapshot['day']) if yesterday_snapshot else None
+    else:
+        yesterday = today - timedelta(days=1)
+        yesterday_snapshot = snapshot_fetcher(yesterday)
     missing_today = not bool(today_snapshot)
     missing_yesterday = not bool(yesterday_snapshot)
 
@@ -298,11 +433,14 @@ def _compare_sanctions_today_vs_yesterday(snapshot_fetcher, reference_day: date
             change_summary = _row_change_summary(
                 today_rows=today_snapshot.get('rows') or [],
                 yesterday_rows=yesterday_snapshot.get('rows') or [],
+                today_hashes=today_snapshot.get('row_hashes'),
+                yesterday_hashes=yesterday_snapshot.get('row_hashes'),
             )
 
     return {
         'today': today.isoformat(),
-        'yesterday': yesterday.isoformat(),
+        'yesterday': yesterday.isoformat() if yesterday else None,
+        'baseline_before': baseline_before,
         'today_snapshot': today_snapshot,
         'yesterday_snapshot': yesterday_snapshot,
         'missing_today': missing_today,
@@ -317,10 +455,18 @@ def _compare_sanctions_today_vs_yesterday(snapshot_fetcher, reference_day: date
     }
 
 @handle_exception
-def compare_all_sanctions_today_vs_yesterday(reference_day: date | None = None) -> dict:
-    ofac = compare_ofac_sdn_today_vs_yesterday(reference_day=reference_day)
-    uk = compare_uk_sanctions_today_vs_yesterday(reference_day=reference_day)
-    un = compare_un_sanctions_today_vs_yesterday(reference_day=reference_day)
+def compare_all_sanctions_today_vs_yesterday(reference_day: date | None = None, baseline_before: str | None = None) -> dict:
+    comparers = {
+        'ofac': compare_ofac_sdn_today_vs_yesterday,
+        'uk': compare_uk_sanctions_today_vs_yesterday,
+        'un': compare_un_sanctions_today_vs_yesterday,
+    }
+    with ThreadPoolExecutor(max_workers=len(comparers), thread_name_prefix='sanctions-compare') as executor:
+        futures = {
+            name: executor.submit(comparer, reference_day=reference_day, baseline_before=baseline_before)
+            for name, comparer in comparers.items()
+        }
+        ofac, uk, un = (futures[name].result() for name in comparers)
 
     return {
         'ofac': ofac,
@@ -343,7 +489,7 @@ def get_uk_sanctions_list():
     if len(uk_sanctions_list_file) != 1:
         logger.error('UK sanctions list file not found or multiple files found')
         raise Exception('UK sanctions list file not found or multiple files found')
-    uk_sanctions_list = Drive.download_file(file_id=uk_sanctions_list_file[0]['id'], parse=True)
+    uk_sanctions_list = Drive.download_file(file_id=uk_sanctions_list_file[0]['id'], parse=True, file_info=uk_sanctions_list_file[0])
     return uk_sanctions_list
 
 @handle_exception
@@ -353,9 +499,20 @@ def get_un_sanctions_list():
     if len(un_sanctions_list_file) != 1:
         logger.error('UN sanctions list file not found or multiple files found')
         raise Exception('UN sanctions list file not found or multiple files found')
-    un_sanctions_list = Drive.download_file(file_id=un_sanctions_list_file[0]['id'], parse=True)
+    un_sanctions_list = Drive.download_file(file_id=un_sanctions_list_file[0]['id'], parse=True, file_info=un_sanctions_list_file[0])
     return un_sanctions_list
 
+def get_sanctions_index_file(list_name: str):
+    """Drive metadata of the published name index of a sanctions list, or None if none was published."""
+    index_filename = SANCTIONS_INDEX_FILENAMES[list_name]
+    index_files = [file for file in Drive.get_files_in_folder(resources_folder_id) if file.get('name') == index_filename]
+    if not index_files:
+        return None
+    return Drive.get_most_recent_file(index_files)
+
+def download_sanctions_index(file_info: dict) -> bytes:
+    return Drive.download_file(file_id=file_info['id'], parse=False, file_info=file_info)
+
 @handle_exception
 def get_deposits_withdrawals():
     files_in_resources_folder = Drive.get_files_in_folder(resources_folder_id)
@@ -363,7 +520,7 @@ def get_deposits_withdrawals():
     if len(deposits_withdrawals_file) != 1:
         logger.error('Deposits and withdrawals file not found or multiple files found')
         raise Exception('Deposits and withdrawals file not found or multiple files found')
-    deposits_withdrawals = Drive.download_file(file_id=deposits_withdrawals_file[0]['id'], parse=True)
+    deposits_withdrawals = Drive.download_file(file_id=deposits_withdrawals_file[0]['id'], parse=True, file_info=deposits_withdrawals_file[0])
     return deposits_withdrawals
 
 def _parse_report_datetime(value):
@@ -468,20 +625,23 @@ def get_monthly_deposits_withdrawals(years: list, months: list, start_date=None,
                 if key not in latest_files_for_period or end_date_str > latest_files_for_period[key]['end_date']:
                     latest_files_for_period[key] = {
                         'id': f['id'],
+                        'file': f,
                         'end_date': end_date_str
                     }
 
+        downloads = Drive.download_many(
+            [info['file'] for info in latest_files_for_period.values()],
+            parse=True,
+            raise_on_error=False,
+        )
         for (year, month), info in latest_files_for_period.items():
-            try:
-                deposits_withdrawals_data = Drive.download_file(file_id=info['id'], parse=True)
-                if deposits_withdrawals_data:
-                    df = pd.DataFrame(deposits_withdrawals_data)
-                    df['Year'] = year
-                    df['Month'] = month
-                    df['ReportDate'] = info['end_date']
-                    all_deposits_withdrawals_dfs.append(df)
-            except Exception as e:
-                logger.error(f'Error downloading/parsing deposits/withdrawals file for {year}-{month}: {e}')
+            deposits_withdrawals_data = downloads.get(info['id'])
+            if deposits_withdrawals_data:
+                df = pd.DataFrame(deposits_withdrawals_data)
+                df['Year'] = year
+                df['Month'] = month
+                df['ReportDate'] = info['end_date']
+                all_deposits_withdrawals_dfs.append(df)
     else:
         # Fallback for structures that keep deposits/withdrawals files under year subfolders.
         year_folders = {
@@ -493,14 +653,20 @@ def get_monthly_deposits_withdrawals(years: list, months: list, start_date=None,
         for year in years:
             if year not in year_folders:
                 logger.warning(f'Year folder {year} not found in deposits/withdrawals root folder.')
-                continue
 
-            year_folder_id = year_folders[year]
+        year_listings = Drive.list_many(
+            [year_folders[year] for year in years if year in year_folders],
+            raise_on_error=False,
+        )
 
-            try:
-                year_files = Drive.get_files_in_folder(year_folder_id)
-            except Exception as e:
-                logger.error(f'Could not fetch contents for deposits/withdrawals year folder {year}: {e}')
+        pending_downloads = []
+        for year in years:
+            if year not in year_folders:
+                continue
+
+            year_files = year_listings.get(year_folders[year])
+            if year_files is None:
+                logger.error(f'Could not fetch contents for deposits/withdrawals year folder {year}')
                 continue
 
             latest_files_for_months = {}
@@ -523,20 +689,26 @@ def get_monthly_deposits_withdrawals(years: list, months: list, start_date=None,
                     if file_month not in latest_files_for_months or end_date_str > latest_files_for_months[file_month]['end_date']:
                         latest_files_for_months[file_month] = {
                             'id': f['id'],
+                            'file': f,
                             'end_date': end_date_str
                         }
 
             for month, info in latest_files_for_months.items():
-                try:
-                    deposits_withdrawals_data = Drive.download_file(file_id=info['id'], parse=True)
-                    if deposits_withdrawals_data:
-                        df = pd.DataFrame(deposits_withdrawals_data)
-                        df['Year'] = year
-                        df['Month'] = month
-                        df['ReportDate'] = info['end_date']
-                        all_deposits_withdrawals_dfs.append(df)
-                except Exception as e:
-                    logger.error(f'Error downloading/parsing deposits/withdrawals file for {year}-{month}: {e}')
+                pending_downloads.append((year, month, info))
+
+        downloads = Drive.download_many(
+            [info['file'] for _, _, info in pending_downloads],
+            parse=True,
+            raise_on_error=False,
+        )
+        for year, month, info in pending_downloads:
+            deposits_withdrawals_data = downloads.get(info['id'])
+            if deposits_withdrawals_data:
+                df = pd.DataFrame(deposits_withdrawals_data)
+                df['Year'] = year
+                df['Month'] = month
+                df['ReportDate'] = info['end_date']
+                all_deposits_withdrawals_dfs.append(df)
 
     if not all_deposits_withdrawals_dfs:
         return []
@@ -564,7 +736,7 @@ def get_ibkr_details():
     if len(ibkr_account_details_file) != 1:
         logger.error('IBKR account details file not found or multiple files found')
         raise Exception('IBKR account details file not found or multiple files found')
-    ibkr_details = Drive.download_file(file_id=ibkr_account_details_file[0]['id'], parse=True)
+    ibkr_details = Drive.download_file(file_id=ibkr_account_details_file[0]['id'], parse=True, file_info=ibkr_account_details_file[0])
     return ibkr_details
 
 """
@@ -610,6 +782,12 @@ def get_trades_report(years: list, months: list):
 
     all_trades_dfs = []
 
+    year_listings = Drive.list_many(
+        [year_folders[year] for year in years if year in year_folders],
+        raise_on_error=False,
+    )
+    pending_downloads = []
+
     for year in years:
         if year not in year_folders:
             logger.warning(f'Year folder {year} not found in root folder.')
@@ -619,11 +797,10 @@ def get_trades_report(years: list, months: list):
         year_folder_id = year_folders[year]
         print(f'[get_trades_report] Processing year={year}, folder_id={year_folder_id}')
 
-        try:
-            year_files = Drive.get_files_in_folder(year_folder_id)
-        except Exception as e:
-            logger.error(f'Could not fetch contents for year folder {year}: {e}')
-            print(f'[get_trades_report] ERROR fetching year folder {year}: {e}')
+        year_files = year_listings.get(year_folder_id)
+        if year_files is None:
+            logger.error(f'Could not fetch contents for year folder {year}')
+            print(f'[get_trades_report] ERROR fetching year folder {year}')
             continue
 
         print(f'[get_trades_report] year={year} has {len(year_files)} files:')
@@ -661,6 +838,7 @@ def get_trades_report(years: list, months: list):
                 if file_month not in latest_files_for_months or end_date_str > latest_files_for_months[file_month]['end_date']:
                     latest_files_for_months[file_month] = {
                         'id': f['id'],
+                        'file': f,
                         'end_date': end_date_str
                     }
                     print(f'  [match] Selecting {name!r} as latest for month {file_month}')
@@ -669,23 +847,30 @@ def get_trades_report(years: list, months: list):
 
         print(f'[get_trades_report] latest_files_for_months={latest_files_for_months}')
 
-        # Download and parse each latest file
         for month, info in latest_files_for_months.items():
-            try:
-                logger.info(f'Downloading trades for {year}-{month} from file {info["end_date"]}')
-                print(f'[get_trades_report] Downloading {year}-{month}, file_id={info["id"]}')
-                f_data = Drive.download_file(file_id=info['id'], parse=True)
-                if f_data:
-                    df = pd.DataFrame(f_data)
-                    df['Year'] = year
-                    df['Month'] = month
-                    all_trades_dfs.append(df)
-                    print(f'[get_trades_report] Loaded {len(df)} rows for {year}-{month}')
-                else:
-                    print(f'[get_trades_report] WARNING: empty file for {year}-{month}')
-            except Exception as e:
-                logger.error(f'Error downloading/parsing file for {year}-{month}: {e}')
-                print(f'[get_trades_report] ERROR downloading {year}-{month}: {e}')
+            logger.info(f'Downloading trades for {year}-{month} from file {info["end_date"]}')
+            print(f'[get_trades_report] Downloading {year}-{month}, file_id={info["id"]}')
+            pending_downloads.append((year, month, info))
+
+    # Download and parse every selected month in parallel
+    downloads = Drive.download_many(
+        [info['file'] for _, _, info in pending_downloads],
+        parse=True,
+        raise_on_error=False,
+    )
+    for year, month, info in pending_downloads:
+        if info['id'] not in downloads:
+            print(f'[get_trades_report] ERROR downloading {year}-{month}')
+            continue
+        f_data = downloads[info['id']]
+        if f_data:
+            df = pd.DataFrame(f_data)
+            df['Year'] = year
+            df['Month'] = month
+            all_trades_dfs.append(df)
+            print(f'[get_trades_report] Loaded {len(df)} rows for {year}-{month}')
+        else:
+            print(f'[get_trades_report] WARNING: empty file for {year}-{month}')
 
     if not all_trades_dfs:
         return []
@@ -762,20 +947,23 @@ def get_nav_report_monthly(years: list, months: list):
                 if key not in latest_files_for_period or end_date_str > latest_files_for_period[key]['end_date']:
                     latest_files_for_period[key] = {
                         'id': f['id'],
+                        'file': f,
                         'end_date': end_date_str
                     }
 
+        downloads = Drive.download_many(
+            [info['file'] for info in latest_files_for_period.values()],
+            parse=True,
+            raise_on_error=False,
+        )
         for (year, month), info in latest_files_for_period.items():
-            try:
-                nav_data = Drive.download_file(file_id=info['id'], parse=True)
-                if nav_data:
-                    df = pd.DataFrame(nav_data)
-                    df['Year'] = year
-                    df['Month'] = month
-                    df['ReportDate'] = info['end_date']
-                    all_nav_dfs.append(df)
-            except Exception as e:
-                logger.error(f'Error downloading/parsing nav file for {year}-{month}: {e}')
+            nav_data = downloads.get(info['id'])
+            if nav_data:
+                df = pd.DataFrame(nav_data)
+                df['Year'] = year
+                df['Month'] = month
+                df['ReportDate'] = info['end_date']
+                all_nav_dfs.append(df)
     else:
         # Fallback for structures that keep NAV files under year subfolders.
         year_folders = {
@@ -787,14 +975,20 @@ def get_nav_report_monthly(years: list, months: list):
         for year in years:
             if year not in year_folders:
                 logger.warning(f'Year folder {year} not found in nav root folder.')
-                continue
 
-            year_folder_id = year_folders[year]
+        year_listings = Drive.list_many(
+            [year_folders[year] for year in years if year in year_folders],
+            raise_on_error=False,
+        )
+
+        pending_downloads = []
+        for year in years:
+            if year not in year_folders:
+                continue
 
-            try:
-                year_files = Drive.get_files_in_folder(year_folder_id)
-            except Exception as e:
-                logger.error(f'Could not fetch contents for nav year folder {year}: {e}')
+            year_files = year_listings.get(year_folders[year])
+            if year_files is None:
+                logger.error(f'Could not fetch contents for nav year folder {year}')
                 continue
 
             latest_files_for_months = {}
@@ -817,20 +1011,26 @@ def get_nav_report_monthly(years: list, months: list):
                     if file_month not in latest_files_for_months or end_date_str > latest_files_for_months[file_month]['end_date']:
                         latest_files_for_months[file_month] = {
                             'id': f['id'],
+                            'file': f,
                             'end_date': end_date_str
                         }
 
             for month, info in latest_files_for_months.items():
-                try:
-                    nav_data = Drive.download_file(file_id=info['id'], parse=True)
-                    if nav_data:
-                        df = pd.DataFrame(nav_data)
-                        df['Year'] = year
-                        df['Month'] = month
-                        df['ReportDate'] = info['end_date']
-                        all_nav_dfs.append(df)
-                except Exception as e:
-                    logger.error(f'Error downloading/parsing nav file for {year}-{month}: {e}')
+                pending_downloads.append((year, month, info))
+
+        downloads = Drive.download_many(
+            [info['file'] for _, _, info in pending_downloads],
+            parse=True,
+            raise_on_error=False,
+        )
+        for year, month, info in pending_downloads:
+            nav_data = downloads.get(info['id'])
+            if nav_data:
+                df = pd.DataFrame(nav_data)
+                df['Year'] = year
+                df['Month'] = month
+                df['ReportDate'] = info['end_date']
+                all_nav_dfs.append(df)
 
     if not all_nav_dfs:
         return []
@@ -854,7 +1054,7 @@ def get_brokerage_commissions():
     brokerage_commissions_root_folder_id = '1s1s6p0tcr3uw-AyHoVO68wDne586ukkY'
     files = Drive.get_files_in_folder(brokerage_commissions_root_folder_id)
     most_recent_file = Drive.get_most_recent_file(files)
-    brokerage_commissions = Drive.download_file(file_id=most_recent_file['id'], parse=True)
+    brokerage_commissions = Drive.download_file(file_id=most_recent_file['id'], parse=True, file_info=most_recent_file)
     brokerage_commissions = _extract_named_sheet_rows(brokerage_commissions, 'brokerage')
     logger.info(f'Brokerage commissions report loaded with {len(brokerage_commissions)} rows')
     return _stringify_dict_keys(brokerage_commissions)
@@ -869,7 +1069,7 @@ def get_management_commissions():
     management_commissions_root_folder_id = '1J4M5ppbt0CZzgQ88woKmuoRunLxgdQ-I'
     files = Drive.get_files_in_folder(management_commissions_root_folder_id)
     most_recent_file = Drive.get_most_recent_file(files)
-    management_commissions = Drive.download_file(file_id=most_recent_file['id'], parse=True)
+    management_commissions = Drive.download_file(file_id=most_recent_file['id'], parse=True, file_info=most_recent_file)
     management_commissions = _extract_named_sheet_rows(management_commissions, 'management commissions')
     logger.info(f'Management commissions report loaded with {len(management_commissions)} rows')
     return _stringify_dict_keys(management_commissions)
@@ -885,8 +1085,9 @@ def get_ending_balances_from_statements():
     seen_account_months = set()
     months_by_account = {account: set() for account in activity_statement_folders}
 
+    folder_listings = Drive.list_many(list(activity_statement_folders.values()))
     for account, folder_id in activity_statement_folders.items():
-        files = Drive.get_files_in_folder(folder_id) or []
+        files = folder_listings.get(folder_id) or []
         filename_pattern = re.compile(rf'{re.escape(account)}_(\d{{4}})(\d{{2}})\.csv', re.IGNORECASE)
 
         for file_info in files:
@@ -924,6 +1125,12 @@ def get_ending_balances_from_statements():
 
         ending_balances = []
         current_file_cache = {}
+        missing_files = [
+            file_info
+            for account, year, month, file_info in statement_files
+            if (account, year, month, file_info['id'], file_info.get('modifiedTime')) not in _activity_statement_file_cache
+        ]
+        downloaded_statements = Drive.download_many(missing_files, parse=False)
         for account, year, month, file_info in statement_files:
             file_cache_key = (
                 account,
@@ -934,7 +1141,7 @@ def get_ending_balances_from_statements():
             )
             statement_rows = _activity_statement_file_cache.get(file_cache_key)
             if statement_rows is None:
-                statement_bytes = Drive.download_file(file_id=file_info['id'], parse=False)
+                statement_bytes = downloaded_statements[file_info['id']]
                 statement_rows = _extract_change_in_nav_rows(statement_bytes, account, year, month)
 
             current_file_cache[file_cache_key] = statement_rows
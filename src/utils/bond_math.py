@@ -0,0 +1,537 @@
+"""
+Bond analytics used by the market data ETL.
+
+Each metric has a scalar ``get_*`` function, which is the reference
+implementation the ETL has always used, and a ``get_*_array`` counterpart
+that computes the same value for a whole column with NumPy. The array
+versions reproduce the scalar results (missing values come back as NaN/None
+where the scalar returns None). Everything matches exactly except duration,
+which agrees to 1e-12 relative: NumPy's pow and pairwise summation can
+differ from math.pow and sum() in the last bit. tests/test_bond_math.py
+asserts this on a golden set of edge cases, and tests/benchmarks/bond_math.py
+times both on a synthetic universe.
+
+``solve_bond_analytics`` goes further than those approximations: it builds
+each bond's coupon schedule and solves the true yield to maturity, with
+Macaulay/modified duration and convexity, for all bonds at once.
+"""
+from datetime import datetime
+from src.utils.logger import logger
+import numpy as np
+import pandas as pd
+
+PRICE_CLUSTER_BINS = [0, 70, 95, 105, 120, float('inf')]
+PRICE_CLUSTER_LABELS = ['Deep Discount', 'Discount', 'Par', 'Premium', 'High Premium']
+SECONDS_PER_YEAR = 365.25 * 24 * 60 * 60
+
+# Duration discounts every coupon period; bonds are grouped by period count so
+# each group is a single (bonds x periods) array. Cap a group's size to bound memory.
+DURATION_MAX_CELLS = 2_000_000
+
+
+"""
+SCALAR
+"""
+def get_bond_price_cluster(price):
+    """
+    Returns the price cluster label for a given bond price.
+
+    Args:
+        price (float): Bond price
+
+    Returns:
+        str: Price cluster label ('Deep Discount', 'Discount', 'Par', 'Premium', or 'High Premium')
+    """
+    # Define same bins and labels as cluster_bonds_by_price
+    bins = PRICE_CLUSTER_BINS
+    labels = PRICE_CLUSTER_LABELS
+
+    # Find which bin the price falls into
+    for i in range(len(bins)-1):
+        if bins[i] <= price < bins[i+1]:
+            return labels[i]
+
+    return None  # Return None if price doesn't fall in any bin
+
+def get_first_valid_price(ask, bid, last):
+    """
+    Returns the first valid price from bid, ask, or last price in that order.
+    Returns None if no valid price is found.
+    """
+
+    if pd.notnull(ask) and ask != 0:
+        return ask
+    elif pd.notnull(bid) and bid != 0:
+        return bid
+    elif pd.notnull(last) and last != 0:
+        return last
+    else:
+        return None
+
+def get_current_yield(coupon, last, ask, bid):
+    """
+    Calculate current yield using first available price (Last, Ask, or Bid)
+
+    Args:
+        coupon (float): Bond coupon rate
+        last (float): Last traded price
+        ask (float): Ask price
+        bid (float): Bid price
+
+    Returns:
+        float: Current yield or None if no valid price available
+    """
+
+    if coupon is None or coupon == 0 or not isinstance(coupon, (int, float)):
+        return None
+    else:
+        if pd.notnull(last) and last != 0:
+            return coupon / last
+        elif pd.notnull(ask) and ask != 0:
+            return coupon / ask
+        elif pd.notnull(bid) and bid != 0:
+            return coupon / bid
+        else:
+            return None
+
+def get_bond_duration(maturity_date, coupon_rate, price, frequency):
+
+    """
+    Calculate the Macaulay Duration for a bond
+
+    Args:
+        maturity_date: The maturity date of the bond (datetime.date)
+        coupon_rate: Annual coupon rate as decimal (e.g. 0.05 for 5%)
+        price: Clean price of the bond as percentage of par (e.g. 100 for par)
+        frequency: Number of coupon payments per year (default=2 for semi-annual)
+
+    Returns:
+        duration: Macaulay Duration in years
+    """
+
+    try:
+        # Default to semi-annual frequency if not provided because it's the most common frequency.
+        if frequency is None or pd.isna(frequency) or frequency <= 0:
+            frequency = 2
+
+        if pd.isna(maturity_date):
+            raise ValueError("maturity_date is missing")
+        if pd.isna(coupon_rate) or pd.isna(price):
+            raise ValueError(
+                f"coupon_rate or price is missing (coupon_rate={coupon_rate!r}, price={price!r})"
+            )
+        if price <= 0:
+            raise ValueError(f"price must be positive, got {price!r}")
+
+        # pandas Timestamp is datetime-compatible, but datetime is imported as
+        # the class (not the datetime module). Normalize all supported inputs
+        # through pandas instead of accessing the nonexistent datetime.datetime.
+        maturity_date = pd.Timestamp(maturity_date).date()
+        today = datetime.now().date()
+
+        # Time to maturity in years
+        t = (maturity_date - today).days / 360.0
+
+        if t <= 0:
+            return 0
+
+        # Convert annual rates to per-period rates
+        period_coupon = coupon_rate / frequency
+
+        periods = max(1, int(t * frequency))  # Ensure at least 1 period
+        r = ( ( coupon_rate * 100 ) / price) / frequency
+
+        # Calculate present value of each cash flow
+        pv_factors = [(1 + r) ** (-i) for i in range(1, periods + 1)]
+        cash_flows = [period_coupon * 100] * periods
+        cash_flows[-1] += 100  # Add principal repayment at maturity
+
+        # Calculate weighted present values
+        weighted_pvs = [cf * pvf * (i/frequency) for i, (cf, pvf) in enumerate(zip(cash_flows, pv_factors), 1)]
+
+        # Macaulay Duration formula
+        duration = sum(weighted_pvs) / price
+
+    except Exception:
+        # Keep the row-level ETL running, but make the failure visible in logs
+        # and preserve it as missing data rather than a valid duration of zero.
+        logger.exception(
+            "Bond duration calculation failed "
+            f"(maturity_date={maturity_date!r}, coupon_rate={coupon_rate!r}, "
+            f"price={price!r}, frequency={frequency!r})"
+        )
+        return None
+
+    return duration
+
+def get_bond_ytm(price, coupon, years_to_maturity):
+    try:
+        # Use the first available price (Last, Ask, or Bid)
+        price = price if pd.notnull(price) else None
+
+        if price is None or years_to_maturity == 0:
+            return None
+
+        numerator = coupon + ((100 - price) / years_to_maturity)
+        denominator = (100 + price) / 2
+
+        return numerator / denominator
+    except:
+        return None
+
+def get_years_to_date(start_date, end_date):
+    """
+    Calculate years to maturity from today to a given maturity date.
+
+    Args:
+        maturity_date (datetime): The maturity date of the bond
+
+    Returns:
+        float: Number of years to maturity, or None if invalid input
+    """
+    try:
+        if pd.isna(end_date):
+            return None
+
+        years = (end_date - start_date).total_seconds() / SECONDS_PER_YEAR
+        return years if years > 0 else None
+
+    except:
+        return None
+
+
+"""
+VECTORIZED
+"""
+def _as_float_array(values) -> np.ndarray:
+    return pd.to_numeric(pd.Series(values, copy=False), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+def _is_valid_price(values: np.ndarray) -> np.ndarray:
+    return ~np.isnan(values) & (values != 0)
+
+def get_first_valid_price_array(ask, bid, last) -> np.ndarray:
+    """Array version of get_first_valid_price; NaN where no price is valid."""
+    ask, bid, last = _as_float_array(ask), _as_float_array(bid), _as_float_array(last)
+    return np.where(
+        _is_valid_price(ask), ask,
+        np.where(_is_valid_price(bid), bid, np.where(_is_valid_price(last), last, np.nan))
+    )
+
+def get_current_yield_array(coupon, last, ask, bid) -> np.ndarray:
+    """Array version of get_current_yield (Last, then Ask, then Bid); NaN for zero coupons."""
+    coupon = _as_float_array(coupon)
+    # Note the price preference differs from get_first_valid_price_array.
+    price = get_first_valid_price_array(last, ask, bid)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(coupon == 0, np.nan, coupon / price)
+
+def get_bond_price_cluster_array(price) -> np.ndarray:
+    """Array version of get_bond_price_cluster; None outside the bins."""
+    price = _as_float_array(price)
+    conditions = [
+        (PRICE_CLUSTER_BINS[i] <= price) & (price < PRICE_CLUSTER_BINS[i + 1])
+        for i in range(len(PRICE_CLUSTER_BINS) - 1)
+    ]
+    return np.select(conditions, np.array(PRICE_CLUSTER_LABELS, dtype=object), default=None)
+
+def get_years_to_date_array(start_date, end_date) -> np.ndarray:
+    """Array version of get_years_to_date; NaN for missing or past dates."""
+    end_date = pd.to_datetime(pd.Series(end_date, copy=False), errors='coerce')
+    years = ((end_date - start_date).dt.total_seconds() / SECONDS_PER_YEAR).to_numpy(dtype=float, na_value=np.nan)
+    with np.errstate(invalid='ignore'):
+        return np.where(years > 0, years, np.nan)
+
+def get_bond_ytm_array(price, coupon, years_to_maturity) -> np.ndarray:
+    """Array version of the approximate get_bond_ytm."""
+    price = _as_float_array(price)
+    coupon = _as_float_array(coupon)
+    years = _as_float_array(years_to_maturity)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ytm = (coupon + ((100 - price) / years)) / ((100 + price) / 2)
+    return np.where(np.isnan(price) | (years == 0), np.nan, ytm)
+
+def get_bond_duration_array(maturity_date, coupon_rate, price, frequency, today=None) -> np.ndarray:
+    """
+    Array version of get_bond_duration.
+
+    Rows the scalar version rejects (missing maturity, coupon or price, or a
+    non-positive price) are NaN; matured bonds are 0. Bonds with the same
+    number of coupon periods are discounted together as one 2-D array, so
+    the per-bond Python lists are replaced by a handful of NumPy operations.
+    """
+    coupon_rate = _as_float_array(coupon_rate)
+    price = _as_float_array(price)
+    frequency = _as_float_array(frequency)
+    frequency = np.where(np.isnan(frequency) | (frequency <= 0), 2.0, frequency)
+
+    maturity = pd.to_datetime(pd.Series(maturity_date, copy=False), errors='coerce')
+    today = np.datetime64(today or datetime.now().date(), 'D')
+    maturity_days = maturity.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    has_maturity = maturity.notna().to_numpy()
+    days = np.where(has_maturity, (maturity_days - today).astype('timedelta64[D]').astype(float), np.nan)
+
+    with np.errstate(invalid='ignore'):
+        valid = has_maturity & ~np.isnan(coupon_rate) & ~np.isnan(price) & (price > 0)
+    t = days / 360.0
+
+    duration = np.full(len(price), np.nan)
+    duration[valid & (t <= 0)] = 0.0
+    pending = valid & (t > 0)
+    if not pending.any():
+        return duration
+
+    rows = np.flatnonzero(pending)
+    f = frequency[rows]
+    c = coupon_rate[rows]
+    p = price[rows]
+    periods = np.maximum(1, (t[rows] * f).astype(np.int64))
+    r = ((c * 100) / p) / f
+    period_cash_flow = (c / f) * 100
+
+    for n in np.unique(periods):
+        group = np.flatnonzero(periods == n)
+        i = np.arange(1, n + 1, dtype=float)
+        step = max(1, DURATION_MAX_CELLS // int(n))
+        for start in range(0, len(group), step):
+            members = group[start:start + step]
+            pv_factors = (1 + r[members, None]) ** (-i)
+            cash_flows = np.repeat(period_cash_flow[members, None], n, axis=1)
+            cash_flows[:, -1] += 100
+            weighted_pvs = cash_flows * pv_factors * (i / f[members, None])
+            duration[rows[members]] = weighted_pvs.sum(axis=1) / p[members]
+    return duration
+
+
+"""
+CASH FLOW ANALYTICS
+"""
+DAY_COUNT_CONVENTIONS = ('30/360', 'ACT/ACT', 'ACT/360', 'ACT/365')
+TREASURY_PATTERN = r'\bUST\b|\bTREASURY\b|\bUS-T\b|\bT-?NOTE\b|\bT-?BOND\b|\bU\.?S\.?\s+GOVT\b'
+
+# Yield search bracket (annual, as a decimal) and convergence tolerance on price per 100.
+YTM_LOWER_BOUND = -0.5
+YTM_UPPER_BOUND = 5.0
+YTM_PRICE_TOLERANCE = 1e-10
+YTM_MAX_ITERATIONS = 100
+
+# Cash flows are laid out as (bonds x coupons) arrays; bound each block.
+CASH_FLOW_MAX_CELLS = 2_000_000
+
+def get_day_count_array(payment_frequency_text, instrument_text=None) -> np.ndarray:
+    """
+    Accrual day-count convention per bond.
+
+    An explicit convention in the payment frequency text (e.g. 'Semi-Annual
+    ACT/ACT') wins; otherwise US Treasuries accrue ACT/ACT and everything
+    else uses the US corporate 30/360 convention.
+    """
+    text = pd.Series(payment_frequency_text, copy=False).fillna('').astype(str).str.upper()
+    day_count = pd.Series('30/360', index=text.index, dtype=object)
+    if instrument_text is not None:
+        instrument = pd.Series(instrument_text, copy=False).fillna('').astype(str).str.upper()
+        day_count[instrument.str.contains(TREASURY_PATTERN, regex=True).to_numpy()] = 'ACT/ACT'
+    normalized = text.str.replace(' ', '', regex=False).str.replace('ACTUAL', 'ACT', regex=False)
+    for convention in DAY_COUNT_CONVENTIONS:
+        day_count[normalized.str.contains(convention, regex=False).to_numpy()] = convention
+    return day_count.to_numpy()
+
+def _add_months(dates: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """Shift datetime64[D] dates by whole months, clipping the day to the month's length."""
+    month = dates.astype('datetime64[M]')
+    day = (dates - month.astype('datetime64[D]')).astype(np.int64)
+    target = month + months.astype('timedelta64[M]')
+    month_length = ((target + 1).astype('datetime64[D]') - target.astype('datetime64[D]')).astype(np.int64)
+    return target.astype('datetime64[D]') + np.minimum(day, month_length - 1).astype('timedelta64[D]')
+
+def _days_30_360(start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """US 30/360 day count between datetime64[D] arrays."""
+    def _parts(dates):
+        years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+        months = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        days = (dates - dates.astype('datetime64[M]').astype('datetime64[D]')).astype(np.int64) + 1
+        return years, months, days
+    y1, m1, d1 = _parts(start)
+    y2, m2, d2 = _parts(end)
+    d1 = np.minimum(d1, 30)
+    d2 = np.where(d1 == 30, np.minimum(d2, 30), d2)
+    return 360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)
+
+def _accrual_fraction(previous_coupon, settlement, next_coupon, frequency, day_count) -> np.ndarray:
+    actual_elapsed = (settlement - previous_coupon).astype(np.int64).astype(float)
+    actual_period = (next_coupon - previous_coupon).astype(np.int64).astype(float)
+    fraction = np.where(
+        day_count == 'ACT/ACT', actual_elapsed / actual_period,
+        np.where(
+            day_count == 'ACT/360', actual_elapsed / (360 / frequency),
+            np.where(
+                day_count == 'ACT/365', actual_elapsed / (365 / frequency),
+                _days_30_360(previous_coupon, settlement) / (360 / frequency),
+            ),
+        ),
+    )
+    return np.clip(fraction, 0.0, 1.0)
+
+def _coupon_schedule(maturity: np.ndarray, settlement: np.datetime64, months_per_period: np.ndarray):
+    """Remaining coupon count and the coupon dates around settlement, stepping back from maturity."""
+    months_to_maturity = (
+        maturity.astype('datetime64[M]').astype(np.int64) - np.datetime64(settlement, 'M').astype(np.int64)
+    )
+    remaining = months_to_maturity // months_per_period
+    candidate = _add_months(maturity, -remaining * months_per_period)
+    remaining = np.where(candidate > settlement, remaining + 1, remaining)
+    previous_coupon = _add_months(maturity, -remaining * months_per_period)
+    next_coupon = _add_months(maturity, -(remaining - 1) * months_per_period)
+    return remaining, previous_coupon, next_coupon
+
+def _cash_flow_blocks(remaining: np.ndarray):
+    """
+    Yield (rows, width) blocks covering every bond, widest bonds first, so a
+    block is sized by its widest row and holds at most CASH_FLOW_MAX_CELLS
+    cells (or a single row wider than that).
+    """
+    order = np.argsort(-remaining, kind='stable')
+    start = 0
+    while start < len(order):
+        width = max(int(remaining[order[start]]), 1)
+        block = order[start:start + max(1, CASH_FLOW_MAX_CELLS // width)]
+        yield block, width
+        start += len(block)
+
+def _discounted_sums(cash_flow, periods_to_next, remaining, frequency, ytm):
+    """
+    Price and the first two yield moments for each bond at ytm.
+
+    Payment j (0 = next coupon) is made w + j periods from settlement and
+    pays the period coupon, plus 100 at maturity. Returns the dirty price,
+    sum(t * PV) and sum(t * (t + 1) * PV) with t in periods.
+    """
+    price = np.empty(len(ytm))
+    first_moment = np.empty(len(ytm))
+    second_moment = np.empty(len(ytm))
+    for block, width in _cash_flow_blocks(remaining):
+        j = np.arange(width, dtype=float)
+        t = periods_to_next[block, None] + j
+        active = j < remaining[block, None]
+        flows = np.where(active, cash_flow[block, None], 0.0)
+        flows[np.arange(len(block)), remaining[block] - 1] += 100
+        discount = (1 + ytm[block, None] / frequency[block, None]) ** (-t)
+        present_values = flows * discount
+        price[block] = present_values.sum(axis=1)
+        first_moment[block] = (t * present_values).sum(axis=1)
+        second_moment[block] = (t * (t + 1) * present_values).sum(axis=1)
+    return price, first_moment, second_moment
+
+def solve_bond_analytics(maturity_date, coupon, clean_price, frequency, day_count='30/360', settlement=None) -> dict:
+    """
+    Yield to maturity, duration and convexity from each bond's coupon schedule.
+
+    Args:
+        maturity_date: Maturity dates (anything pd.to_datetime accepts)
+        coupon: Annual coupon in percent of par (e.g. 5 for 5%)
+        clean_price: Clean price in percent of par
+        frequency: Coupons per year; zero-coupon and missing values compound semi-annually
+        day_count: '30/360', 'ACT/ACT', 'ACT/360' or 'ACT/365', scalar or per bond
+        settlement: Settlement date; defaults to the next business day (T+1)
+
+    Returns:
+        dict of arrays: 'ytm' (annual, decimal, compounded at the coupon
+        frequency), 'macaulay_duration' and 'modified_duration' (years),
+        'convexity' (years squared), 'accrued_interest' and 'dirty_price'
+        (per 100), and 'converged'. Bonds without a maturity after
+        settlement, a coupon or a positive price, or whose price is outside
+        the yield bracket, are NaN.
+
+    The yield is found for all bonds at once with a safeguarded Newton
+    iteration: each bond keeps a [low, high] bracket on the (monotonic)
+    price-yield curve and falls back to bisection whenever a Newton step
+    would leave it, so every bond converges like Brent's method would.
+    """
+    coupon = _as_float_array(coupon)
+    clean_price = _as_float_array(clean_price)
+    frequency = _as_float_array(frequency)
+    is_zero_coupon = (frequency == 0) | (coupon == 0)
+    frequency = np.where(np.isnan(frequency) | (frequency <= 0), 2.0, frequency)
+    frequency = np.where(np.isin(frequency, (1, 2, 3, 4, 6, 12)), frequency, 2.0)
+    coupon = np.where(is_zero_coupon, 0.0, coupon)
+    day_count = np.broadcast_to(np.asarray(day_count, dtype=object), clean_price.shape)
+
+    if settlement is None:
+        settlement = np.busday_offset(np.datetime64(datetime.now().date(), 'D'), 1, roll='forward')
+    settlement = np.datetime64(settlement, 'D')
+    maturity = pd.to_datetime(pd.Series(maturity_date, copy=False), errors='coerce')
+    has_maturity = maturity.notna().to_numpy()
+    maturity = maturity.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+
+    with np.errstate(invalid='ignore'):
+        valid = has_maturity & ~np.isnan(coupon) & ~np.isnan(clean_price) & (clean_price > 0)
+    valid[valid] = maturity[valid] > settlement
+
+    result = {
+        name: np.full(len(clean_price), np.nan)
+        for name in ('ytm', 'macaulay_duration', 'modified_duration', 'convexity', 'accrued_interest', 'dirty_price')
+    }
+    result['converged'] = np.zeros(len(clean_price), dtype=bool)
+    rows = np.flatnonzero(valid)
+    if len(rows) == 0:
+        return result
+
+    f = frequency[rows]
+    months_per_period = (12 / f).astype(np.int64)
+    remaining, previous_coupon, next_coupon = _coupon_schedule(maturity[rows], settlement, months_per_period)
+    accrued_fraction = _accrual_fraction(previous_coupon, settlement, next_coupon, f, day_count[rows])
+    cash_flow = coupon[rows] / f
+    accrued = cash_flow * accrued_fraction
+    dirty = clean_price[rows] + accrued
+    periods_to_next = 1 - accrued_fraction
+
+    # Start from the approximate yield and keep each bond inside its bracket.
+    years = (maturity[rows] - settlement).astype(np.int64) / 365.25
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ytm = (coupon[rows] + (100 - clean_price[rows]) / years) / ((100 + clean_price[rows]) / 2)
+    low = np.full(len(rows), YTM_LOWER_BOUND)
+    high = np.full(len(rows), YTM_UPPER_BOUND)
+    ytm = np.where(np.isfinite(ytm), np.clip(ytm, low + 1e-6, high - 1e-6), 0.05)
+
+    # Prices outside [P(high), P(low)] have no yield in the bracket.
+    price_at_low, _, _ = _discounted_sums(cash_flow, periods_to_next, remaining, f, low)
+    price_at_high, _, _ = _discounted_sums(cash_flow, periods_to_next, remaining, f, high)
+    solvable = (dirty <= price_at_low) & (dirty >= price_at_high)
+
+    converged = ~solvable
+    for _ in range(YTM_MAX_ITERATIONS):
+        active = ~converged
+        if not active.any():
+            break
+        index = np.flatnonzero(active)
+        price, first_moment, _ = _discounted_sums(
+            cash_flow[index], periods_to_next[index], remaining[index], f[index], ytm[index]
+        )
+        error = price - dirty[index]
+        done = np.abs(error) <= YTM_PRICE_TOLERANCE * np.maximum(dirty[index], 1.0)
+        converged[index[done]] = True
+
+        # Price falls as yield rises: a price above target means the yield is too low.
+        low[index] = np.where(error > 0, ytm[index], low[index])
+        high[index] = np.where(error < 0, ytm[index], high[index])
+        derivative = -first_moment / (f[index] * (1 + ytm[index] / f[index]))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = ytm[index] - error / derivative
+        inside = np.isfinite(newton) & (newton > low[index]) & (newton < high[index])
+        step = np.where(inside, newton, (low[index] + high[index]) / 2)
+        ytm[index] = np.where(done, ytm[index], step)
+
+    solved = solvable & converged
+    price, first_moment, second_moment = _discounted_sums(cash_flow, periods_to_next, remaining, f, ytm)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        macaulay = first_moment / price / f
+        modified = macaulay / (1 + ytm / f)
+        convexity = second_moment / (price * f ** 2 * (1 + ytm / f) ** 2)
+
+    result['ytm'][rows] = np.where(solved, ytm, np.nan)
+    result['macaulay_duration'][rows] = np.where(solved, macaulay, np.nan)
+    result['modified_duration'][rows] = np.where(solved, modified, np.nan)
+    result['convexity'][rows] = np.where(solved, convexity, np.nan)
+    result['accrued_interest'][rows] = accrued
+    result['dirty_price'][rows] = dirty
+    result['converged'][rows] = solved
+    return result
@@ -1,19 +1,28 @@
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials
-from googleapiclient.http import MediaIoBaseDownload, MediaIoBaseUpload
+from googleapiclient.http import MediaIoBaseDownload, MediaIoBaseUpload, MediaUpload
 from google.auth.exceptions import RefreshError
 
 from src.utils.logger import logger
 from src.utils.exception import handle_exception
 from src.utils.managers.secret_manager import get_secret
+from src.utils.managers.disk_cache_manager import DiskCache
+from src.utils.connectors.drive_index import DriveFolderIndex
 
 from datetime import datetime
 
 import pandas as pd
 from io import BytesIO, StringIO
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 import io
+import os
+import inspect
+import tempfile
 import json
+import pickle
 import base64
 import time
 import threading
@@ -21,6 +30,10 @@ from functools import wraps
 
 from typing import Union
 
+PARSED_CACHE_VERSION = 'v2'
+XLSX_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_ROWS_PER_CHUNK = 10000
+
 def retry_on_connection_error(max_retries=3, delay=1):
   """Decorator to retry operations on connection errors"""
   def decorator(func):
@@ -58,6 +71,79 @@ def retry_on_connection_error(max_retries=3, delay=1):
   return decorator
 
 
+class ChunkedUpload(MediaUpload):
+  """
+  Resumable upload fed from an iterator of bytes (or str) chunks.
+
+  The total size is not known up front, so Drive receives '*' as the size
+  until the iterator is exhausted. Bytes are dropped once Drive acknowledges
+  them and the iterator is only read far enough to fill the next request, so
+  at most about two upload chunks are held in memory.
+  """
+
+  def __init__(self, chunks, mimetype, chunksize):
+    self._chunks = iter(chunks)
+    self._mimetype = mimetype
+    self._chunksize = chunksize
+    self._buffer = bytearray()
+    self._buffer_start = 0
+    self._requested_end = 0
+    self._exhausted = False
+
+  def chunksize(self):
+    return self._chunksize
+
+  def mimetype(self):
+    return self._mimetype
+
+  def resumable(self):
+    return True
+
+  def has_stream(self):
+    return False
+
+  def _fill(self, end):
+    while not self._exhausted and self._buffer_start + len(self._buffer) < end:
+      try:
+        chunk = next(self._chunks)
+      except StopIteration:
+        self._exhausted = True
+        break
+      self._buffer += chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+  def size(self):
+    # Read one byte past the next request so the last one carries the total size.
+    self._fill(self._requested_end + self._chunksize + 1)
+    if self._exhausted:
+      return self._buffer_start + len(self._buffer)
+    return None
+
+  def getbytes(self, begin, length):
+    if begin < self._buffer_start:
+      raise ValueError('Upload restarted before the buffered chunk; the chunk source cannot be replayed')
+    del self._buffer[:begin - self._buffer_start]
+    self._buffer_start = begin
+    self._fill(begin + length)
+    data = bytes(self._buffer[:length])
+    self._requested_end = begin + len(data)
+    return data
+
+
+def _dataframe_csv_chunks(df, rows_per_chunk=CSV_ROWS_PER_CHUNK):
+  """Yield df as CSV, a slice of rows at a time."""
+  if df.empty:
+    yield df.to_csv(index=False)
+    return
+  for start in range(0, len(df), rows_per_chunk):
+    yield df.iloc[start:start + rows_per_chunk].to_csv(index=False, header=start == 0)
+
+
+def _memoryview_chunks(data, chunk_size):
+  view = memoryview(data)
+  for start in range(0, len(view), chunk_size):
+    yield view[start:start + chunk_size]
+
+
 class GoogleDrive:
   _instance = None
 
@@ -99,6 +185,46 @@ class GoogleDrive:
     self._last_connection_time = None
     self._connection_timeout = 300  # 5 minutes
     self._credentials = None
+
+    # Socket timeout for every Drive HTTP call, and the shared pool used by
+    # download_many/list_many. Pool threads keep their own service through
+    # _thread_local, so at most DRIVE_MAX_WORKERS extra connections exist.
+    self._http_timeout = int(os.getenv('DRIVE_HTTP_TIMEOUT_SECONDS', '120'))
+    self._max_workers = int(os.getenv('DRIVE_MAX_WORKERS', '4'))
+    self._executor = None
+    self._executor_lock = threading.Lock()
+
+    # Resumable upload request size. Drive requires a multiple of 256 KiB.
+    alignment = 256 * 1024
+    upload_chunk_bytes = int(os.getenv('DRIVE_UPLOAD_CHUNK_BYTES', str(8 * 1024 * 1024)))
+    self._upload_chunk_bytes = max(alignment, -(-upload_chunk_bytes // alignment) * alignment)
+
+    # Downloaded bytes are cached on local disk keyed by file id and revision
+    # (md5Checksum, or modifiedTime for files without one), so repeated report
+    # reads and worker restarts do not re-download unchanged files.
+    self._download_cache = DiskCache(
+      directory=os.getenv('DRIVE_CACHE_DIR', '/app/cache/drive'),
+      max_bytes=int(os.getenv('DRIVE_CACHE_MAX_BYTES', str(2 * 1024 ** 3))),
+      name='Drive download cache',
+    )
+    # Parsed files for download_file(parse=True), kept as DataFrames (one per
+    # sheet for Excel), so warm reads skip both the download and pandas/openpyxl
+    # parsing.
+    self._parsed_cache = DiskCache(
+      directory=os.getenv('DRIVE_PARSED_CACHE_DIR', '/app/cache/drive_parsed'),
+      max_bytes=int(os.getenv('DRIVE_PARSED_CACHE_MAX_BYTES', str(1024 ** 3))),
+      name='Drive parsed cache',
+    )
+
+    # Folder listings served from a local index kept current with the
+    # Drive Changes API. Set DRIVE_FOLDER_INDEX_ENABLED=false to always list.
+    self._folder_index = None
+    if os.getenv('DRIVE_FOLDER_INDEX_ENABLED', 'true').lower() in ('true', '1', 'yes'):
+      self._folder_index = DriveFolderIndex(
+        service_provider=lambda: self.service,
+        state_path=os.getenv('DRIVE_FOLDER_INDEX_PATH', '/app/cache/drive_folder_index.json'),
+        refresh_interval=int(os.getenv('DRIVE_FOLDER_INDEX_REFRESH_SECONDS', '30')),
+      )
     
     self._initialized = True
     logger.announcement('Initialized Drive service', type='success')
@@ -132,7 +258,8 @@ class GoogleDrive:
     """Create a fresh service connection"""
     try:
       creds = self._get_credentials()
-      service = build('drive', 'v3', credentials=creds)
+      http = AuthorizedHttp(creds, http=httplib2.Http(timeout=self._http_timeout))
+      service = build('drive', 'v3', http=http)
       self._last_connection_time = time.time()
       logger.info("Created fresh Drive service connection")
       return service
@@ -261,6 +388,7 @@ class GoogleDrive:
     
     folder = self.service.files().create(body=fileMetadata, fields='id, name, parents, mimeType, size, modifiedTime, createdTime').execute()
     logger.success(f"Successfully created folder: {folderName} in folder: {parentFolderId}")
+    self._note_file(folder)
     return folder
 
   @retry_on_connection_error()
@@ -282,6 +410,11 @@ class GoogleDrive:
   @handle_exception
   def get_files_in_folder(self, parent_id):
     logger.info(f'Getting files in folder: {parent_id}')
+    if self._folder_index is not None:
+      files = self._folder_index.list_folder(parent_id)
+      logger.success(f'{len(files)} files found in folder: {parent_id}')
+      return files
+
     files = []
     page_token = None
     while True:
@@ -290,7 +423,7 @@ class GoogleDrive:
               supportsAllDrives=True,
               includeItemsFromAllDrives=True,
               q=f"'{parent_id}' in parents and trashed = false",
-              fields="nextPageToken, files(id, name, parents, mimeType, size, modifiedTime, createdTime)",
+              fields="nextPageToken, files(id, name, parents, mimeType, size, modifiedTime, createdTime, md5Checksum)",
               pageToken=page_token
           ).execute())
       files.extend(response.get('files', []))
@@ -334,7 +467,7 @@ class GoogleDrive:
   @handle_exception
   def get_file_info_by_id(self, file_id):
     logger.info(f'Getting file info for file: {file_id}')
-    f = self.service.files().get(fileId=file_id, fields='id, name, parents, mimeType, size, modifiedTime, createdTime', supportsAllDrives=True).execute()
+    f = self.service.files().get(fileId=file_id, fields='id, name, parents, mimeType, size, modifiedTime, createdTime, md5Checksum', supportsAllDrives=True).execute()
     logger.success(f"File found with ID: {file_id}")
     return f
 
@@ -363,6 +496,7 @@ class GoogleDrive:
       )).execute()
 
     logger.success(f'Successfully renamed file {file_id} to {new_name}')
+    self._note_file(renamedFile)
     return renamedFile
   
   @retry_on_connection_error()
@@ -379,54 +513,95 @@ class GoogleDrive:
     ).execute()
 
     logger.success(f'Successfully moved file: {f["name"]}')
+    self._note_file(moved_file)
     return moved_file
 
   @retry_on_connection_error()
-  def upload_file(self, file_name: str, mime_type: str, file_data: Union[str, list[dict]], parent_folder_id: str) -> dict:
+  def upload_file(self, file_name: str, mime_type: str, file_data: Union[str, list[dict], pd.DataFrame, bytes], parent_folder_id: str) -> dict:
     """
     Upload a file to Google Drive. Supports two types of uploads:
     1. Base64 encoded file data from web/React applications
     2. Array of dictionaries to be converted to CSV/Excel
 
+    DataFrames and raw bytes are passed straight to upload_stream.
+
     Args:
         file_name (str): Name of the file to create
         mime_type (str): MIME type of the file
-        file_data (Union[str, list[dict]]): Either base64 encoded string or array of dictionaries
+        file_data (Union[str, list[dict], pd.DataFrame, bytes]): Base64 encoded string, array of dictionaries, DataFrame or raw bytes
         parent_folder_id (str): ID of the parent folder in Drive
 
     Returns:
         dict: Created file metadata from Drive
     """
-    logger.info(f"Uploading file: {file_name} to folder: {parent_folder_id}")
-
     # Handle array of dictionaries (convert to CSV/Excel)
     if isinstance(file_data, list):
-      df = pd.DataFrame(file_data)
-      buffer = BytesIO()
-      
-      if mime_type == 'text/csv':
-        df.to_csv(buffer, index=False)
-      elif mime_type == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet':
-        df.to_excel(buffer, index=False)
-      else:
-        raise ValueError(f"Unsupported MIME type {mime_type} for dictionary array upload")
-      
-      file_bytes = buffer.getvalue()
+      file_data = pd.DataFrame(file_data)
 
     # Handle base64 encoded string
-    else:
-
+    elif isinstance(file_data, str):
       if ',' in file_data:  # Remove data URL prefix if present
         file_data = file_data.split(',', 1)[1]
-      file_bytes = base64.b64decode(file_data)
-
-    # Configure upload with chunking for better performance
-    media = MediaIoBaseUpload(
-      BytesIO(file_bytes),
-      mimetype=mime_type,
-      resumable=True,
-      chunksize=1024*1024  # 1MB chunks
-    )
+      file_data = base64.b64decode(file_data)
+
+    return self._upload(file_name, mime_type, file_data, parent_folder_id)
+
+  @retry_on_connection_error()
+  def upload_stream(self, file_name: str, mime_type: str, source, parent_folder_id: str) -> dict:
+    """
+    Upload a file to Google Drive through a resumable upload without building the full body in memory.
+
+    Args:
+        file_name (str): Name of the file to create
+        mime_type (str): MIME type of the file
+        source: One of
+            - pd.DataFrame: written as CSV a slice of rows at a time (or to a temporary file for Excel)
+            - bytes, bytearray or memoryview: uploaded without copying
+            - a seekable file object
+            - an iterable or generator of bytes/str chunks, e.g. CSV pieces
+        parent_folder_id (str): ID of the parent folder in Drive
+
+    Returns:
+        dict: Created file metadata from Drive
+    """
+    return self._upload(file_name, mime_type, source, parent_folder_id)
+
+  def _upload_media(self, source, mime_type):
+    chunk_size = self._upload_chunk_bytes
+
+    if isinstance(source, pd.DataFrame):
+      if mime_type == 'text/csv':
+        return ChunkedUpload(_dataframe_csv_chunks(source), mime_type, chunk_size)
+      if mime_type == XLSX_MIME_TYPE:
+        # openpyxl needs a seekable target; spill to disk instead of a BytesIO.
+        spool = tempfile.TemporaryFile()
+        source.to_excel(spool, index=False)
+        spool.seek(0)
+        return MediaIoBaseUpload(spool, mimetype=mime_type, resumable=True, chunksize=chunk_size)
+      raise ValueError(f"Unsupported MIME type {mime_type} for DataFrame upload")
+
+    if isinstance(source, bytes):
+      # BytesIO shares an immutable bytes buffer until it is written to.
+      return MediaIoBaseUpload(BytesIO(source), mimetype=mime_type, resumable=True, chunksize=chunk_size)
+
+    if isinstance(source, (bytearray, memoryview)):
+      return ChunkedUpload(_memoryview_chunks(source, chunk_size), mime_type, chunk_size)
+
+    if isinstance(source, str):
+      return MediaIoBaseUpload(BytesIO(source.encode('utf-8')), mimetype=mime_type, resumable=True, chunksize=chunk_size)
+
+    if hasattr(source, 'read'):
+      return MediaIoBaseUpload(source, mimetype=mime_type, resumable=True, chunksize=chunk_size)
+
+    if inspect.isgenerator(source) and inspect.getgeneratorstate(source) != inspect.GEN_CREATED:
+      # A retried upload would silently send only the remaining chunks.
+      raise ValueError('Chunk generator was already consumed; pass a fresh generator to upload it again')
+    return ChunkedUpload(source, mime_type, chunk_size)
+
+  def _upload(self, file_name, mime_type, source, parent_folder_id):
+    logger.info(f"Uploading file: {file_name} to folder: {parent_folder_id}")
+
+    media = self._upload_media(source, mime_type)
 
     file_metadata = {
       'name': file_name,
@@ -441,9 +616,10 @@ class GoogleDrive:
         media_body=media,
         fields='id, name, parents, mimeType, size, modifiedTime, createdTime'
       )
-    ).execute()
+    ).execute(num_retries=3)
 
     logger.success(f"Successfully uploaded file: {file_name} to folder: {parent_folder_id}")
+    self._note_file(created_file)
     return created_file
   
   @retry_on_connection_error()
@@ -456,14 +632,40 @@ class GoogleDrive:
         supportsAllDrives=True, 
       ).execute()
       logger.success(f"Successfully deleted file with ID: {file_id}")
+      if self._folder_index is not None:
+        self._folder_index.remove_file(file_id)
       return deletedFile
 
+  def _fetch_media(self, file_id):
+    try:
+        request = self.service.files().get_media(fileId=file_id)
+        downloaded_file = io.BytesIO()
+        downloader = MediaIoBaseDownload(downloaded_file, request)
+        done = False
+        while done is False:
+            status, done = downloader.next_chunk()
+            logger.info(f"Download {int(status.progress() * 100)}.")
+
+    except HttpError as e:
+        raise Exception(e)
+    
+    except Exception as e:
+       raise Exception(e)
+
+    return downloaded_file.getvalue()
+
   @retry_on_connection_error()
   @handle_exception
-  def download_file(self, file_id, parse=False):
+  def download_file(self, file_id, parse=False, file_info=None, as_dataframe=False):
     """
     Downloads a file from Google Drive.
 
+    Bytes are served from the local download cache when the file's revision
+    (md5Checksum or modifiedTime) is unchanged. Pass the file_info dict from a
+    folder listing to skip the metadata request used to look up the revision.
+    Parsed results are cached per revision as well, so a warm parse=True read
+    neither downloads nor re-parses; as_dataframe=True returns a DataFrame.
+
     Returns:
       - If parse is False:
         - Returns the file data as a bytes object
@@ -475,50 +677,73 @@ class GoogleDrive:
     """
     logger.info(f"Downloading file with ID: {file_id}")
 
-    try:
-        request = self.service.files().get_media(fileId=file_id)
-        mime_type = None
-        if parse:
-            file_info = self.get_file_info_by_id(file_id)
-            mime_type = file_info['mimeType']
-
-        downloaded_file = io.BytesIO()
-        downloader = MediaIoBaseDownload(downloaded_file, request)
-        done = False
-        while done is False:
-            status, done = downloader.next_chunk()
-            logger.info(f"Download {int(status.progress() * 100)}.")
+    if not file_info or file_info.get('id', file_id) != file_id or not file_info.get('mimeType') or not file_info.get('modifiedTime'):
+      file_info = None
+    if file_info is None and (parse or self._download_cache.enabled):
+      file_info = self.get_file_info_by_id(file_id)
+    mime_type = (file_info or {}).get('mimeType')
+    revision = (file_info or {}).get('md5Checksum') or (file_info or {}).get('modifiedTime')
+
+    # Bump PARSED_CACHE_VERSION whenever the parsing below changes shape.
+    parsed_revision = f'{PARSED_CACHE_VERSION}:{mime_type}:{revision}' if revision else None
+    if parse and parsed_revision:
+      cached = self._parsed_cache.get(file_id, parsed_revision)
+      if cached is not None:
+        try:
+          parsed = pickle.loads(cached)
+          logger.success("Served parsed file from parsed cache.")
+          return self._parsed_result(parsed, as_dataframe)
+        except Exception as e:
+          logger.warning(f'Discarding unreadable parsed cache entry for {file_id}: {e}')
+          self._parsed_cache.invalidate(file_id)
 
-    except HttpError as e:
-        raise Exception(e)
-    
-    except Exception as e:
-       raise Exception(e)
-        
-    logger.success("Successfully downloaded file.")
+    file_bytes = self._download_cache.get(file_id, revision) if revision else None
+    if file_bytes is not None:
+      logger.success("Served file from download cache.")
+    else:
+      file_bytes = self._fetch_media(file_id)
+      if revision:
+        self._download_cache.put(file_id, revision, file_bytes)
+      logger.success("Successfully downloaded file.")
     
     if not parse:
-      return downloaded_file.getvalue()
+      return file_bytes
     else:
       if mime_type == 'text/csv':
-        list_data = pd.read_csv(StringIO(downloaded_file.getvalue().decode('latin1'))).fillna('').to_dict(orient='records')
+        parsed = ('frame', pd.read_csv(StringIO(file_bytes.decode('latin1'))).fillna(''))
       elif mime_type in ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'application/vnd.ms-excel'):
-        # Read all sheets and consolidate them into a single list of records, annotating each row with its sheet name
-        sheets_dict = pd.read_excel(BytesIO(downloaded_file.getvalue()), sheet_name=None)
-        consolidated_records = []
-        for _sheet_name, _df in sheets_dict.items():
-          _df = _df.fillna('')
-          _df['sheet_name'] = _sheet_name  # Track originating sheet
-          consolidated_records.extend(_df.to_dict(orient='records'))
-        list_data = consolidated_records
+        # Read all sheets; records are annotated with their sheet name on the way out.
+        sheets_dict = pd.read_excel(BytesIO(file_bytes), sheet_name=None)
+        parsed = ('sheets', {sheet_name: df.fillna('') for sheet_name, df in sheets_dict.items()})
       elif mime_type == 'application/json':
-        list_data = json.loads(downloaded_file.getvalue())
-        return list_data
+        parsed = ('json', json.loads(file_bytes))
       else:
         raise Exception("Unsupported MIME type for parsing.")
-      
+
+      if parsed_revision:
+        self._parsed_cache.put(file_id, parsed_revision, pickle.dumps(parsed, protocol=pickle.HIGHEST_PROTOCOL))
       logger.success("Successfully exported parsed file.")
-      return list_data
+      return self._parsed_result(parsed, as_dataframe)
+
+  @staticmethod
+  def _parsed_result(parsed, as_dataframe):
+    """Turn a parsed ('frame' | 'sheets' | 'json', data) pair into a DataFrame or a list of records."""
+    kind, data = parsed
+    if kind == 'frame':
+      return data if as_dataframe else data.to_dict(orient='records')
+    if kind == 'sheets':
+      # Track each row's originating sheet.
+      frames = [df.assign(sheet_name=sheet_name) for sheet_name, df in data.items()]
+      if as_dataframe:
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+      return [record for df in frames for record in df.to_dict(orient='records')]
+    return pd.DataFrame(data) if as_dataframe else data
+
+  def get_download_cache_stats(self):
+    return {
+      'bytes': self._download_cache.stats(),
+      'parsed': self._parsed_cache.stats(),
+    }
 
   @retry_on_connection_error()
   @handle_exception
@@ -563,6 +788,102 @@ class GoogleDrive:
       else:
         raise Exception("Unsupported MIME type for parsing.")
       
+  def _note_file(self, file):
+    """Apply a write made through this client to the folder index without waiting for the changes feed."""
+    if self._folder_index is not None:
+      self._folder_index.apply_file(file)
+
+  def get_folder_index_stats(self):
+    return self._folder_index.stats() if self._folder_index is not None else {'enabled': False}
+
+  def _get_executor(self):
+    with self._executor_lock:
+      if self._executor is None:
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='drive')
+      return self._executor
+
+  def _run_concurrently(self, func, keys, timeout, label):
+    """
+    Run func(key) for every key on the shared Drive pool.
+
+    Returns (results, errors) dicts keyed by key. A call that has been running
+    for longer than timeout seconds is abandoned and reported as a TimeoutError;
+    its worker is released once the HTTP socket timeout fires.
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+      return {}, {}
+
+    started_at = {}
+
+    def _call(key):
+      started_at[key] = time.monotonic()
+      return func(key)
+
+    executor = self._get_executor()
+    futures = {executor.submit(_call, key): key for key in keys}
+    results, errors = {}, {}
+    pending = set(futures)
+    while pending:
+      done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+      for future in done:
+        key = futures[future]
+        try:
+          results[key] = future.result()
+        except Exception as e:
+          errors[key] = e
+      if timeout:
+        now = time.monotonic()
+        for future in list(pending):
+          key = futures[future]
+          if key in started_at and now - started_at[key] > timeout:
+            pending.discard(future)
+            future.cancel()
+            errors[key] = TimeoutError(f'{label} {key} exceeded {timeout}s')
+
+    for key, error in errors.items():
+      logger.error(f'{label} failed for {key}: {error}')
+    return {key: results[key] for key in keys if key in results}, errors
+
+  @handle_exception
+  def download_many(self, file_ids, parse=False, timeout=300, raise_on_error=True):
+    """
+    Download several files in parallel on the shared Drive pool.
+
+    file_ids may mix plain ids and file-info dicts from a folder listing; the
+    latter let download_file skip its metadata request.
+    Returns a dict of file_id -> download_file(file_id, parse) result in input order.
+    When raise_on_error is False, failed or timed out files are logged and left out.
+    """
+    file_infos = {item['id']: item for item in file_ids if isinstance(item, dict)}
+    file_ids = [item['id'] if isinstance(item, dict) else item for item in file_ids]
+    logger.info(f'Downloading {len(file_ids)} files with up to {self._max_workers} workers')
+    results, errors = self._run_concurrently(
+      lambda file_id: self.download_file(file_id=file_id, parse=parse, file_info=file_infos.get(file_id)),
+      file_ids,
+      timeout,
+      'Download',
+    )
+    if errors and raise_on_error:
+      raise Exception(f'Failed to download {len(errors)} of {len(file_ids)} files: {list(errors)}')
+    logger.success(f'Downloaded {len(results)} of {len(file_ids)} files')
+    return results
+
+  @handle_exception
+  def list_many(self, folder_ids, timeout=120, raise_on_error=True):
+    """
+    List several folders in parallel on the shared Drive pool.
+
+    Returns a dict of folder_id -> get_files_in_folder(folder_id) result in input order.
+    When raise_on_error is False, failed or timed out folders are logged and left out.
+    """
+    logger.info(f'Listing {len(folder_ids)} folders with up to {self._max_workers} workers')
+    results, errors = self._run_concurrently(self.get_files_in_folder, folder_ids, timeout, 'Listing')
+    if errors and raise_on_error:
+      raise Exception(f'Failed to list {len(errors)} of {len(folder_ids)} folders: {list(errors)}')
+    logger.success(f'Listed {len(results)} of {len(folder_ids)} folders')
+    return results
+
   def get_most_recent_file(self, files):
     """
     Get the most recent file from a list of files based on creation time.
@@ -0,0 +1,285 @@
+from src.utils.logger import logger
+
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+
+FILE_FIELDS = 'id, name, parents, mimeType, size, modifiedTime, createdTime, md5Checksum'
+
+
+class DriveFolderIndex:
+  """
+  Local index of folder listings kept current through the Drive Changes API.
+
+  The first listing of a folder pages through files.list once; afterwards the
+  index replays changes.list from a persisted start page token and serves
+  listings from memory. The token and listings are saved to state_path so a
+  restarted worker resumes from where it stopped instead of re-listing.
+
+  service_provider returns a Drive v3 service (or any object exposing the
+  same files().list and changes().getStartPageToken/list calls), so the
+  index can run against an in-memory fake in tests.
+
+  Network calls run outside the index lock: a refresh fetches changes first
+  and applies them under the lock, and a folder listed for the first time
+  buffers the changes replayed meanwhile and applies them before it is
+  published.
+  """
+
+  def __init__(self, service_provider, state_path=None, refresh_interval=30):
+    self._service_provider = service_provider
+    self._state_path = state_path
+    self._refresh_interval = refresh_interval
+    self._lock = threading.RLock()
+    self._refresh_lock = threading.Lock()
+    self._folders = {}
+    # Change buffers of folders being listed for the first time.
+    self._pending = []
+    self._page_token = None
+    self._last_refresh = 0.0
+    self._stats = {'hits': 0, 'misses': 0, 'refreshes': 0, 'changes_applied': 0, 'resets': 0}
+    self._load_state()
+
+  def _load_state(self):
+    if not self._state_path or not os.path.exists(self._state_path):
+      return
+    try:
+      with open(self._state_path, 'r') as f:
+        state = json.load(f)
+      self._page_token = state.get('page_token')
+      self._folders = {
+        folder_id: {file['id']: file for file in files}
+        for folder_id, files in (state.get('folders') or {}).items()
+      }
+      logger.info(f'Loaded Drive folder index with {len(self._folders)} folders')
+    except Exception as e:
+      logger.warning(f'Ignoring unreadable Drive folder index state: {e}')
+      self._folders = {}
+      self._page_token = None
+
+  def _save_state(self):
+    if not self._state_path:
+      return
+    state = {
+      'page_token': self._page_token,
+      'saved_at': time.time(),
+      'folders': {folder_id: list(files.values()) for folder_id, files in self._folders.items()},
+    }
+    try:
+      directory = os.path.dirname(self._state_path) or '.'
+      os.makedirs(directory, exist_ok=True)
+      fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp')
+      with os.fdopen(fd, 'w') as f:
+        json.dump(state, f)
+      os.replace(tmp_path, self._state_path)
+    except Exception as e:
+      logger.warning(f'Could not persist Drive folder index: {e}')
+
+  def _ensure_page_token(self):
+    with self._lock:
+      if self._page_token is not None:
+        return self._page_token
+    response = self._service_provider().changes().getStartPageToken(supportsAllDrives=True).execute()
+    with self._lock:
+      if self._page_token is None:
+        self._page_token = response['startPageToken']
+      return self._page_token
+
+  def _list_from_api(self, folder_id):
+    files = []
+    page_token = None
+    while True:
+      response = self._service_provider().files().list(
+        supportsAllDrives=True,
+        includeItemsFromAllDrives=True,
+        q=f"'{folder_id}' in parents and trashed = false",
+        fields=f'nextPageToken, files({FILE_FIELDS})',
+        pageToken=page_token,
+      ).execute()
+      files.extend(response.get('files', []))
+      page_token = response.get('nextPageToken')
+      if not page_token:
+        break
+    return files
+
+  def _fetch_changes(self, page_token):
+    """Page through changes.list from page_token; returns the changes and the next start token."""
+    changes = []
+    while True:
+      response = self._service_provider().changes().list(
+        pageToken=page_token,
+        spaces='drive',
+        supportsAllDrives=True,
+        includeItemsFromAllDrives=True,
+        includeRemoved=True,
+        pageSize=1000,
+        fields=f'nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}, trashed))',
+      ).execute()
+      changes.extend(response.get('changes', []))
+      if response.get('newStartPageToken'):
+        return changes, response['newStartPageToken']
+      if not response.get('nextPageToken'):
+        return changes, page_token
+      page_token = response['nextPageToken']
+
+  @staticmethod
+  def _is_invalid_token_error(error):
+    # Drive answers an expired or unknown page token with 400, 404 or 410.
+    resp = getattr(error, 'resp', None)
+    status = getattr(resp, 'status', None) or getattr(error, 'status_code', None)
+    try:
+      return int(status) in (400, 404, 410)
+    except (TypeError, ValueError):
+      return False
+
+  @staticmethod
+  def _apply_change(folders, change):
+    file = change.get('file')
+    if change.get('removed') or not file or file.get('trashed'):
+      file_id = change.get('fileId')
+      if not file_id:
+        return
+      for files in folders.values():
+        files.pop(file_id, None)
+      folders.pop(file_id, None)
+      return
+    if not file.get('id'):
+      return
+    parents = set(file.get('parents') or [])
+    for folder_id, files in folders.items():
+      if folder_id in parents:
+        existing = files.get(file['id'], {})
+        files[file['id']] = {**existing, **{key: value for key, value in file.items() if key != 'trashed'}}
+      else:
+        files.pop(file['id'], None)
+
+  def refresh(self, force=False):
+    """Replay pending changes into the indexed folders."""
+    with self._lock:
+      if not self._folders and not self._pending:
+        return 0
+      if not force and time.monotonic() - self._last_refresh < self._refresh_interval:
+        return 0
+
+    # One replay at a time; readers keep serving the current listings meanwhile.
+    if not self._refresh_lock.acquire(blocking=force):
+      return 0
+    try:
+      with self._lock:
+        if not force and time.monotonic() - self._last_refresh < self._refresh_interval:
+          return 0
+        page_token = self._page_token
+      if page_token is None:
+        return 0
+
+      try:
+        changes, new_page_token = self._fetch_changes(page_token)
+      except Exception as e:
+        if self._is_invalid_token_error(e):
+          # An expired or invalid token cannot be resumed; rebuild lazily.
+          logger.warning(f'Drive changes token rejected, resetting folder index: {e}')
+          self.reset()
+        else:
+          logger.warning(f'Drive changes refresh failed, keeping folder index: {e}')
+          with self._lock:
+            self._last_refresh = time.monotonic()
+        return 0
+
+      with self._lock:
+        if self._page_token != page_token:
+          # Reset while the changes were fetched.
+          return 0
+        for change in changes:
+          self._apply_change(self._folders, change)
+          for buffer in self._pending:
+            buffer.append(change)
+        self._page_token = new_page_token
+        self._last_refresh = time.monotonic()
+        self._stats['refreshes'] += 1
+        self._stats['changes_applied'] += len(changes)
+        if changes:
+          logger.info(f'Applied {len(changes)} Drive changes to folder index')
+          self._save_state()
+        return len(changes)
+    finally:
+      self._refresh_lock.release()
+
+  def list_folder(self, folder_id):
+    """Return the files in folder_id, refreshing from the changes feed first."""
+    self.refresh()
+    with self._lock:
+      files = self._folders.get(folder_id)
+      if files is not None:
+        self._stats['hits'] += 1
+        return [copy.deepcopy(file) for file in files.values()]
+      self._stats['misses'] += 1
+
+    # Take the token before listing, and buffer every change replayed while the
+    # folder is listed, so nothing that happens during the listing is lost.
+    self._ensure_page_token()
+    buffer = []
+    with self._lock:
+      if not self._folders and not self._pending:
+        self._last_refresh = time.monotonic()
+      self._pending.append(buffer)
+
+    try:
+      # List outside the lock so concurrent cold listings (Drive.list_many) run in parallel.
+      listed = self._list_from_api(folder_id)
+    except BaseException:
+      with self._lock:
+        if any(pending is buffer for pending in self._pending):
+          self._pending = [pending for pending in self._pending if pending is not buffer]
+      raise
+
+    folders = {folder_id: {file['id']: file for file in listed}}
+    with self._lock:
+      if not any(pending is buffer for pending in self._pending):
+        # The index was reset during the listing; serve it without caching.
+        return [copy.deepcopy(file) for file in folders[folder_id].values()]
+      self._pending = [pending for pending in self._pending if pending is not buffer]
+      for change in buffer:
+        self._apply_change(folders, change)
+      files = self._folders.setdefault(folder_id, folders.get(folder_id, {}))
+      self._save_state()
+      return [copy.deepcopy(file) for file in files.values()]
+
+  def apply_file(self, file):
+    """Record a created, renamed or moved file in every indexed folder it now belongs to."""
+    if not file or not file.get('id'):
+      return
+    change = {'fileId': file['id'], 'removed': False, 'file': file}
+    with self._lock:
+      self._apply_change(self._folders, change)
+      for buffer in self._pending:
+        buffer.append(change)
+
+  def remove_file(self, file_id):
+    if not file_id:
+      return
+    change = {'fileId': file_id, 'removed': True}
+    with self._lock:
+      self._apply_change(self._folders, change)
+      for buffer in self._pending:
+        buffer.append(change)
+
+  def reset(self):
+    with self._lock:
+      self._folders = {}
+      self._pending = []
+      self._page_token = None
+      self._last_refresh = 0.0
+      self._stats['resets'] += 1
+      self._save_state()
+
+  def stats(self):
+    with self._lock:
+      stats = dict(self._stats)
+      stats['folders'] = len(self._folders)
+      stats['files'] = sum(len(files) for files in self._folders.values())
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+    return stats
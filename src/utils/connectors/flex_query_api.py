@@ -3,7 +3,7 @@ import requests as rq
 import xml.etree.ElementTree as ET
 import time
 import pandas as pd
-import csv
+import io
 import os
 
 from src.utils.logger import logger
@@ -26,6 +26,12 @@ def _extract_flex_error(response_text):
     except ET.ParseError:
         return 'UNKNOWN', 'Unable to parse IBKR error payload.'
 
+def _flex_error_text(response):
+    # Errors arrive as small XML documents; avoid decoding large CSV reports.
+    if not response.content[:64].lstrip().startswith(b'<'):
+        return ''
+    return response.text
+
 def _poll_flex_response(
     request_fn,
     operation_name,
@@ -54,7 +60,7 @@ def _poll_flex_response(
             time.sleep(retry_delay_seconds)
             attempt += 1
             continue
-        error_code, error_message = _extract_flex_error(response.text)
+        error_code, error_message = _extract_flex_error(_flex_error_text(response))
 
         if error_code is None:
             return response
@@ -87,7 +93,14 @@ def _poll_flex_response(
 
     raise Exception(f'{operation_name} Failed after {max_retries} attempts.')
 
-def getFlexQuery(queryId):
+def getFlexQuery(queryId, as_frame=False, typed=False):
+    """
+    Fetch a Flex Query report.
+
+    Returns a list of records by default. With as_frame=True the parsed
+    DataFrame is returned directly, which skips building the records copy;
+    typed is passed through to binaryXMLtoDF.
+    """
 
     logger.info(f'Getting Flex Query for queryId: {queryId}')
 
@@ -131,36 +144,129 @@ def getFlexQuery(queryId):
     )
 
     # If response is HTML (e.g., error page), fail gracefully
-    if generatedReportResponse.text.strip().startswith('<html'):
+    if generatedReportResponse.content[:256].lstrip().lower().startswith(b'<html'):
         logger.error('Flex Query Generation Failed. Received HTML error page from IBKR.')
         raise Exception('Flex Query Generation Failed. Received HTML error page from IBKR.')
     
     xml_data = generatedReportResponse.content
-    df = binaryXMLtoDF(xml_data)
+    df = binaryXMLtoDF(xml_data, typed=typed)
     logger.success(f"Flex Query generated")
-    return df.to_dict(orient='records')
+    return df if as_frame else df.to_dict(orient='records')
 
-def binaryXMLtoDF(binaryXMLData):
-    xml_data = binaryXMLData.decode('utf-8')
+FLEX_DTYPE_SAMPLE_ROWS = 1000
+FLEX_MARKERS = frozenset(('BOA', 'BOF', 'BOS', 'EOS', 'EOA', 'EOF', 'MSG'))
+_FLEX_NUMBER_PATTERN = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+# Identifiers such as CUSIPs are digit strings with leading zeros; keep them as text.
+_FLEX_LEADING_ZERO_PATTERN = r'[-+]?0\d'
+_FLEX_DATE_FORMATS = (
+    (r'\d{8}', '%Y%m%d'),
+    (r'\d{8};\d{6}', '%Y%m%d;%H%M%S'),
+    (r'\d{4}-\d{2}-\d{2}', '%Y-%m-%d'),
+    (r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', '%Y-%m-%d %H:%M:%S'),
+)
 
-    reader = csv.reader(xml_data.splitlines(), skipinitialspace=True)
 
-    rows = []
-    header_row = None
+class _FlexRecordReader:
+    """
+    Read-only file object over a Flex CSV payload that yields only the header
+    and data lines.
 
-    rows_count = 0
+    The payload is decoded incrementally and BOF/BOA/BOS/EOS/EOA/EOF/MSG
+    marker lines and repeated section headers are dropped as they are read,
+    so pandas parses straight from the response bytes without a decoded copy
+    of the whole report.
+    """
 
-    for row in reader:
-        rows_count += 1
-        if ('BOA' not in row) and ('BOF' not in row) and ('BOS' not in row) and ('EOS' not in row) and ('EOA' not in row) and ('EOF' not in row) and ('MSG' not in row):
-            # Capture the header row once and ignore subsequent duplicates
-            if header_row is None:
-                header_row = row
-                rows.append(row)
-            elif row == header_row:
-                continue  # Skip duplicated header rows
-            else:
-                rows.append(row)
-    
-    df = pd.DataFrame(rows[1:], columns=rows[0])
+    def __init__(self, data: bytes):
+        self._lines = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', newline='')
+        self._header = None
+        self._pending = ''
+        self.rows_read = 0
+        self.rows_skipped = 0
+
+    def _next_line(self):
+        for line in self._lines:
+            self.rows_read += 1
+            first_field = line.split(',', 1)[0].strip().strip('"')
+            if first_field in FLEX_MARKERS:
+                self.rows_skipped += 1
+                continue
+            if not line.strip():
+                continue
+            if self._header is None:
+                self._header = line.rstrip('\r\n')
+            elif line.rstrip('\r\n') == self._header:
+                self.rows_skipped += 1
+                continue
+            return line if line.endswith('\n') else line + '\n'
+        return None
+
+    def read(self, size=-1):
+        parts = [self._pending]
+        length = len(self._pending)
+        while size is None or size < 0 or length < size:
+            line = self._next_line()
+            if line is None:
+                break
+            parts.append(line)
+            length += len(line)
+        text = ''.join(parts)
+        if size is not None and 0 <= size < len(text):
+            text, self._pending = text[:size], text[size:]
+        else:
+            self._pending = ''
+        return text
+
+    def __iter__(self):
+        line = self._next_line()
+        while line is not None:
+            yield line
+            line = self._next_line()
+
+
+def _flex_date_format(present: pd.Series):
+    sample = present.head(FLEX_DTYPE_SAMPLE_ROWS)
+    for pattern, date_format in _FLEX_DATE_FORMATS:
+        if sample.str.fullmatch(pattern).all() and present.str.fullmatch(pattern).all():
+            return date_format
+    return None
+
+def _is_flex_numeric(present: pd.Series) -> bool:
+    # Check a sample first so text columns are rejected without a full scan.
+    for values in (present.head(FLEX_DTYPE_SAMPLE_ROWS), present):
+        if not values.str.fullmatch(_FLEX_NUMBER_PATTERN).all() or values.str.match(_FLEX_LEADING_ZERO_PATTERN).any():
+            return False
+    return True
+
+def _infer_flex_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert text columns to datetimes or numbers when every non-empty value fits."""
+    for column in df.columns:
+        values = df[column]
+        present = values[values != '']
+        if present.empty:
+            continue
+
+        name = str(column).lower()
+        date_format = _flex_date_format(present) if 'date' in name or 'time' in name else None
+        if date_format:
+            df[column] = pd.to_datetime(values, format=date_format, errors='coerce')
+        elif _is_flex_numeric(present):
+            df[column] = pd.to_numeric(values.where(values != ''), errors='coerce')
     return df
+
+def binaryXMLtoDF(binaryXMLData, typed=False):
+    """
+    Parse a Flex Query CSV payload into a DataFrame.
+
+    Marker rows and repeated headers are filtered while streaming. Values are
+    kept as text by default, so uploads and API responses stay identical to
+    the report; with typed=True, date/time columns become datetimes and
+    numeric columns become int or float.
+    """
+    reader = _FlexRecordReader(binaryXMLData)
+    try:
+        df = pd.read_csv(reader, dtype=str, keep_default_na=False, skipinitialspace=True)
+    except pd.errors.EmptyDataError:
+        df = pd.DataFrame()
+    logger.info(f'Parsed Flex Query: {len(df)} rows, {reader.rows_skipped} marker/header rows skipped')
+    return _infer_flex_dtypes(df) if typed else df
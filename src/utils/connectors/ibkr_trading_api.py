@@ -1,4 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import json
+import os
 import time
 
 import requests
@@ -7,6 +10,78 @@ from src.lib.ibkr_trading_api import MarketDataField
 from src.utils.connectors.ibkr_web_api import IBKRWebAPI, retry_on_connection_error
 from src.utils.exception import handle_exception
 from src.utils.logger import logger
+from src.utils.managers.rate_limit_manager import TokenBucket
+
+
+MARKET_DATA_SNAPSHOT_FIELDS = [
+    MarketDataField.SYMBOL,
+    MarketDataField.COMPANY_NAME,
+    MarketDataField.CONID_EXCHANGE,
+    MarketDataField.SECTYPE,
+    MarketDataField.TEXT,
+    MarketDataField.CONTRACT_DESCRIPTION_1,
+    MarketDataField.CONTRACT_DESCRIPTION_2,
+    MarketDataField.BID_PRICE,
+    MarketDataField.BID_SIZE,
+    MarketDataField.ASK_PRICE,
+    MarketDataField.ASK_SIZE,
+    MarketDataField.LAST_PRICE,
+    MarketDataField.CHANGE,
+    MarketDataField.CHANGE_PERCENT,
+    MarketDataField.BID_YIELD,
+    MarketDataField.ASK_YIELD,
+    MarketDataField.LAST_YIELD,
+    MarketDataField.AVG_PRICE,
+    MarketDataField.DAILY_PNL,
+    MarketDataField.FORMATTED_POSITION,
+    MarketDataField.CATEGORY,
+    MarketDataField.INDUSTRY,
+    MarketDataField.RATINGS,
+    MarketDataField.ISSUE_DATE,
+    MarketDataField.REGULAR_EXPIRY,
+    MarketDataField.LAST_TRADING_DATE,
+    MarketDataField.LISTING_EXCHANGE,
+    MarketDataField.BOND_TYPE,
+    MarketDataField.BOND_STATE_CODE,
+]
+SNAPSHOT_SYMBOL_KEY = str(MarketDataField.SYMBOL.value)
+# Bonds often have no last trade, so any one price field counts as populated.
+SNAPSHOT_PRICE_KEYS = tuple(
+    str(field.value)
+    for field in (MarketDataField.LAST_PRICE, MarketDataField.BID_PRICE, MarketDataField.ASK_PRICE)
+)
+SNAPSHOT_FIRST_POLL_SECONDS = 0.5
+SNAPSHOT_MAX_POLL_SECONDS = 3.0
+SNAPSHOT_TIMEOUT_SECONDS = float(os.getenv("IBKR_SNAPSHOT_TIMEOUT_SECONDS", "15"))
+# A chunk whose rows have symbols but no prices is only accepted this long after
+# it was primed; before that IBKR may simply not have sent the quotes yet.
+SNAPSHOT_MIN_QUOTE_WAIT_SECONDS = float(os.getenv("IBKR_SNAPSHOT_MIN_QUOTE_WAIT_SECONDS", "6"))
+SNAPSHOT_MAX_WORKERS = int(os.getenv("IBKR_SNAPSHOT_MAX_WORKERS", "4"))
+# The Client Portal API allows 10 snapshot requests per second per session.
+SNAPSHOT_BUCKET = TokenBucket(
+    rate=float(os.getenv("IBKR_SNAPSHOT_REQUESTS_PER_SECOND", "10")),
+    name="ibkr_snapshot",
+)
+
+
+def _snapshot_row_ready(row: dict) -> bool:
+    return SNAPSHOT_SYMBOL_KEY in row and any(key in row for key in SNAPSHOT_PRICE_KEYS)
+
+
+def _translate_snapshot_fields(item: dict):
+    if not isinstance(item, dict):
+        return item
+    mapped = {}
+    for key, value in item.items():
+        if isinstance(key, str) and key.isdigit():
+            try:
+                mapped[MarketDataField(int(key)).name] = value
+            except ValueError:
+                mapped[key] = value
+        else:
+            mapped[key] = value
+    return mapped
+
 
 
 class IBKRTradingAPI(IBKRWebAPI):
@@ -294,84 +369,137 @@ class IBKRTradingAPI(IBKRWebAPI):
         finally:
             self.CLIENT_ID, self.KEY_ID, self.CLIENT_PRIVATE_KEY = original_creds
 
-    @handle_exception
-    def get_market_data_snapshot(self, conids: str):
+    def _snapshot_request(self, url: str, headers: dict) -> list:
+        SNAPSHOT_BUCKET.acquire()
+        response = requests.get(url, headers=headers)
+        if response.status_code != 200:
+            logger.error(f"Error {response.status_code}: {response.text}")
+            raise Exception(f"Error {response.status_code}: {response.text}")
+        payload = response.json()
+        return payload if isinstance(payload, list) else [payload]
+
+    def _poll_snapshot_chunk(self, url: str, headers: dict, primed_at: float, deadline: float):
+        """Poll one primed chunk until its rows are populated; returns (rows, polls, ready)."""
+        delay = SNAPSHOT_FIRST_POLL_SECONDS
+        previous_keys = None
+        polls = 0
+        while True:
+            time.sleep(delay)
+            rows = self._snapshot_request(url, headers)
+            polls += 1
+            if rows and all(_snapshot_row_ready(row) for row in rows):
+                return rows, polls, True
+
+            # Instruments without a quote (untraded bonds, closed markets) never
+            # gain price fields; stop once every row has its symbol, the payload
+            # has stopped changing between polls and IBKR has had
+            # SNAPSHOT_MIN_QUOTE_WAIT_SECONDS to send the quotes.
+            keys = {row.get("conid"): frozenset(row) for row in rows}
+            has_symbols = bool(rows) and all(SNAPSHOT_SYMBOL_KEY in row for row in rows)
+            waited = time.monotonic() - primed_at >= SNAPSHOT_MIN_QUOTE_WAIT_SECONDS
+            if has_symbols and keys == previous_keys and waited:
+                return rows, polls, True
+            previous_keys = keys
+
+            delay = min(delay * 1.5, SNAPSHOT_MAX_POLL_SECONDS)
+            if time.monotonic() + delay > deadline:
+                return rows, polls, False
+
+    def _fetch_market_data_snapshots(self, conids: list, chunk_size: int, max_workers: int, timeout: float) -> list:
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be greater than zero")
+        conids = [str(conid) for conid in conids if str(conid).strip()]
+        if not conids:
+            return []
+
         try:
             original_creds = self._apply_credentials("I6413690")
-            url = f"{self.BASE_URL}/v1/api/iserver/marketdata/snapshot?conids={conids}"
-
-            desired_fields = [
-                MarketDataField.SYMBOL,
-                MarketDataField.COMPANY_NAME,
-                MarketDataField.CONID_EXCHANGE,
-                MarketDataField.SECTYPE,
-                MarketDataField.TEXT,
-                MarketDataField.CONTRACT_DESCRIPTION_1,
-                MarketDataField.CONTRACT_DESCRIPTION_2,
-                MarketDataField.BID_PRICE,
-                MarketDataField.BID_SIZE,
-                MarketDataField.ASK_PRICE,
-                MarketDataField.ASK_SIZE,
-                MarketDataField.LAST_PRICE,
-                MarketDataField.CHANGE,
-                MarketDataField.CHANGE_PERCENT,
-                MarketDataField.BID_YIELD,
-                MarketDataField.ASK_YIELD,
-                MarketDataField.LAST_YIELD,
-                MarketDataField.AVG_PRICE,
-                MarketDataField.DAILY_PNL,
-                MarketDataField.FORMATTED_POSITION,
-                MarketDataField.CATEGORY,
-                MarketDataField.INDUSTRY,
-                MarketDataField.RATINGS,
-                MarketDataField.ISSUE_DATE,
-                MarketDataField.REGULAR_EXPIRY,
-                MarketDataField.LAST_TRADING_DATE,
-                MarketDataField.LISTING_EXCHANGE,
-                MarketDataField.BOND_TYPE,
-                MarketDataField.BOND_STATE_CODE,
-            ]
-            fields_str = ",".join(str(field.value) for field in desired_fields)
             headers = self._require_sso_headers()
-
-            response = requests.get(f"{url}&fields={fields_str}", headers=headers)
-            if response.status_code != 200:
-                logger.error(f"Error {response.status_code}: {response.text}")
-                raise Exception(f"Error {response.status_code}: {response.text}")
-
-            logger.info("Waiting for market data snapshot to be ready")
-            time.sleep(10)
-            response = requests.get(url, headers=headers)
-            if response.status_code != 200:
-                logger.error(f"Error {response.status_code}: {response.text}")
-                raise Exception(f"Error {response.status_code}: {response.text}")
-
-            raw_data = response.json()
-
-            def _translate_fields(item: dict):
-                mapped = {}
-                for key, value in item.items():
-                    if isinstance(key, str) and key.isdigit():
-                        try:
-                            mapped[MarketDataField(int(key)).name] = value
-                        except ValueError:
-                            mapped[key] = value
-                    else:
-                        mapped[key] = value
-                return mapped
-
-            if isinstance(raw_data, list):
-                mapped_data = [_translate_fields(entry) for entry in raw_data]
-            elif isinstance(raw_data, dict):
-                mapped_data = _translate_fields(raw_data)
+            fields_str = ",".join(str(field.value) for field in MARKET_DATA_SNAPSHOT_FIELDS)
+            chunks = [conids[start:start + chunk_size] for start in range(0, len(conids), chunk_size)]
+            urls = [
+                f"{self.BASE_URL}/v1/api/iserver/marketdata/snapshot?conids={','.join(chunk)}"
+                for chunk in chunks
+            ]
+            started = time.monotonic()
+
+            # Prime every chunk before polling any of them so IBKR builds all the
+            # subscriptions in parallel instead of one chunk per wait.
+            primed_at = []
+            for url in urls:
+                self._snapshot_request(f"{url}&fields={fields_str}", headers)
+                primed_at.append(time.monotonic())
+
+            deadline = time.monotonic() + timeout
+            workers = max(1, min(max_workers, len(urls)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ibkr_snapshot") as executor:
+                results = list(executor.map(
+                    lambda url, url_primed_at: self._poll_snapshot_chunk(url, headers, url_primed_at, deadline),
+                    urls,
+                    primed_at,
+                ))
+
+            rows = []
+            polls = 0
+            incomplete = 0
+            for chunk_rows, chunk_polls, ready in results:
+                rows.extend(chunk_rows)
+                polls += chunk_polls
+                incomplete += 0 if ready else 1
+
+            elapsed = time.monotonic() - started
+            message = (
+                f"Market data snapshot fetched: {len(conids)} conids in {len(chunks)} chunks, "
+                f"{polls} polls, {elapsed:.1f}s"
+            )
+            if incomplete:
+                logger.warning(f"{message}; {incomplete} chunks still incomplete after {timeout}s")
             else:
-                mapped_data = raw_data
-
-            logger.success("Market data snapshot fetched successfully")
-            return mapped_data
+                logger.success(message)
+            unpriced = [str(row.get("conid")) for row in rows if not _snapshot_row_ready(row)]
+            if unpriced:
+                logger.warning(
+                    f"{len(unpriced)} of {len(rows)} snapshot rows have no Bid/Ask/Last price: "
+                    f"{','.join(unpriced[:50])}{'...' if len(unpriced) > 50 else ''}"
+                )
+            return [_translate_snapshot_fields(row) for row in rows]
         finally:
             self.CLIENT_ID, self.KEY_ID, self.CLIENT_PRIVATE_KEY = original_creds
 
+    @handle_exception
+    def get_market_data_snapshot(self, conids: str):
+        chunk = [conid for conid in conids.split(",") if conid.strip()]
+        return self._fetch_market_data_snapshots(
+            chunk,
+            chunk_size=max(1, len(chunk)),
+            max_workers=1,
+            timeout=SNAPSHOT_TIMEOUT_SECONDS,
+        )
+
+    @handle_exception
+    def get_market_data_snapshots(
+        self,
+        conids: list,
+        chunk_size: int = 75,
+        max_workers: int | None = None,
+        timeout: float | None = None,
+    ) -> list:
+        """
+        Fetch snapshots for any number of conids.
+
+        Conids are split into chunks of chunk_size. Every chunk is primed first,
+        then all chunks are polled concurrently with a growing back-off until
+        their rows carry a symbol and a price, instead of a fixed wait. All
+        requests share a token bucket so IBKR's snapshot pacing limit holds
+        across threads. Rows are returned in chunk order.
+        """
+        return self._fetch_market_data_snapshots(
+            conids,
+            chunk_size=chunk_size,
+            max_workers=max_workers or SNAPSHOT_MAX_WORKERS,
+            timeout=SNAPSHOT_TIMEOUT_SECONDS if timeout is None else timeout,
+        )
+
     @handle_exception
     def get_market_scanner_params(self) -> dict:
         try:
@@ -414,6 +542,54 @@ class IBKRTradingAPI(IBKRWebAPI):
         finally:
             self.CLIENT_ID, self.KEY_ID, self.CLIENT_PRIVATE_KEY = original_creds
 
+    def _request_historical_market_data(
+        self,
+        headers: dict,
+        conid: str,
+        period: str,
+        bar: str,
+        *,
+        start_time: str | None = None,
+        direction: int | None = None,
+        source: str = "Last",
+        exchange: str | None = None,
+        outside_rth: bool = True,
+    ) -> dict:
+        url = f"{self.BASE_URL}/v1/api/iserver/marketdata/history"
+        params = {
+            "conid": conid,
+            "period": period,
+            "bar": bar,
+            "outsideRth": outside_rth,
+            "source": source,
+        }
+        if start_time:
+            params["startTime"] = start_time
+        if direction is not None:
+            params["direction"] = direction
+        if exchange:
+            params["exchange"] = exchange
+        logger.info(
+            f"IBKR_HISTORY_REQUEST conid={conid} period={period} bar={bar} "
+            f"start_time={start_time or '-'} direction={direction or '-'}"
+        )
+        response = requests.get(url, headers=headers, params=params)
+        if response.status_code != 200:
+            logger.error(
+                f"IBKR_HISTORY_FAILED conid={conid} status={response.status_code} "
+                f"response={response.text[:500]}"
+            )
+            raise Exception(f"Error {response.status_code}: {response.text}")
+        payload = response.json()
+        if isinstance(payload, dict) and (payload.get('error') or payload.get('message')):
+            logger.warning(
+                f"IBKR_HISTORY_FAILED conid={conid} status={response.status_code} "
+                f"reason={payload.get('error') or payload.get('message')}"
+            )
+        else:
+            logger.success(f"IBKR_HISTORY_SUCCESS conid={conid}")
+        return payload
+
     @handle_exception
     def get_historical_market_data(
         self,
@@ -429,40 +605,30 @@ class IBKRTradingAPI(IBKRWebAPI):
     ) -> dict:
         try:
             original_creds = self._apply_credentials("I6413690")
-            url = f"{self.BASE_URL}/v1/api/iserver/marketdata/history"
-            params = {
-                "conid": conid,
-                "period": period,
-                "bar": bar,
-                "outsideRth": outside_rth,
-                "source": source,
-            }
-            if start_time:
-                params["startTime"] = start_time
-            if direction is not None:
-                params["direction"] = direction
-            if exchange:
-                params["exchange"] = exchange
-            logger.info(
-                f"IBKR_HISTORY_REQUEST conid={conid} period={period} bar={bar} "
-                f"start_time={start_time or '-'} direction={direction or '-'}"
+            return self._request_historical_market_data(
+                self._require_sso_headers(None),
+                conid,
+                period,
+                bar,
+                start_time=start_time,
+                direction=direction,
+                source=source,
+                exchange=exchange,
+                outside_rth=outside_rth,
             )
-            response = requests.get(url, headers=self._require_sso_headers(None), params=params)
-            if response.status_code != 200:
-                logger.error(
-                    f"IBKR_HISTORY_FAILED conid={conid} status={response.status_code} "
-                    f"response={response.text[:500]}"
-                )
-                raise Exception(f"Error {response.status_code}: {response.text}")
-            payload = response.json()
-            if isinstance(payload, dict) and (payload.get('error') or payload.get('message')):
-                logger.warning(
-                    f"IBKR_HISTORY_FAILED conid={conid} status={response.status_code} "
-                    f"reason={payload.get('error') or payload.get('message')}"
-                )
-            else:
-                logger.success(f"IBKR_HISTORY_SUCCESS conid={conid}")
-            return payload
+        finally:
+            self.CLIENT_ID, self.KEY_ID, self.CLIENT_PRIVATE_KEY = original_creds
+
+    @handle_exception
+    def get_historical_market_data_fetcher(self):
+        """
+        Return a callable with the signature of get_historical_market_data whose
+        headers are resolved once here. It never touches the client's
+        credentials, so a worker pool can call it concurrently.
+        """
+        try:
+            original_creds = self._apply_credentials("I6413690")
+            return functools.partial(self._request_historical_market_data, self._require_sso_headers(None))
         finally:
             self.CLIENT_ID, self.KEY_ID, self.CLIENT_PRIVATE_KEY = original_creds
 
@@ -594,6 +760,7 @@ for _method_name in [
     "get_all_watchlists",
     "get_watchlist_information",
     "get_market_data_snapshot",
+    "get_market_data_snapshots",
     "get_market_scanner_params",
     "run_market_scanner",
     "get_historical_market_data",
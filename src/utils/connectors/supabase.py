@@ -210,6 +210,7 @@ class Supabase:
             un_status = Column(JSONB(none_as_null=True), nullable=True)
             uk_status = Column(JSONB(none_as_null=True), nullable=True)
             ofac_results = Column(JSONB(none_as_null=True), nullable=True)
+            potential_matches = Column(JSONB(none_as_null=True), nullable=True)
 
         class Document(self.Base):
             __tablename__ = 'document'
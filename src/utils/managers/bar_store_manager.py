@@ -0,0 +1,200 @@
+from src.utils.logger import logger
+import os
+import sqlite3
+import threading
+import time
+
+
+class BarStore:
+    """Persistent store of historical price bars in a local SQLite database.
+
+    Bars are keyed by ``(conid, bar, t)`` where ``t`` is the bar timestamp in
+    epoch milliseconds, as returned by IBKR's history endpoint, so writing an
+    overlapping page simply replaces the bars it covers. ``mark_complete``
+    records when the full history window of a conid was last fetched; after
+    that callers only need to fetch the tail after the last stored bar, until
+    an adjusted overlap bar or the age of the full fetch calls for
+    ``replace_series``.
+    Each thread gets its own connection and the database runs in WAL mode, so
+    a worker pool can read and write concurrently.
+    """
+
+    def __init__(self, path: str, name: str = 'bar_store'):
+        self.name = name
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {'reads': 0, 'bars_written': 0, 'errors': 0}
+        self.enabled = self._prepare()
+
+    def _prepare(self) -> bool:
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = self._connection()
+            connection.executescript(
+                '''
+                CREATE TABLE IF NOT EXISTS bars (
+                    conid TEXT NOT NULL,
+                    bar TEXT NOT NULL,
+                    t INTEGER NOT NULL,
+                    o REAL, h REAL, l REAL, c REAL, v REAL,
+                    PRIMARY KEY (conid, bar, t)
+                );
+                CREATE TABLE IF NOT EXISTS series (
+                    conid TEXT NOT NULL,
+                    bar TEXT NOT NULL,
+                    complete_at REAL,
+                    updated_at REAL,
+                    PRIMARY KEY (conid, bar)
+                );
+                '''
+            )
+            connection.commit()
+            return True
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f'{self.name} disabled: cannot use {self.path}: {e}')
+            return False
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def series_info(self, conid: str, bar: str) -> dict:
+        """Return ``first``/``last`` stored timestamps and whether the full window was fetched."""
+        info = {'first': None, 'last': None, 'count': 0, 'complete': False, 'complete_at': None}
+        if not self.enabled:
+            return info
+        try:
+            connection = self._connection()
+            first, last, count = connection.execute(
+                'SELECT MIN(t), MAX(t), COUNT(*) FROM bars WHERE conid = ? AND bar = ?',
+                (str(conid), bar),
+            ).fetchone()
+            complete = connection.execute(
+                'SELECT complete_at FROM series WHERE conid = ? AND bar = ?',
+                (str(conid), bar),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f'{self.name} read failed for {conid}: {e}')
+            self._count('errors')
+            return info
+        complete_at = complete[0] if complete else None
+        info.update({'first': first, 'last': last, 'count': count, 'complete': bool(complete_at), 'complete_at': complete_at})
+        return info
+
+    def get_bars(self, conid: str, bar: str, since: int = None) -> list:
+        """Return stored bars for ``conid`` in time order, optionally from ``since`` (epoch ms) onwards."""
+        if not self.enabled:
+            return []
+        query = 'SELECT t, o, h, l, c, v FROM bars WHERE conid = ? AND bar = ?'
+        params = [str(conid), bar]
+        if since is not None:
+            query += ' AND t >= ?'
+            params.append(int(since))
+        try:
+            rows = self._connection().execute(query + ' ORDER BY t', params).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f'{self.name} read failed for {conid}: {e}')
+            self._count('errors')
+            return []
+        self._count('reads')
+        return [dict(zip(('t', 'o', 'h', 'l', 'c', 'v'), row)) for row in rows]
+
+    def tail_bars(self, conid: str, bar: str, count: int) -> list:
+        """Return the last ``count`` stored bars for ``conid`` in time order."""
+        if not self.enabled:
+            return []
+        try:
+            rows = self._connection().execute(
+                'SELECT t, o, h, l, c, v FROM bars WHERE conid = ? AND bar = ? ORDER BY t DESC LIMIT ?',
+                (str(conid), bar, int(count)),
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f'{self.name} read failed for {conid}: {e}')
+            self._count('errors')
+            return []
+        self._count('reads')
+        return [dict(zip(('t', 'o', 'h', 'l', 'c', 'v'), row)) for row in reversed(rows)]
+
+    @staticmethod
+    def _rows(conid: str, bar: str, bars: list) -> list:
+        rows = []
+        for item in bars or []:
+            if not isinstance(item, dict):
+                continue
+            try:
+                timestamp = int(item.get('t'))
+            except (TypeError, ValueError):
+                continue
+            rows.append((
+                str(conid), bar, timestamp,
+                item.get('o'), item.get('h'), item.get('l'), item.get('c'), item.get('v'),
+            ))
+        return rows
+
+    def _write(self, conid: str, bar: str, bars: list, replace: bool) -> int:
+        if not self.enabled:
+            return 0
+        rows = self._rows(conid, bar, bars)
+        if replace and not rows:
+            # Never drop a series for an empty response.
+            return 0
+        try:
+            connection = self._connection()
+            with connection:
+                if replace:
+                    connection.execute('DELETE FROM bars WHERE conid = ? AND bar = ?', (str(conid), bar))
+                connection.executemany(
+                    'INSERT OR REPLACE INTO bars (conid, bar, t, o, h, l, c, v) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    rows,
+                )
+                connection.execute(
+                    'INSERT INTO series (conid, bar, updated_at) VALUES (?, ?, ?) '
+                    'ON CONFLICT (conid, bar) DO UPDATE SET updated_at = excluded.updated_at',
+                    (str(conid), bar, time.time()),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f'{self.name} write failed for {conid}: {e}')
+            self._count('errors')
+            return 0
+        self._count('bars_written', len(rows))
+        return len(rows)
+
+    def put_bars(self, conid: str, bar: str, bars: list) -> int:
+        """Insert or replace bars; entries without a numeric ``t`` are skipped. Returns the number written."""
+        return self._write(conid, bar, bars, replace=False)
+
+    def replace_series(self, conid: str, bar: str, bars: list) -> int:
+        """Atomically replace every stored bar of ``conid`` with ``bars``; a no-op when ``bars`` is empty."""
+        return self._write(conid, bar, bars, replace=True)
+
+    def mark_complete(self, conid: str, bar: str):
+        if not self.enabled:
+            return
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute(
+                    'INSERT INTO series (conid, bar, complete_at, updated_at) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (conid, bar) DO UPDATE SET complete_at = excluded.complete_at',
+                    (str(conid), bar, time.time(), time.time()),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f'{self.name} write failed for {conid}: {e}')
+            self._count('errors')
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['path'] = self.path
+        stats['enabled'] = self.enabled
+        return stats
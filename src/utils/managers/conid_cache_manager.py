@@ -0,0 +1,108 @@
+from src.utils.logger import logger
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class ConidCache:
+    """Persistent symbol to conid cache with expiry and negative entries.
+
+    Entries are keyed by ``(sec_type, symbol)``. A resolved symbol is kept for
+    ``ttl_seconds``; a symbol IBKR could not resolve is kept as a negative
+    entry (``conid`` is None, with the failure reason) for the shorter
+    ``negative_ttl_seconds`` so a delisted or mistyped ticker is not searched
+    on every run but a new listing is picked up soon. Entries are held in
+    memory and written to ``path`` as JSON by ``save``, atomically, so callers
+    can batch a whole resolution pass into a single write.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, negative_ttl_seconds: float, name: str = 'conid_cache'):
+        self.name = name
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries = {}
+        # Changes since the last successful save.
+        self._unsaved_changes = 0
+        self._stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'expired': 0, 'writes': 0}
+        self._load()
+
+    def _key(self, sec_type: str, symbol: str) -> str:
+        return f'{str(sec_type).upper()}:{str(symbol).strip().upper()}'
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self._entries = json.load(f).get('entries') or {}
+            logger.info(f'Loaded {self.name} with {len(self._entries)} entries')
+        except Exception as e:
+            logger.warning(f'Ignoring unreadable {self.name} at {self.path}: {e}')
+            self._entries = {}
+
+    def get(self, sec_type: str, symbol: str) -> dict | None:
+        """Return ``{'conid', 'reason', 'cached_at'}`` for a live entry, or None on a miss."""
+        key = self._key(sec_type, symbol)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            ttl = self.ttl_seconds if entry.get('conid') else self.negative_ttl_seconds
+            if time.time() - entry.get('cached_at', 0) > ttl:
+                del self._entries[key]
+                self._unsaved_changes += 1
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._stats['hits' if entry.get('conid') else 'negative_hits'] += 1
+            return dict(entry)
+
+    def put(self, sec_type: str, symbol: str, conid: str):
+        with self._lock:
+            self._entries[self._key(sec_type, symbol)] = {'conid': str(conid), 'reason': None, 'cached_at': time.time()}
+            self._unsaved_changes += 1
+            self._stats['writes'] += 1
+
+    def put_negative(self, sec_type: str, symbol: str, reason: str):
+        with self._lock:
+            self._entries[self._key(sec_type, symbol)] = {'conid': None, 'reason': reason, 'cached_at': time.time()}
+            self._unsaved_changes += 1
+            self._stats['writes'] += 1
+
+    def save(self):
+        with self._save_lock:
+            with self._lock:
+                if not self._unsaved_changes or not self.path:
+                    return
+                state = {'saved_at': time.time(), 'entries': dict(self._entries)}
+                saved_changes = self._unsaved_changes
+            tmp_path = None
+            try:
+                directory = os.path.dirname(self.path) or '.'
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp')
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.warning(f'Could not persist {self.name}: {e}')
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return
+            # Changes made while writing stay pending for the next save.
+            with self._lock:
+                self._unsaved_changes -= saved_changes
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['negative_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['negative_hits']) / lookups, 4) if lookups else None
+        return stats
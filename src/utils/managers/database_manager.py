@@ -6,11 +6,19 @@ from datetime import datetime
 from functools import wraps
 from flask import jsonify
 from src.utils.logger import logger
+from src.utils.managers.query_metrics_manager import QueryMetrics
 from src.utils.exception import ServiceError, handle_exception
 import re
 import os
+import copy
+from collections import OrderedDict
+import json
+import base64
+import time
+import threading
 import uuid
-from sqlalchemy import inspect
+from sqlalchemy import inspect, and_, select, tuple_, bindparam, literal_column, UniqueConstraint
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 class DatabaseManager:
     
@@ -26,6 +34,37 @@ class DatabaseManager:
         self.engine = engine
         self.base = base
         self.engine_factory = engine_factory
+
+        self.query_metrics = QueryMetrics()
+        self.query_metrics.install(self.engine)
+
+        # Read-through cache for small, rarely-changing tables. Only tables in
+        # DB_READ_CACHE_TABLES are cached; writes through this manager
+        # invalidate the table in-process, the TTL bounds staleness from
+        # writes made elsewhere.
+        self._read_cache_lock = threading.Lock()
+        self._read_cache = OrderedDict()
+        self._read_cache_generations = {}
+        self._read_cache_ttl = int(os.getenv('DB_READ_CACHE_TTL_SECONDS', '300'))
+        self._read_cache_max_entries = int(os.getenv('DB_READ_CACHE_MAX_ENTRIES', '512'))
+        self._read_cache_tables = {
+            name.strip()
+            for name in os.getenv(
+                'DB_READ_CACHE_TABLES',
+                'advisor,user,document_review_responsible,fee_template_request',
+            ).split(',')
+            if name.strip()
+        }
+        self._read_cache_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'invalidations': 0, 'evictions': 0}
+
+        # Reflected tables are loaded once and shared by every request thread.
+        # Building ``Table(..., autoload_with=engine)`` per call re-runs catalog
+        # introspection against the pooler before the real query.
+        self._table_cache_lock = threading.RLock()
+        self._table_reload_lock = threading.Lock()
+        self._table_cache_ttl = int(os.getenv('DB_TABLE_CACHE_TTL_SECONDS', '3600'))
+        self._table_cache_loaded_at = None
+        self._table_cache_stats = {'hits': 0, 'misses': 0, 'reloads': 0, 'invalidations': 0}
         
         # First get all tables from the database
         inspector = inspect(self.engine)
@@ -64,9 +103,158 @@ class DatabaseManager:
             raise Exception(f'Error creating tables: {str(e)}')
 
         self.metadata = MetaData()
-        self.metadata.reflect(bind=self.engine)
+        self._load_table_registry()
         logger.success(f'Database initialized')
 
+    def _load_table_registry(self):
+        """Reflect every table into a fresh MetaData and swap it in atomically."""
+        metadata = MetaData()
+        metadata.reflect(bind=self.engine)
+        with self._table_cache_lock:
+            self.metadata = metadata
+            self._table_cache_loaded_at = time.monotonic()
+            self._table_cache_stats['reloads'] += 1
+        logger.info(f'Reflected {len(metadata.tables)} tables into the table registry')
+
+    def _table_registry_expired(self) -> bool:
+        if self._table_cache_loaded_at is None:
+            return True
+        if self._table_cache_ttl <= 0:
+            return False
+        return (time.monotonic() - self._table_cache_loaded_at) > self._table_cache_ttl
+
+    def get_table(self, table: str) -> Table:
+        """Return the reflected ``Table`` for ``table`` from the shared registry.
+
+        The registry is reloaded when ``DB_TABLE_CACHE_TTL_SECONDS`` elapses
+        (``0`` disables expiry). Tables created after startup are reflected on
+        first use and kept for subsequent calls.
+        """
+        if self._table_registry_expired():
+            # Only one thread reloads; the others keep using the current registry.
+            if self._table_reload_lock.acquire(blocking=False):
+                try:
+                    if self._table_registry_expired():
+                        self._load_table_registry()
+                except Exception as e:
+                    logger.warning(f'Table registry reload failed, serving cached schema: {e}')
+                finally:
+                    self._table_reload_lock.release()
+
+        with self._table_cache_lock:
+            tbl = self.metadata.tables.get(table)
+            if tbl is not None:
+                self._table_cache_stats['hits'] += 1
+                return tbl
+
+            self._table_cache_stats['misses'] += 1
+            logger.info(f'Table registry miss for table: {table}. Reflecting from database.')
+            return Table(table, self.metadata, autoload_with=self.engine)
+
+    def invalidate_table_cache(self, table: str = None):
+        """Drop one reflected table, or reload the whole registry when no table is given."""
+        if table is None:
+            self._load_table_registry()
+        else:
+            with self._table_cache_lock:
+                tbl = self.metadata.tables.get(table)
+                if tbl is not None:
+                    self.metadata.remove(tbl)
+        with self._table_cache_lock:
+            self._table_cache_stats['invalidations'] += 1
+        logger.info(f"Invalidated table registry for: {table or 'all tables'}")
+
+    def get_table_cache_stats(self) -> dict:
+        with self._table_cache_lock:
+            stats = dict(self._table_cache_stats)
+            stats['tables'] = len(self.metadata.tables)
+            stats['ttl_seconds'] = self._table_cache_ttl
+            stats['age_seconds'] = (
+                round(time.monotonic() - self._table_cache_loaded_at, 2)
+                if self._table_cache_loaded_at is not None
+                else None
+            )
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+        return stats
+
+    def _read_cache_enabled(self, table: str) -> bool:
+        return self._read_cache_ttl > 0 and table in self._read_cache_tables
+
+    def _normalize_cache_value(self, value):
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return ('in', tuple(sorted(str(item) for item in value)))
+        if isinstance(value, dict):
+            return ('spec', tuple(sorted((str(k), self._normalize_cache_value(v)) for k, v in value.items())))
+        return ('eq', None if value is None else str(value))
+
+    def _read_cache_key(self, table: str, query: dict, exclude_columns: list, columns: list, order_by, limit: int) -> tuple:
+        return (
+            table,
+            tuple(sorted((str(key), self._normalize_cache_value(value)) for key, value in (query or {}).items())),
+            tuple(sorted(exclude_columns or [])),
+            tuple(columns or []),
+            tuple([order_by] if isinstance(order_by, str) else order_by or []),
+            limit,
+        )
+
+    def _read_cache_get(self, key: tuple):
+        with self._read_cache_lock:
+            entry = self._read_cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._read_cache.move_to_end(key)
+                self._read_cache_stats['hits'] += 1
+                return copy.deepcopy(entry[1])
+            if entry is not None:
+                del self._read_cache[key]
+            self._read_cache_stats['misses'] += 1
+            return None
+
+    def _read_cache_put(self, key: tuple, generation: int, rows: list):
+        table = key[0]
+        with self._read_cache_lock:
+            # A write that landed while this read was running makes the rows stale.
+            if self._read_cache_generations.get(table, 0) != generation:
+                return
+            self._read_cache[key] = (time.monotonic() + self._read_cache_ttl, copy.deepcopy(rows))
+            self._read_cache.move_to_end(key)
+            self._read_cache_stats['stores'] += 1
+            while len(self._read_cache) > self._read_cache_max_entries:
+                self._read_cache.popitem(last=False)
+                self._read_cache_stats['evictions'] += 1
+
+    def invalidate_read_cache(self, table: str = None):
+        """Drop cached reads for ``table``, or for every table when none is given."""
+        if table is not None and table not in self._read_cache_tables:
+            return
+        with self._read_cache_lock:
+            tables = [table] if table else list({key[0] for key in self._read_cache} | set(self._read_cache_generations))
+            for name in tables:
+                self._read_cache_generations[name] = self._read_cache_generations.get(name, 0) + 1
+            for key in [key for key in self._read_cache if table is None or key[0] == table]:
+                del self._read_cache[key]
+            self._read_cache_stats['invalidations'] += 1
+
+    def get_read_cache_stats(self) -> dict:
+        with self._read_cache_lock:
+            stats = dict(self._read_cache_stats)
+            stats['entries'] = len(self._read_cache)
+        stats['tables'] = sorted(self._read_cache_tables)
+        stats['ttl_seconds'] = self._read_cache_ttl
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+        return stats
+
+    def get_query_metrics(self, reset: bool = False) -> dict:
+        """Return the query latency histogram, per-component stats and registry stats."""
+        metrics = self.query_metrics.snapshot()
+        metrics['pool_status'] = self._pool_status()
+        metrics['table_cache'] = self.get_table_cache_stats()
+        metrics['read_cache'] = self.get_read_cache_stats()
+        if reset:
+            self.query_metrics.reset()
+        return metrics
+
     def _pool_status(self) -> str:
         try:
             return self.engine.pool.status()
@@ -359,7 +547,7 @@ class DatabaseManager:
             # worker. The reflected table is authoritative and supports the
             # same insert operation, including server/default values.
             if not model:
-                tbl = Table(table, self.metadata, autoload_with=self.engine)
+                tbl = self.get_table(table)
                 if 'id' in tbl.c and not data.get('id'):
                     data['id'] = uuid.uuid4()
                 result = session.execute(tbl.insert().values(**data))
@@ -380,7 +568,9 @@ class DatabaseManager:
             logger.success(f'Successfully created entry with id: {new_record.id}')
             return str(new_record.id)
 
-        return _create(table, data)
+        result = _create(table, data)
+        self.invalidate_read_cache(table)
+        return result
 
     def create_many(self, table: str, data: list[dict] = None, batch_size: int = 500) -> int:
         @self.with_session
@@ -390,7 +580,7 @@ class DatabaseManager:
             if not data or not isinstance(data, list):
                 raise Exception("Data to create must be provided as a non-empty list.")
 
-            tbl = Table(table, self.metadata, autoload_with=self.engine)
+            tbl = self.get_table(table)
             current_time = datetime.now().strftime('%Y%m%d%H%M%S')
             prepared_rows = []
 
@@ -417,62 +607,565 @@ class DatabaseManager:
             logger.success(f'Successfully created {inserted} entries in table: {table}')
             return inserted
 
-        return _create_many(table, data, batch_size)
+        result = _create_many(table, data, batch_size)
+        self.invalidate_read_cache(table)
+        return result
+
+    # Operators accepted in a read query spec, e.g. {'created': {'gte': '20250101000000'}}.
+    READ_OPERATORS = {
+        'eq': lambda column, value: column == value,
+        'ne': lambda column, value: column != value,
+        'in': lambda column, value: column.in_(list(value)),
+        'gt': lambda column, value: column > value,
+        'gte': lambda column, value: column >= value,
+        'lt': lambda column, value: column < value,
+        'lte': lambda column, value: column <= value,
+        'is_null': lambda column, value: column.is_(None) if value else column.is_not(None),
+    }
+
+    def _check_unsafe_read(self, table: str, query: dict, exclude_columns: list = None, columns: list = None):
+        # The document.data column contains base64 file bodies. An unfiltered
+        # read can exhaust the API instance before the database timeout fires.
+        reads_data = 'data' in columns if columns else 'data' not in (exclude_columns or [])
+        if table == 'document' and not query and reads_data:
+            raise ServiceError(
+                "Blocked unsafe database read: document.data cannot be read without "
+                "a filter. Provide a document id query or exclude the data column.",
+                status_code=500,
+            )
+
+    def _build_read_query(self, session, tbl: Table, query: dict = None, exclude_columns: list = None, columns: list = None):
+        if columns:
+            unknown = [name for name in columns if name not in tbl.c]
+            if unknown:
+                raise Exception(f"Unknown columns for table {tbl.name}: {unknown}")
+            selected_columns = [tbl.c[name] for name in columns if name not in (exclude_columns or [])]
+        elif exclude_columns:
+            selected_columns = [col for col in tbl.c if col.name not in exclude_columns]
+        else:
+            selected_columns = None
+
+        if selected_columns is None:
+            sql_query = session.query(tbl)
+        elif not selected_columns:
+            raise Exception("All columns excluded; at least one column must be selected")
+        else:
+            sql_query = session.query(*selected_columns)
+
+        if query:
+            for key, value in query.items():
+                if hasattr(tbl.c, key):
+                    sql_query = sql_query.filter(self._filter_clause(getattr(tbl.c, key), value))
+        return sql_query
+
+    def _filter_clause(self, column, value):
+        """Compile one query value into a SQL predicate.
+
+        Scalars compare for equality and collections become ``IN``. A dict
+        whose keys are all in ``READ_OPERATORS`` is an operator spec; the
+        predicates are ANDed, so ``{'gte': a, 'lt': b}`` is a half-open range.
+        """
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return column.in_(list(value))
+        if isinstance(value, dict) and value and set(value) <= set(self.READ_OPERATORS):
+            return and_(*(self.READ_OPERATORS[op](column, operand) for op, operand in value.items()))
+        return column == value
+
+    def _apply_order_and_limit(self, sql_query, tbl: Table, order_by=None, limit: int = None):
+        """Apply ``order_by`` (a column name or list; prefix ``-`` for descending) and ``limit``."""
+        if order_by:
+            for name in ([order_by] if isinstance(order_by, str) else order_by):
+                descending = name.startswith('-')
+                name = name.lstrip('-')
+                if name not in tbl.c:
+                    raise Exception(f"Cannot order table {tbl.name} by unknown column: {name}")
+                sql_query = sql_query.order_by(tbl.c[name].desc() if descending else tbl.c[name].asc())
+        if limit is not None:
+            if limit <= 0:
+                raise Exception("limit must be a positive integer.")
+            sql_query = sql_query.limit(limit)
+        return sql_query
+
+    def _serialize_row(self, row) -> dict:
+        result = row._asdict()
+        self._ids_to_string(result)
+        self._none_to_null(result)
+        return result
+
+    def _has_unique_key(self, tbl: Table, columns: list) -> bool:
+        """True when ``columns`` exactly match the primary key or a unique constraint/index."""
+        wanted = set(columns)
+        if wanted == {col.name for col in tbl.primary_key.columns}:
+            return True
+        for constraint in tbl.constraints:
+            if isinstance(constraint, UniqueConstraint) and wanted == {col.name for col in constraint.columns}:
+                return True
+        for index in tbl.indexes:
+            if index.unique and wanted == {col.name for col in index.columns}:
+                return True
+        return False
+
+    def upsert_many(
+        self,
+        table: str,
+        rows: list[dict] = None,
+        conflict_columns: list = None,
+        update_columns: list = None,
+        batch_size: int = 500,
+    ) -> dict:
+        """Insert ``rows`` or update the existing rows that share ``conflict_columns``.
+
+        When ``conflict_columns`` match a primary key or unique constraint the
+        batch is sent as one multi-row ``INSERT ... ON CONFLICT DO UPDATE``.
+        Tables without such a constraint fall back to one lookup, one
+        executemany ``UPDATE`` and one bulk ``INSERT`` per batch. ``update_columns``
+        defaults to every supplied column except the conflict columns, ``id``
+        and ``created``; ``updated`` is always refreshed. Row keys and
+        ``update_columns`` that are not columns of ``table`` raise.
+
+        Returns totals plus per-batch ``rows``/``inserted``/``updated``/``elapsed_ms``
+        and the affected ``ids`` in input order.
+        """
+        @self.with_session
+        def _upsert_many(session, table: str, rows: list[dict], conflict_columns: list, update_columns: list, batch_size: int):
+            logger.info(f'Attempting to upsert {len(rows or [])} entries in table: {table}')
+
+            if not rows or not isinstance(rows, list):
+                raise Exception("Rows to upsert must be provided as a non-empty list.")
+            if not conflict_columns:
+                raise Exception("conflict_columns must be provided.")
+            if batch_size <= 0:
+                raise Exception("batch_size must be a positive integer.")
+
+            tbl = self.get_table(table)
+            unknown = [name for name in conflict_columns if name not in tbl.c]
+            if unknown:
+                raise Exception(f"Unknown conflict columns for table {table}: {unknown}")
+            unknown = [name for name in (update_columns or []) if name not in tbl.c]
+            if unknown:
+                raise Exception(f"Unknown update columns for table {table}: {unknown}")
+
+            current_time = datetime.now().strftime('%Y%m%d%H%M%S')
+            prepared_rows = []
+            for item in rows:
+                if not isinstance(item, dict):
+                    raise Exception("Each row to upsert must be a dictionary.")
+                missing = [name for name in conflict_columns if name not in item]
+                if missing:
+                    raise Exception(f"Row is missing conflict columns: {missing}")
+                unknown = [key for key in item if key not in tbl.c]
+                if unknown:
+                    raise Exception(f"Unknown columns for table {table}: {unknown}")
+                normalized = dict(item)
+                if 'id' in tbl.c and not normalized.get('id'):
+                    normalized['id'] = uuid.uuid4()
+                normalized = self._dates_to_timestamp(normalized)
+                normalized = self._ids_to_string(normalized)
+                normalized = self._none_to_null(normalized)
+                prepared_rows.append({'created': current_time, 'updated': current_time, **normalized})
+
+            use_on_conflict = (
+                self.engine.dialect.name == 'postgresql'
+                and self._has_unique_key(tbl, conflict_columns)
+            )
+            if not use_on_conflict:
+                logger.info(
+                    f'No unique key on {table}({", ".join(conflict_columns)}); '
+                    f'using batched lookup + update/insert instead of ON CONFLICT'
+                )
+
+            # A statement may touch each key once, so the last row for a key wins.
+            key_of = lambda row: tuple(str(row.get(name)) for name in conflict_columns)
+            last_position_by_key = {key_of(row): position for position, row in enumerate(prepared_rows)}
+
+            # Multi-row VALUES needs the same keys in every row, so group by shape.
+            groups = {}
+            for position in sorted(last_position_by_key.values()):
+                row = prepared_rows[position]
+                groups.setdefault(tuple(sorted(row)), []).append((position, row))
+
+            ids = [None] * len(prepared_rows)
+            batches = []
+            started = time.perf_counter()
+            for keys, group in groups.items():
+                columns_to_update = [
+                    name for name in (update_columns or keys)
+                    if name in keys and name not in conflict_columns and name not in ('id', 'created')
+                ]
+                if 'updated' not in columns_to_update:
+                    columns_to_update.append('updated')
+
+                for i in range(0, len(group), batch_size):
+                    chunk = group[i:i + batch_size]
+                    batch_started = time.perf_counter()
+                    if use_on_conflict:
+                        inserted, updated = self._upsert_batch_on_conflict(
+                            session, tbl, chunk, conflict_columns, columns_to_update, ids
+                        )
+                    else:
+                        inserted, updated = self._upsert_batch_fallback(
+                            session, tbl, chunk, conflict_columns, columns_to_update, ids
+                        )
+                    batches.append({
+                        'batch': len(batches) + 1,
+                        'rows': len(chunk),
+                        'inserted': inserted,
+                        'updated': updated,
+                        'elapsed_ms': round((time.perf_counter() - batch_started) * 1000, 2),
+                    })
+
+            for position, row in enumerate(prepared_rows):
+                ids[position] = ids[last_position_by_key[key_of(row)]]
+
+            session.flush()
+            result = {
+                'table': table,
+                'rows': len(prepared_rows),
+                'inserted': sum(batch['inserted'] for batch in batches),
+                'updated': sum(batch['updated'] for batch in batches),
+                'on_conflict': use_on_conflict,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+                'batches': batches,
+                'ids': ids,
+            }
+            logger.success(
+                f"Successfully upserted {result['rows']} entries in table: {table} "
+                f"(inserted={result['inserted']}, updated={result['updated']}, "
+                f"batches={len(batches)}, elapsed_ms={result['elapsed_ms']})"
+            )
+            return result
+
+        result = _upsert_many(table, rows, conflict_columns, update_columns, batch_size)
+        self.invalidate_read_cache(table)
+        return result
+
+    def _upsert_batch_on_conflict(self, session, tbl: Table, chunk: list, conflict_columns: list, update_columns: list, ids: list):
+        stmt = pg_insert(tbl).values([row for _, row in chunk])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[tbl.c[name] for name in conflict_columns],
+            set_={name: stmt.excluded[name] for name in update_columns},
+        )
+        returning = [literal_column('(xmax = 0)').label('inserted')]
+        returning += [tbl.c[name].label(f'_key_{index}') for index, name in enumerate(conflict_columns)]
+        if 'id' in tbl.c:
+            returning.insert(0, tbl.c.id)
+        returned = session.execute(stmt.returning(*returning)).all()
+
+        # RETURNING order is not guaranteed, so map rows back by conflict key.
+        key_of = lambda values: tuple(str(value) for value in values)
+        position_by_key = {key_of(row[name] for name in conflict_columns): position for position, row in chunk}
+        inserted = 0
+        for row in returned:
+            if 'id' in tbl.c:
+                key = key_of(getattr(row, f'_key_{index}') for index in range(len(conflict_columns)))
+                if key not in position_by_key:
+                    raise Exception(f'Upserted row with unexpected key {key} in table: {tbl.name}')
+                ids[position_by_key[key]] = str(row.id)
+            inserted += 1 if row.inserted else 0
+        return inserted, len(returned) - inserted
+
+    def _upsert_batch_fallback(self, session, tbl: Table, chunk: list, conflict_columns: list, update_columns: list, ids: list):
+        key_columns = [tbl.c[name] for name in conflict_columns]
+        key_of = lambda row: tuple(str(row.get(name)) for name in conflict_columns)
+
+        select_columns = key_columns + ([tbl.c.id] if 'id' in tbl.c else [])
+        existing = {}
+        lookup = session.execute(
+            select(*select_columns).where(tuple_(*key_columns).in_([tuple(row[name] for name in conflict_columns) for _, row in chunk]))
+        )
+        for found in lookup:
+            found = found._asdict()
+            existing.setdefault(key_of(found), str(found.get('id')) if 'id' in found else None)
+
+        to_update = []
+        to_insert = []
+        for position, row in chunk:
+            key = key_of(row)
+            if key in existing:
+                ids[position] = existing[key]
+                to_update.append(row)
+            else:
+                ids[position] = str(row['id']) if 'id' in row else None
+                to_insert.append(row)
+
+        if to_insert:
+            session.execute(tbl.insert(), to_insert)
+        if to_update:
+            self._execute_update_batch(
+                session,
+                tbl,
+                conflict_columns,
+                update_columns,
+                [
+                    ({name: row[name] for name in conflict_columns}, {name: row.get(name) for name in update_columns})
+                    for row in to_update
+                ],
+            )
+        return len(to_insert), len(to_update)
+
+    def _execute_update_batch(self, session, tbl: Table, key_columns: list, change_columns: list, updates: list) -> int | None:
+        """Run one executemany ``UPDATE`` for ``(key, changes)`` pairs sharing the same column sets."""
+        stmt = tbl.update().where(
+            and_(*(tbl.c[name] == bindparam(f'_key_{name}') for name in key_columns))
+        ).values({name: bindparam(f'_set_{name}') for name in change_columns})
+        result = session.execute(stmt, [
+            {
+                **{f'_key_{name}': key[name] for name in key_columns},
+                **{f'_set_{name}': changes.get(name) for name in change_columns},
+            }
+            for key, changes in updates
+        ])
+        return result.rowcount if result.rowcount is not None and result.rowcount >= 0 else None
+
+    def update_many(self, table: str, updates: list = None, batch_size: int = 500) -> dict:
+        """Apply many ``(key, changes)`` updates in a single transaction.
+
+        ``key`` is an equality filter such as ``{'id': ...}`` and ``changes``
+        the columns to set. Pairs with the same key columns and change columns
+        are sent together as executemany batches, and ``updated`` is refreshed on
+        every row. The transaction is retried on connection errors like any
+        other ``with_session`` operation; keys that match no row are not an error
+        and show up as a lower ``matched`` count.
+        """
+        @self.with_session
+        def _update_many(session, table: str, updates: list, batch_size: int):
+            logger.info(f'Attempting to update {len(updates or [])} entries in table: {table}')
+
+            if not updates or not isinstance(updates, list):
+                raise Exception("Updates must be provided as a non-empty list of (key, changes) pairs.")
+            if batch_size <= 0:
+                raise Exception("batch_size must be a positive integer.")
+
+            tbl = self.get_table(table)
+            current_time = datetime.now().strftime('%Y%m%d%H%M%S')
+
+            groups = {}
+            for item in updates:
+                if not isinstance(item, (tuple, list)) or len(item) != 2:
+                    raise Exception("Each update must be a (key, changes) pair.")
+                key, changes = item
+                if not isinstance(key, dict) or not key:
+                    raise Exception("Each update key must be a non-empty dictionary.")
+                if not isinstance(changes, dict):
+                    raise Exception("Each update's changes must be a dictionary.")
+                unknown = [name for name in [*key, *changes] if name not in tbl.c]
+                if unknown:
+                    raise Exception(f"Unknown columns for table {table}: {unknown}")
+
+                changes = self._dates_to_timestamp({**changes, 'updated': current_time})
+                group_key = (tuple(sorted(key)), tuple(sorted(changes)))
+                groups.setdefault(group_key, []).append((key, changes))
+
+            batches = []
+            matched = 0
+            started = time.perf_counter()
+            for (key_columns, change_columns), group in groups.items():
+                for i in range(0, len(group), batch_size):
+                    chunk = group[i:i + batch_size]
+                    batch_started = time.perf_counter()
+                    rowcount = self._execute_update_batch(session, tbl, list(key_columns), list(change_columns), chunk)
+                    if matched is not None:
+                        matched = matched + rowcount if rowcount is not None else None
+                    batches.append({
+                        'batch': len(batches) + 1,
+                        'rows': len(chunk),
+                        'columns': list(change_columns),
+                        'matched': rowcount,
+                        'elapsed_ms': round((time.perf_counter() - batch_started) * 1000, 2),
+                    })
 
-    def read(self, table: str, query: dict = None, exclude_columns: list = None) -> list:
+            session.flush()
+            result = {
+                'table': table,
+                'rows': len(updates),
+                'matched': matched,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+                'batches': batches,
+            }
+            logger.success(
+                f"Successfully updated {len(updates)} entries in table: {table} "
+                f"(matched={matched}, batches={len(batches)}, elapsed_ms={result['elapsed_ms']})"
+            )
+            return result
+
+        result = _update_many(table, updates, batch_size)
+        self.invalidate_read_cache(table)
+        return result
+
+    def read(
+        self,
+        table: str,
+        query: dict = None,
+        exclude_columns: list = None,
+        columns: list = None,
+        order_by=None,
+        limit: int = None,
+        use_cache: bool = True,
+    ) -> list:
+        """Read rows from ``table``.
+
+        ``query`` maps column names to a scalar (equality), a collection
+        (``IN``) or an operator spec such as ``{'gte': x}``, ``{'lt': y}`` or
+        ``{'is_null': True}``. ``columns`` projects only the named columns,
+        ``order_by`` takes a column name or list (``-name`` sorts descending)
+        and ``limit`` caps the number of rows returned.
+
+        Reads of tables listed in ``DB_READ_CACHE_TABLES`` are served from the
+        read-through cache unless ``use_cache`` is False.
+        """
         @self.with_session(commit=False)
-        def _read(session, table: str, query: dict = None, exclude_columns: list = None):
+        def _read(session, table: str, query: dict, exclude_columns: list, columns: list, order_by, limit: int):
 
             logger.info(f'Attempting to read entry from table: {table}')
 
             if query is None:
                 raise Exception("Query must be provided.")
 
-            # The document.data column contains base64 file bodies. An unfiltered
-            # read can exhaust the API instance before the database timeout fires.
-            if table == 'document' and not query and 'data' not in (exclude_columns or []):
-                raise ServiceError(
-                    "Blocked unsafe database read: document.data cannot be read without "
-                    "a filter. Provide a document id query or exclude the data column.",
-                    status_code=500,
-                )
-            
-            tbl = Table(table, self.metadata, autoload_with=self.engine)
-            sql_query = session.query(tbl)
+            self._check_unsafe_read(table, query, exclude_columns, columns)
 
-            if exclude_columns:
-                selected_columns = [col for col in tbl.c if col.name not in exclude_columns]
-                if not selected_columns:
-                    raise Exception("All columns excluded; at least one column must be selected")
-                sql_query = session.query(*selected_columns)
-            else:
-                sql_query = session.query(tbl)
+            tbl = self.get_table(table)
+            sql_query = self._build_read_query(session, tbl, query, exclude_columns, columns)
+            sql_query = self._apply_order_and_limit(sql_query, tbl, order_by, limit)
 
-            if query:
-                for key, value in query.items():
-                    if hasattr(tbl.c, key):
-                        column = getattr(tbl.c, key)
-                        if isinstance(value, (list, tuple, set, frozenset)):
-                            sql_query = sql_query.filter(column.in_(list(value)))
-                        else:
-                            sql_query = sql_query.filter(column == value)
-                
-            compiled_query = sql_query.statement.compile(
-                compile_kwargs={"literal_binds": True},
-                dialect=self.engine.dialect
-            )
-            
             results = sql_query.all()
 
-            serialized_results = [row._asdict() for row in results]
-
-            for result in serialized_results:
-                self._ids_to_string(result)
-                self._none_to_null(result)
+            serialized_results = [self._serialize_row(row) for row in results]
             logger.success(f'Successfully read {len(serialized_results)} entries from table: {table}')
             return serialized_results
 
-        return _read(table, query, exclude_columns)
+        if not use_cache or query is None or not self._read_cache_enabled(table):
+            return _read(table, query, exclude_columns, columns, order_by, limit)
+
+        cache_key = self._read_cache_key(table, query, exclude_columns, columns, order_by, limit)
+        cached = self._read_cache_get(cache_key)
+        if cached is not None:
+            logger.info(f'Read cache hit for table: {table}')
+            return cached
+        with self._read_cache_lock:
+            generation = self._read_cache_generations.get(table, 0)
+        rows = _read(table, query, exclude_columns, columns, order_by, limit)
+        self._read_cache_put(cache_key, generation, rows)
+        return rows
+
+    def read_iter(
+        self,
+        table: str,
+        query: dict = None,
+        exclude_columns: list = None,
+        batch_size: int = 500,
+        columns: list = None,
+        order_by=None,
+    ):
+        """Yield rows from ``table`` in lists of at most ``batch_size`` rows.
+
+        Accepts the same ``query``/``columns``/``order_by`` spec as ``read``.
+        Rows are fetched through a server-side cursor, so only one batch is held
+        in memory at a time. The session stays open until the generator is
+        exhausted or closed. Unlike ``read`` there is no connection retry: the
+        caller may already have consumed earlier batches.
+        """
+        if query is None:
+            raise Exception("Query must be provided.")
+        if batch_size <= 0:
+            raise Exception("batch_size must be a positive integer.")
+
+        self._check_unsafe_read(table, query, exclude_columns, columns)
+        logger.info(f'Attempting to stream entries from table: {table} in batches of {batch_size}')
+
+        tbl = self.get_table(table)
+        session = Session(bind=self.engine)
+        total = 0
+        try:
+            sql_query = self._build_read_query(session, tbl, query, exclude_columns, columns)
+            sql_query = self._apply_order_and_limit(sql_query, tbl, order_by)
+            result = session.execute(
+                sql_query.statement.execution_options(stream_results=True, yield_per=batch_size)
+            )
+            for partition in result.partitions(batch_size):
+                batch = [self._serialize_row(row) for row in partition]
+                total += len(batch)
+                yield batch
+        except ServiceError:
+            raise
+        except Exception as e:
+            logger.error(
+                f"Database error in read_iter: {str(e)}. "
+                f"pool_status={self._pool_status()}"
+            )
+            raise self._database_service_error('read_iter', e) from e
+        finally:
+            session.rollback()
+            session.close()
+        logger.success(f'Successfully streamed {total} entries from table: {table}')
+
+    def _encode_cursor(self, value) -> str:
+        raw = json.dumps({'k': value}, default=str).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def _decode_cursor(self, cursor: str):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['k']
+        except Exception:
+            raise ServiceError('Invalid pagination cursor', status_code=400, code='invalid_cursor')
+
+    def read_page(
+        self,
+        table: str,
+        query: dict = None,
+        exclude_columns: list = None,
+        limit: int = 100,
+        cursor: str = None,
+        order_by: str = 'id',
+        columns: list = None,
+    ) -> dict:
+        """Read one keyset page of ``table`` ordered by ``order_by``.
+
+        Returns ``{'data': [...], 'next_cursor': str | None, 'limit': int}``.
+        ``next_cursor`` is opaque to callers and is ``None`` on the last page.
+        The ordering column should be unique (the primary key by default) so
+        pages never overlap or skip rows.
+        """
+        @self.with_session(commit=False)
+        def _read_page(session, table: str, query: dict, exclude_columns: list, limit: int, cursor: str, order_by: str, columns: list):
+            logger.info(f'Attempting to read page from table: {table} (limit={limit})')
+
+            if query is None:
+                raise Exception("Query must be provided.")
+            if limit is None or limit <= 0:
+                raise ServiceError('limit must be a positive integer', status_code=400, code='invalid_limit')
+
+            self._check_unsafe_read(table, query, exclude_columns, columns)
+
+            tbl = self.get_table(table)
+            if order_by not in tbl.c:
+                raise Exception(f"Cannot paginate table {table} by unknown column: {order_by}")
+            order_column = tbl.c[order_by]
+
+            sql_query = self._build_read_query(session, tbl, query, exclude_columns, columns)
+            # Keep the keyset column selectable even when the caller leaves it out.
+            if (exclude_columns and order_by in exclude_columns) or (columns and order_by not in columns):
+                sql_query = sql_query.add_columns(order_column.label('__page_key'))
+            if cursor:
+                sql_query = sql_query.filter(order_column > self._decode_cursor(cursor))
+            # Fetch one extra row to learn whether another page exists.
+            rows = sql_query.order_by(order_column.asc()).limit(limit + 1).all()
+
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            data = [self._serialize_row(row) for row in rows]
+
+            next_cursor = None
+            if has_more and rows:
+                last = rows[-1]._asdict()
+                next_cursor = self._encode_cursor(last.get(order_by, last.get('__page_key')))
+            for item in data:
+                item.pop('__page_key', None)
+
+            logger.success(f'Successfully read page of {len(data)} entries from table: {table}')
+            return {'data': data, 'next_cursor': next_cursor, 'limit': limit}
+
+        return _read_page(table, query, exclude_columns, limit, cursor, order_by, columns)
 
     def update(self, table: str, query: dict = None, data: dict = None) -> str:
         @self.with_session
@@ -485,7 +1178,7 @@ class DatabaseManager:
             if data is None:
                 raise Exception("Data to update must be provided.")
 
-            tbl = Table(table, self.metadata, autoload_with=self.engine)
+            tbl = self.get_table(table)
             sql_query = session.query(tbl)
 
             for key, value in query.items():
@@ -509,7 +1202,9 @@ class DatabaseManager:
             
             return str(updated_item.id)
 
-        return _update(table, query, data)
+        result = _update(table, query, data)
+        self.invalidate_read_cache(table)
+        return result
 
     def delete(self, table: str, query: dict = None) -> str:
         @self.with_session
@@ -519,7 +1214,7 @@ class DatabaseManager:
             if query is None:
                 raise Exception("Query must be provided.")
             
-            tbl = Table(table, self.metadata, autoload_with=self.engine)
+            tbl = self.get_table(table)
             sql_query = session.query(tbl)
 
             if query:
@@ -538,7 +1233,9 @@ class DatabaseManager:
             logger.success(f"Successfully deleted entry with id: {item.id} from table: {table}.")
             return str(item.id)
 
-        return _delete(table, query)
+        result = _delete(table, query)
+        self.invalidate_read_cache(table)
+        return result
         
     def get_tables(self):
         @self.with_session
@@ -587,7 +1284,7 @@ class DatabaseManager:
                 if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
                     raise Exception("Data must be a list of dictionaries")
 
-                tbl = Table(table, self.metadata, autoload_with=self.engine)
+                tbl = self.get_table(table)
 
                 if overwrite:
                     logger.info(f'Truncating table: {table}')
@@ -613,4 +1310,6 @@ class DatabaseManager:
                 logger.error(f'Error importing data: {str(e)}')
                 raise Exception(f'Database error: {str(e)}')
 
-        return _from_data_object(data, table, overwrite)
+        result = _from_data_object(data, table, overwrite)
+        self.invalidate_read_cache(table)
+        return result
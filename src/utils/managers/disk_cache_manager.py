@@ -0,0 +1,163 @@
+from src.utils.logger import logger
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+
+class DiskCache:
+    """Size-bounded LRU cache of byte blobs on local disk.
+
+    Entries are stored as ``<key>__<revision hash>`` files so a new revision of
+    the same key replaces the old one. Writes go to a temporary file in the
+    same directory and are moved into place with ``os.replace``, so readers
+    never see a partial entry, even across worker processes. Recency is the
+    file mtime, refreshed on every hit; when the directory grows past
+    ``max_bytes`` the least recently used entries are removed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, name: str = 'cache'):
+        self.name = name
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'errors': 0}
+        self.enabled = self._prepare_directory()
+        self._size = self._scan_size() if self.enabled else 0
+
+    def _prepare_directory(self) -> bool:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            return os.access(self.directory, os.W_OK)
+        except OSError as e:
+            logger.warning(f'{self.name} disabled: cannot use {self.directory}: {e}')
+            return False
+
+    def _scan_size(self) -> int:
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith('.tmp'):
+                total += entry.stat().st_size
+        return total
+
+    def _safe_key(self, key: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', str(key))
+
+    def _path(self, key: str, revision: str) -> str:
+        revision_hash = hashlib.sha1(str(revision).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f'{self._safe_key(key)}__{revision_hash}')
+
+    def get(self, key: str, revision: str) -> bytes | None:
+        if not self.enabled:
+            return None
+        path = self._path(key, revision)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+        except OSError as e:
+            logger.warning(f'{self.name} read failed for {key}: {e}')
+            with self._lock:
+                self._stats['errors'] += 1
+            return None
+        with self._lock:
+            self._stats['hits'] += 1
+        return data
+
+    def put(self, key: str, revision: str, data: bytes):
+        if not self.enabled or data is None or len(data) > self.max_bytes:
+            return
+        path = self._path(key, revision)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f'{self.name} write failed for {key}: {e}')
+            with self._lock:
+                self._stats['errors'] += 1
+            return
+
+        stale_removed = self._remove_other_revisions(key, keep=path)
+        with self._lock:
+            self._stats['writes'] += 1
+            self._size += len(data) - stale_removed
+        self._evict_if_needed()
+
+    def _remove_other_revisions(self, key: str, keep: str) -> int:
+        prefix = f'{self._safe_key(key)}__'
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(prefix) and entry.path != keep:
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                    removed += size
+                except OSError:
+                    pass
+        return removed
+
+    def _evict_if_needed(self):
+        with self._lock:
+            if self._size <= self.max_bytes:
+                return
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                evicted += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._size = total
+            self._stats['evictions'] += evicted
+        if evicted:
+            logger.info(f'{self.name} evicted {evicted} entries, {total} bytes in use')
+
+    def invalidate(self, key: str = None):
+        """Remove every revision of ``key``, or the whole cache when no key is given."""
+        if not self.enabled:
+            return
+        prefix = f'{self._safe_key(key)}__' if key is not None else ''
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.startswith(prefix) and not entry.name.startswith('.tmp'):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+        with self._lock:
+            self._size = self._scan_size()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['bytes'] = self._size
+        stats['max_bytes'] = self.max_bytes
+        stats['directory'] = self.directory
+        stats['enabled'] = self.enabled
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+        return stats
@@ -0,0 +1,164 @@
+from collections import deque
+from sqlalchemy import event
+from src.utils.logger import logger
+import os
+import re
+import sys
+import threading
+import time
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_TABLE_PATTERN = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+"?([\w.]+)"?', re.IGNORECASE)
+_COMPONENT_MARKERS = (os.sep + 'src' + os.sep + 'components' + os.sep, os.sep + 'src' + os.sep + 'app' + os.sep)
+
+
+class QueryMetrics:
+    """Per-statement latency instrumentation for a SQLAlchemy engine.
+
+    Every cursor execution is timed and aggregated by ``(component, table,
+    operation)``, where ``component`` is the first ``src/components`` (or
+    ``src/app``) function on the call stack. Statements slower than
+    ``DB_SLOW_QUERY_MS`` are logged with the Flask ``g.request_id`` and kept
+    in a short ring buffer.
+    """
+
+    def __init__(self, slow_query_ms: float = None, max_slow_queries: int = 50):
+        self.slow_query_ms = float(slow_query_ms if slow_query_ms is not None else os.getenv('DB_SLOW_QUERY_MS', '500'))
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        self._stats = {}
+        self._buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._slow_queries = deque(maxlen=max_slow_queries)
+
+    def install(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(engine, 'handle_error', self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started_at', []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('query_started_at'):
+            conn.info['query_started_at'].pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('query_started_at')
+        if not started:
+            return
+        elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+
+        try:
+            rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else 0
+        except Exception:
+            rows = 0
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'UNKNOWN'
+        table_match = _TABLE_PATTERN.search(statement)
+        table = table_match.group(1).split('.')[-1] if table_match else None
+        component = self._calling_component()
+        request_id = self._request_id()
+
+        self.record(component, table, operation, elapsed_ms, rows)
+
+        if elapsed_ms >= self.slow_query_ms:
+            entry = {
+                'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'request_id': request_id,
+                'component': component,
+                'table': table,
+                'operation': operation,
+                'elapsed_ms': round(elapsed_ms, 2),
+                'rows': rows,
+                'executemany': executemany,
+                'statement': ' '.join(statement.split())[:300],
+            }
+            with self._lock:
+                self._slow_queries.append(entry)
+            logger.warning(
+                f"Slow query: {operation} {table or '?'} from {component} took {entry['elapsed_ms']}ms "
+                f"(rows={rows}) [request_id={request_id}]"
+            )
+
+    def record(self, component: str, table: str, operation: str, elapsed_ms: float, rows: int = 0):
+        bucket = len(LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                bucket = i
+                break
+
+        key = (component, table, operation)
+        with self._lock:
+            self._buckets[bucket] += 1
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'slow': 0}
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['rows'] += rows
+            if elapsed_ms >= self.slow_query_ms:
+                stats['slow'] += 1
+
+    def _calling_component(self) -> str:
+        frame = sys._getframe(2)
+        fallback = None
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            for marker in _COMPONENT_MARKERS:
+                index = filename.rfind(marker)
+                if index != -1:
+                    module = filename[index + len(os.sep + 'src' + os.sep):].rsplit('.', 1)[0].replace(os.sep, '.')
+                    return f'{module}.{frame.f_code.co_name}'
+            if fallback is None and 'sqlalchemy' not in filename and 'query_metrics_manager' not in filename and 'database_manager' not in filename:
+                fallback = f'{os.path.basename(filename).rsplit(".", 1)[0]}.{frame.f_code.co_name}'
+            frame = frame.f_back
+        return fallback or 'unknown'
+
+    def _request_id(self):
+        try:
+            from flask import g, has_request_context
+            if has_request_context():
+                return getattr(g, 'request_id', None)
+        except Exception:
+            pass
+        return None
+
+    def snapshot(self, top: int = 50) -> dict:
+        with self._lock:
+            stats = [
+                {
+                    'component': component,
+                    'table': table,
+                    'operation': operation,
+                    'count': values['count'],
+                    'total_ms': round(values['total_ms'], 2),
+                    'avg_ms': round(values['total_ms'] / values['count'], 2),
+                    'max_ms': round(values['max_ms'], 2),
+                    'rows': values['rows'],
+                    'slow': values['slow'],
+                }
+                for (component, table, operation), values in self._stats.items()
+            ]
+            buckets = list(self._buckets)
+            slow_queries = list(self._slow_queries)
+
+        stats.sort(key=lambda item: item['total_ms'], reverse=True)
+        labels = [f'le_{bound}ms' for bound in LATENCY_BUCKETS_MS] + [f'gt_{LATENCY_BUCKETS_MS[-1]}ms']
+        return {
+            'since': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self._started_at)),
+            'slow_query_ms': self.slow_query_ms,
+            'statements': sum(buckets),
+            'histogram': dict(zip(labels, buckets)),
+            'by_component': stats[:top],
+            'slow_queries': slow_queries,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._started_at = time.time()
+            self._stats = {}
+            self._buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            self._slow_queries.clear()
@@ -0,0 +1,56 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket for pacing requests to a rate-limited API.
+
+    The bucket holds up to ``capacity`` tokens and refills at ``rate`` tokens
+    per second. ``acquire`` takes a token, sleeping until one is available, so
+    short bursts go out immediately while the sustained rate never exceeds
+    ``rate``. One bucket is meant to be shared by every thread that talks to
+    the same upstream limit.
+    """
+
+    def __init__(self, rate: float, capacity: float = None, name: str = 'bucket'):
+        if rate <= 0:
+            raise ValueError('rate must be greater than zero')
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.name = name
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {'acquired': 0, 'throttled': 0, 'waited_seconds': 0.0}
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Take ``tokens`` from the bucket, blocking until they are available; returns the seconds waited."""
+        if tokens > self.capacity:
+            raise ValueError(f'{self.name}: cannot acquire {tokens} tokens from a bucket of {self.capacity}')
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self._stats['acquired'] += 1
+                    if waited:
+                        self._stats['throttled'] += 1
+                        self._stats['waited_seconds'] += waited
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['waited_seconds'] = round(stats['waited_seconds'], 3)
+        stats['rate'] = self.rate
+        stats['capacity'] = self.capacity
+        return stats
@@ -0,0 +1,136 @@
+from src.utils.logger import logger
+from src.utils.sanctions_matching import SanctionsNameIndex
+import glob
+import os
+import re
+import tempfile
+import threading
+import time
+
+
+class SanctionsIndexCache:
+    """Memory-mapped sanctions indexes, swapped in when a new version is published.
+
+    ``locate(list_name)`` returns the metadata of the published index file
+    (a Drive file dict with ``md5Checksum`` or ``modifiedTime``) or None, and
+    ``download(file_info)`` returns its bytes. At most every
+    ``refresh_seconds`` per list, ``get`` checks the published revision; a new
+    revision is downloaded once per host into ``directory`` under a
+    revision-specific name (written to a temporary file and renamed), mapped
+    with ``SanctionsNameIndex.load`` and swapped in by replacing a single
+    reference, so a screening in flight keeps the index it started with. When
+    nothing can be located, the newest local file is used so a restarted
+    worker still starts warm.
+    """
+
+    def __init__(self, directory: str, locate, download, refresh_seconds: float = 300, name: str = 'sanctions_index_cache'):
+        self.name = name
+        self.directory = directory
+        self.refresh_seconds = refresh_seconds
+        self._locate = locate
+        self._download = download
+        self._lock = threading.Lock()
+        self._refresh_locks = {}
+        self._current = {}
+        self._stats = {'checks': 0, 'downloads': 0, 'swaps': 0, 'errors': 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _path(self, list_name: str, revision: str) -> str:
+        return os.path.join(self.directory, f'{list_name}-{re.sub(r"[^A-Za-z0-9]+", "", revision)}.idx')
+
+    def _is_fresh(self, entry: dict | None) -> bool:
+        return entry is not None and time.monotonic() - entry['checked_at'] < self.refresh_seconds
+
+    def get(self, list_name: str) -> SanctionsNameIndex | None:
+        """Return the current index of ``list_name``, or None when no version is available."""
+        entry = self._current.get(list_name)
+        if not self._is_fresh(entry):
+            self.refresh(list_name)
+            entry = self._current.get(list_name)
+        return entry['index'] if entry else None
+
+    def refresh(self, list_name: str):
+        with self._lock:
+            refresh_lock = self._refresh_locks.setdefault(list_name, threading.Lock())
+        with refresh_lock:
+            entry = self._current.get(list_name)
+            if self._is_fresh(entry):
+                return
+            self._count('checks')
+            try:
+                file_info = self._locate(list_name)
+            except Exception as e:
+                logger.warning(f'{self.name}: could not locate {list_name} index: {e}')
+                self._count('errors')
+                file_info = None
+            revision = file_info and (file_info.get('md5Checksum') or file_info.get('modifiedTime') or file_info.get('id'))
+            path, index = None, None
+            try:
+                if revision and (entry is None or entry['revision'] != revision):
+                    path = self._path(list_name, revision)
+                    if not os.path.exists(path):
+                        self._fetch(file_info, path)
+                elif not revision and (entry is None or entry['index'] is None):
+                    path = self._latest_local(list_name)
+                    revision = os.path.basename(path) if path else None
+                index = SanctionsNameIndex.load(path) if path else None
+            except Exception as e:
+                logger.warning(f'{self.name}: could not load {list_name} index: {e}')
+                self._count('errors')
+                index = None
+
+            if index is None:
+                # Keep serving what we have and check again after refresh_seconds.
+                self._current[list_name] = {**(entry or {'index': None, 'revision': None, 'path': None}), 'checked_at': time.monotonic()}
+                return
+            if entry and entry['index'] is not None and entry['index'].signature == index.signature:
+                # Same list contents republished: keep the mapped index callers already hold.
+                index, path = entry['index'], entry['path']
+            else:
+                logger.info(f'{self.name}: serving {list_name} index {index.signature[:12]} from {path}')
+                self._count('swaps')
+            self._current[list_name] = {'index': index, 'revision': revision, 'path': path, 'checked_at': time.monotonic()}
+            self._prune(list_name, keep=path)
+
+    def _fetch(self, file_info: dict, path: str):
+        data = self._download(file_info)
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._count('downloads')
+
+    def _latest_local(self, list_name: str) -> str | None:
+        paths = glob.glob(os.path.join(self.directory, f'{list_name}-*.idx'))
+        return max(paths, key=os.path.getmtime) if paths else None
+
+    def _prune(self, list_name: str, keep: str):
+        # Other workers may still map an older file; unlinking it leaves their mapping intact.
+        for path in glob.glob(os.path.join(self.directory, f'{list_name}-*.idx')):
+            if path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['lists'] = {
+            list_name: {
+                'signature': entry['index'].signature if entry['index'] is not None else None,
+                'revision': entry['revision'],
+                'path': entry['path'],
+            }
+            for list_name, entry in self._current.items()
+        }
+        return stats
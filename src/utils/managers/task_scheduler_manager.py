@@ -0,0 +1,197 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.utils.logger import logger
+import threading
+import time
+
+
+class ProviderLimits:
+    """Concurrency and request spacing per upstream provider.
+
+    ``limits`` maps a provider name to ``{'concurrency': int,
+    'min_interval_seconds': float}``. ``concurrency`` caps how many tasks for
+    that provider run at once (the scheduler holds tasks back rather than
+    blocking a worker); ``min_interval_seconds`` spaces consecutive task
+    starts, which is how the Flex Web Service and similar per-minute quotas
+    are respected. Providers without an entry are unlimited.
+    """
+
+    def __init__(self, limits: dict = None):
+        self._limits = limits or {}
+        self._lock = threading.Lock()
+        self._running = {}
+        self._next_start = {}
+
+    def concurrency(self, provider: str):
+        return (self._limits.get(provider) or {}).get('concurrency')
+
+    def has_capacity(self, provider: str) -> bool:
+        limit = self.concurrency(provider)
+        if provider is None or limit is None:
+            return True
+        with self._lock:
+            return self._running.get(provider, 0) < limit
+
+    def reserve(self, provider: str):
+        if provider is None:
+            return
+        with self._lock:
+            self._running[provider] = self._running.get(provider, 0) + 1
+
+    def release(self, provider: str):
+        if provider is None:
+            return
+        with self._lock:
+            self._running[provider] = max(0, self._running.get(provider, 0) - 1)
+
+    def wait_for_slot(self, provider: str) -> float:
+        """Sleep until the provider's next start slot; returns the seconds waited."""
+        interval = (self._limits.get(provider) or {}).get('min_interval_seconds') or 0
+        if provider is None or interval <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_start.get(provider, now))
+            self._next_start[provider] = start_at + interval
+        delay = start_at - now
+        if delay > 0:
+            time.sleep(delay)
+        return max(delay, 0.0)
+
+
+class TaskScheduler:
+    """Runs a DAG of named tasks on a bounded thread pool.
+
+    Each task is ``{'name', 'fn', 'depends_on': [...], 'provider': str}``. A
+    task starts once all of its dependencies succeeded and its provider has
+    capacity; if a dependency fails, its dependents are not run and are
+    reported as failed. ``run`` returns one entry per task in the order given,
+    with the task's result or error and its timing: ``started_ms`` (offset
+    from the start of the run), ``wall_ms``, ``cpu_ms`` (CPU time of the
+    worker thread while the task ran) and ``waited_ms`` (time spent held by
+    rate limits).
+    """
+
+    def __init__(self, max_workers: int = 4, provider_limits: dict = None, name: str = 'scheduler'):
+        self.max_workers = max(1, int(max_workers))
+        self.limits = ProviderLimits(provider_limits)
+        self.name = name
+
+    def _validate(self, tasks):
+        names = [task['name'] for task in tasks]
+        if len(names) != len(set(names)):
+            raise ValueError(f'{self.name}: duplicate task names in {names}')
+        known = set(names)
+        for task in tasks:
+            for dependency in task.get('depends_on') or []:
+                if dependency not in known:
+                    raise ValueError(f"{self.name}: task '{task['name']}' depends on unknown task '{dependency}'")
+
+        # Kahn's algorithm; anything left over is part of a cycle.
+        indegree = {task['name']: len(task.get('depends_on') or []) for task in tasks}
+        dependents = {name: [] for name in names}
+        for task in tasks:
+            for dependency in task.get('depends_on') or []:
+                dependents[dependency].append(task['name'])
+        ready = [name for name, degree in indegree.items() if degree == 0]
+        visited = 0
+        while ready:
+            current = ready.pop()
+            visited += 1
+            for dependent in dependents[current]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+        if visited != len(tasks):
+            cyclic = [name for name, degree in indegree.items() if degree > 0]
+            raise ValueError(f'{self.name}: dependency cycle between {cyclic}')
+        return dependents
+
+    def _execute(self, task, run_started):
+        provider = task.get('provider')
+        waited = self.limits.wait_for_slot(provider)
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        entry = {'name': task['name'], 'provider': provider, 'started_ms': round((started - run_started) * 1000, 1)}
+        try:
+            entry['result'] = task['fn']()
+            entry['status'] = 'success'
+        except Exception as e:
+            logger.error(f"{self.name}: task '{task['name']}' failed: {e}")
+            entry['status'] = 'failed'
+            entry['error'] = str(e)
+        entry['wall_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        entry['cpu_ms'] = round((time.thread_time() - cpu_started) * 1000, 1)
+        entry['waited_ms'] = round(waited * 1000, 1)
+        return entry
+
+    def run(self, tasks: list) -> dict:
+        dependents = self._validate(tasks)
+        by_name = {task['name']: task for task in tasks}
+        remaining = {task['name']: set(task.get('depends_on') or []) for task in tasks}
+        entries = {}
+        pending = [task['name'] for task in tasks if not remaining[task['name']]]
+        running = {}
+        run_started = time.perf_counter()
+
+        def _skip_dependents(name, reason):
+            for dependent in dependents[name]:
+                if dependent not in entries:
+                    entries[dependent] = {
+                        'name': dependent,
+                        'provider': by_name[dependent].get('provider'),
+                        'status': 'failed',
+                        'error': reason,
+                    }
+                    remaining.pop(dependent, None)
+                    _skip_dependents(dependent, reason)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name) as executor:
+            while pending or running:
+                # Start every ready task whose provider has room, in declaration order.
+                for name in list(pending):
+                    if len(running) >= self.max_workers:
+                        break
+                    provider = by_name[name].get('provider')
+                    if not self.limits.has_capacity(provider):
+                        continue
+                    pending.remove(name)
+                    self.limits.reserve(provider)
+                    running[executor.submit(self._execute, by_name[name], run_started)] = name
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    self.limits.release(by_name[name].get('provider'))
+                    entry = future.result()
+                    entries[name] = entry
+                    remaining.pop(name, None)
+                    if entry['status'] != 'success':
+                        _skip_dependents(name, f"Not run because dependency '{name}' failed")
+                        continue
+                    for dependent in dependents[name]:
+                        if dependent in remaining:
+                            remaining[dependent].discard(name)
+                            if not remaining[dependent] and dependent not in pending:
+                                pending.append(dependent)
+
+        for task in tasks:
+            # Only reachable when a provider is configured with zero concurrency.
+            entries.setdefault(task['name'], {
+                'name': task['name'],
+                'provider': task.get('provider'),
+                'status': 'failed',
+                'error': 'Not scheduled: provider has no capacity',
+            })
+
+        wall_ms = round((time.perf_counter() - run_started) * 1000, 1)
+        ordered = [entries[task['name']] for task in tasks]
+        cpu_ms = round(sum(entry.get('cpu_ms', 0) for entry in ordered), 1)
+        logger.info(f'{self.name}: ran {len(ordered)} tasks in {wall_ms}ms wall, {cpu_ms}ms CPU')
+        return {
+            'tasks': ordered,
+            'wall_ms': wall_ms,
+            'cpu_ms': cpu_ms,
+            'max_workers': self.max_workers,
+        }
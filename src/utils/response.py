@@ -1,6 +1,6 @@
 from functools import wraps
 
-from flask import Response, jsonify
+from flask import Response, jsonify, request
 
 from src.utils.exception import (
     ServiceError,
@@ -54,3 +54,29 @@ def format_response(func):
             return jsonify(build_error_payload(err)), err.status_code
 
     return wrapper
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+def get_page_args():
+    """Read the ``limit``/``cursor`` pagination contract from the query string.
+
+    Returns ``(None, None)`` when neither argument is present so list routes
+    keep returning a plain array to existing callers. When either is present
+    the route should return ``db.read_page``'s ``{'data', 'next_cursor',
+    'limit'}`` envelope; clients follow ``next_cursor`` until it is null.
+    """
+    raw_limit = request.args.get('limit', None)
+    cursor = request.args.get('cursor', None) or None
+    if raw_limit is None and cursor is None:
+        return None, None
+
+    if raw_limit is None or raw_limit == '':
+        return DEFAULT_PAGE_LIMIT, cursor
+    try:
+        limit = int(raw_limit)
+    except (TypeError, ValueError):
+        raise ServiceError('limit must be an integer', status_code=400, code='invalid_limit')
+    if limit <= 0:
+        raise ServiceError('limit must be a positive integer', status_code=400, code='invalid_limit')
+    return min(limit, MAX_PAGE_LIMIT), cursor
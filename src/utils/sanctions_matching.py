@@ -0,0 +1,576 @@
+"""
+Fuzzy name matching for sanctions screening.
+
+``SanctionsNameIndex`` is built once per version of a sanctions list. It
+keeps three lookups over the normalized names:
+- an exact map
+- a character-trigram inverted index
+- a phonetic key map
+
+``search`` takes the exact hits, then gathers candidates whose trigram Dice
+overlap with the query is high enough, plus names with the same phonetic key,
+and scores only those candidates with Jaro-Winkler, scaled down when tokens of
+the names have no counterpart in the other name. No query is compared
+against the whole list, so screening hundreds of contacts against tens of
+thousands of names takes seconds. tests/benchmarks/sanctions_matching.py
+measures this on a synthetic list.
+
+The ETL builds one index per list with ``build_sanctions_list_index`` and
+publishes it as a file (``SanctionsNameIndex.save``); API workers map the
+published file with ``SanctionsNameIndex.load`` instead of rebuilding.
+"""
+from functools import lru_cache
+from src.utils.logger import logger
+import hashlib
+import json
+import mmap
+import numpy as np
+import os
+import re
+import tempfile
+import time
+import unicodedata
+
+# A candidate must share this Dice fraction of its trigrams with the query.
+TRIGRAM_MIN_DICE = 0.4
+# Only the best candidates by trigram overlap are scored.
+MAX_CANDIDATES = 50
+# Names whose lengths differ more than this ratio cannot score high enough.
+MIN_LENGTH_RATIO = 0.6
+FUZZY_THRESHOLD = 0.92
+# Same phonetic key: a weaker spelling score is enough.
+PHONETIC_THRESHOLD = 0.85
+# A token with no partner this close in the other name counts as unmatched.
+TOKEN_MATCH_THRESHOLD = 0.75
+
+# Saved index files: magic, header length, JSON header, then 64-byte aligned arrays.
+INDEX_MAGIC = b'AGMSIDX\x00'
+INDEX_FORMAT_VERSION = 1
+INDEX_ALIGNMENT = 64
+
+_VOWELS = frozenset('AEIOU')
+
+
+def normalize_name(value) -> str:
+    """ASCII-fold, lowercase and reduce a name to space-separated alphanumeric tokens."""
+    if not value:
+        return ''
+    ascii_name = (
+        unicodedata.normalize('NFKD', str(value))
+        .encode('ascii', 'ignore')
+        .decode('ascii')
+    )
+    normalized = re.sub(r'[^a-z0-9 ]+', ' ', ascii_name.lower())
+    return ' '.join(normalized.split())
+
+def name_trigrams(name: str) -> set:
+    padded = f' {name} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def phonetic_code(token: str) -> str:
+    """
+    Simplified Metaphone code for one token.
+
+    Collapses the spelling differences common in transliterated names
+    (PH/F, C/K/Q, silent H after consonants, doubled letters, vowels after the
+    first letter), so 'Mohammed' and 'Muhammad' or 'Gaddafi' and 'Qadhafi'
+    share a code. Digits are kept as they are.
+    """
+    word = re.sub(r'[^A-Z0-9]', '', token.upper())
+    if not word:
+        return ''
+    if word[:2] in ('KN', 'GN', 'PN', 'WR', 'AE'):
+        word = word[1:]
+    elif word[0] == 'X':
+        word = 'S' + word[1:]
+    elif word[:2] == 'WH':
+        word = 'W' + word[2:]
+
+    code = []
+    length = len(word)
+    for i, char in enumerate(word):
+        previous = word[i - 1] if i > 0 else ''
+        following = word[i + 1] if i + 1 < length else ''
+        after_next = word[i + 2] if i + 2 < length else ''
+        if char == previous and char != 'C':
+            continue
+        if char.isdigit():
+            code.append(char)
+        elif char in _VOWELS:
+            if i == 0:
+                code.append('A')
+        elif char == 'B':
+            if not (previous == 'M' and i == length - 1):
+                code.append('B')
+        elif char == 'C':
+            if following == 'H':
+                code.append('K' if previous == 'S' else 'X')
+            elif following in ('I', 'E', 'Y'):
+                code.append('S')
+            elif following != 'K':
+                code.append('K')
+        elif char == 'D':
+            code.append('J' if following == 'G' and after_next in ('E', 'I', 'Y') else 'T')
+        elif char == 'G':
+            if following == 'H' and after_next not in _VOWELS:
+                continue
+            if following == 'N' and i + 2 >= length:
+                continue
+            code.append('J' if following in ('E', 'I', 'Y') and previous != 'G' else 'K')
+        elif char == 'H':
+            if following in _VOWELS and previous not in ('C', 'S', 'P', 'T', 'G', 'D', 'K'):
+                code.append('H')
+        elif char == 'K':
+            if previous != 'C':
+                code.append('K')
+        elif char == 'P':
+            code.append('F' if following == 'H' else 'P')
+        elif char == 'Q':
+            code.append('K')
+        elif char == 'S':
+            if following == 'H' or (following == 'I' and after_next in ('O', 'A')):
+                code.append('X')
+            else:
+                code.append('S')
+        elif char == 'T':
+            if following == 'H':
+                code.append('0')
+            elif following == 'I' and after_next in ('O', 'A'):
+                code.append('X')
+            else:
+                code.append('T')
+        elif char == 'V':
+            code.append('F')
+        elif char in ('W', 'Y'):
+            if following in _VOWELS:
+                code.append(char)
+        elif char == 'X':
+            code.append('KS')
+        elif char == 'Z':
+            code.append('S')
+        else:
+            code.append(char)
+
+    collapsed = []
+    for part in code:
+        if not collapsed or collapsed[-1] != part:
+            collapsed.append(part)
+    return ''.join(collapsed)
+
+def phonetic_key(name: str) -> str:
+    """Order-independent phonetic key of a normalized name."""
+    return ' '.join(sorted(filter(None, (phonetic_code(token) for token in name.split()))))
+
+def jaro_winkler(a: str, b: str, prefix_scale: float = 0.1) -> float:
+    if a == b:
+        return 1.0
+    len_a, len_b = len(a), len(b)
+    if not len_a or not len_b:
+        return 0.0
+
+    window = max(max(len_a, len_b) // 2 - 1, 0)
+    matched_b = [False] * len_b
+    a_matches = []
+    for i, char in enumerate(a):
+        for j in range(max(0, i - window), min(len_b, i + window + 1)):
+            if not matched_b[j] and b[j] == char:
+                matched_b[j] = True
+                a_matches.append(char)
+                break
+    matches = len(a_matches)
+    if not matches:
+        return 0.0
+
+    b_matches = [b[j] for j in range(len_b) if matched_b[j]]
+    transpositions = sum(x != y for x, y in zip(a_matches, b_matches)) / 2
+    jaro = (matches / len_a + matches / len_b + (matches - transpositions) / matches) / 3
+
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * prefix_scale * (1 - jaro)
+
+def token_similarity(a: str, b: str) -> float:
+    """
+    Order-independent name similarity: each token is paired with its best
+    Jaro-Winkler match in the other name, weighted by token length, and the
+    two directions are averaged.
+    """
+    tokens_a, tokens_b = a.split(), b.split()
+    if not tokens_a or not tokens_b:
+        return 0.0
+
+    def directed(source, target):
+        total = sum(len(token) for token in source)
+        return sum(len(token) * max(jaro_winkler(token, other) for other in target) for token in source) / total
+
+    return (directed(tokens_a, tokens_b) + directed(tokens_b, tokens_a)) / 2
+
+@lru_cache(maxsize=65536)
+def _token_code(token: str) -> str:
+    return phonetic_code(token)
+
+def token_coverage(a: str, b: str) -> float:
+    """
+    Share of a name, weighted by token length, whose tokens have a partner in
+    the other name: the same token, the same phonetic code or (when both names
+    have several tokens) a Jaro-Winkler of at least TOKEN_MATCH_THRESHOLD. A
+    one-token name has no other token to confirm a spelling match, so there
+    only the first two count. The better covered of the two names is used, so
+    a listed name contained in a longer contact name keeps its score while a
+    token with no counterpart on both sides ('Costa Rica' vs 'Cuba') does not.
+    """
+    tokens_a, tokens_b = a.split(), b.split()
+    if not tokens_a or not tokens_b:
+        return 0.0
+    spelling = len(tokens_a) > 1 and len(tokens_b) > 1
+
+    def covered(token, others):
+        code = _token_code(token)
+        return any(
+            token == other
+            or (code and code == _token_code(other))
+            or (spelling and jaro_winkler(token, other) >= TOKEN_MATCH_THRESHOLD)
+            for other in others
+        )
+
+    def directed(source, target):
+        return sum(len(token) for token in source if covered(token, target)) / sum(len(token) for token in source)
+
+    return max(directed(tokens_a, tokens_b), directed(tokens_b, tokens_a))
+
+
+def _hash64(values) -> np.ndarray:
+    """Stable 64-bit hashes of strings, so lookups can be sorted arrays shared through a file."""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little') for value in values),
+        dtype=np.uint64,
+        count=len(values),
+    )
+
+def _sorted_lookup(keys: list, ids: list) -> tuple[np.ndarray, np.ndarray]:
+    hashes = _hash64(keys)
+    order = np.argsort(hashes, kind='stable')
+    return hashes[order], np.asarray(ids, dtype=np.int32)[order]
+
+def _align(offset: int) -> int:
+    return -(-offset // INDEX_ALIGNMENT) * INDEX_ALIGNMENT
+
+
+class _StringTable:
+    """Strings packed into one UTF-8 buffer and an offsets array; indexable like a list."""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def pack(cls, values) -> tuple[np.ndarray, np.ndarray]:
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+        return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class _JsonRows(_StringTable):
+    def __getitem__(self, i):
+        return json.loads(super().__getitem__(i))
+
+
+class SanctionsNameIndex:
+    """
+    Searchable index over the names of one sanctions list.
+
+    ``entries`` yields ``(name, row)`` pairs; a row may appear under several
+    names (aliases, UK Name 1-6) and is reported once, under its best-scoring
+    name. Names are normalized with ``normalize_name`` and empty names are
+    skipped.
+
+    The lookups are flat arrays: sorted 64-bit hashes of the names, phonetic
+    keys and trigrams, searched with ``searchsorted``, and the trigram
+    postings in CSR form. ``save`` writes them to a single file tagged with
+    ``signature`` (the version of the list it was built from) and ``load``
+    memory-maps that file, so workers on one host share its pages and a new
+    version costs no rebuild.
+    """
+
+    def __init__(self, entries, name: str = 'sanctions', signature: str = ''):
+        self.name = name
+        self.signature = signature
+        started = time.perf_counter()
+        self.rows = []
+        self.names = []
+        row_ids = {}
+        name_rows = []
+        for raw_name, row in entries:
+            normalized = normalize_name(raw_name)
+            if not normalized:
+                continue
+            row_id = row_ids.get(id(row))
+            if row_id is None:
+                row_id = row_ids[id(row)] = len(self.rows)
+                self.rows.append(row)
+            self.names.append(normalized)
+            name_rows.append(row_id)
+
+        self._sorted_names = [' '.join(sorted(name.split())) for name in self.names]
+        self._phonetic_keys = [phonetic_key(name) for name in self.names]
+        postings = {}
+        gram_counts = np.zeros(len(self.names), dtype=np.int32)
+        for name_id, name in enumerate(self.names):
+            grams = name_trigrams(name)
+            gram_counts[name_id] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(name_id)
+
+        name_hashes, name_ids = _sorted_lookup(self.names, list(range(len(self.names))))
+        phonetic_ids = [name_id for name_id, key in enumerate(self._phonetic_keys) if key]
+        phonetic_hashes, phonetic_ids = _sorted_lookup([self._phonetic_keys[i] for i in phonetic_ids], phonetic_ids)
+        grams = list(postings)
+        gram_hashes = _hash64(grams)
+        gram_order = np.argsort(gram_hashes, kind='stable')
+        gram_postings = [postings[grams[i]] for i in gram_order]
+        posting_offsets = np.zeros(len(grams) + 1, dtype=np.int64)
+        posting_offsets[1:] = np.cumsum([len(ids) for ids in gram_postings], dtype=np.int64)
+        self._attach({
+            'name_rows': np.asarray(name_rows, dtype=np.int32),
+            'gram_counts': gram_counts,
+            'name_hashes': name_hashes,
+            'name_ids': name_ids,
+            'phonetic_hashes': phonetic_hashes,
+            'phonetic_ids': phonetic_ids,
+            'gram_hashes': gram_hashes[gram_order],
+            'posting_offsets': posting_offsets,
+            'posting_ids': np.fromiter((i for ids in gram_postings for i in ids), dtype=np.int32, count=int(posting_offsets[-1])),
+        })
+        self._buffer = None
+        logger.info(
+            f'Built {self.name} name index: {len(self.rows)} rows, {len(self.names)} names, '
+            f'{len(self._gram_hashes)} trigrams in {time.perf_counter() - started:.2f}s'
+        )
+
+    def _attach(self, arrays: dict):
+        self._name_rows = arrays['name_rows']
+        self._gram_counts = arrays['gram_counts']
+        self._name_hashes = arrays['name_hashes']
+        self._name_ids = arrays['name_ids']
+        self._phonetic_hashes = arrays['phonetic_hashes']
+        self._phonetic_ids = arrays['phonetic_ids']
+        self._gram_hashes = arrays['gram_hashes']
+        self._posting_offsets = arrays['posting_offsets']
+        self._posting_ids = arrays['posting_ids']
+
+    def __len__(self):
+        return len(self.names)
+
+    def save(self, path: str):
+        """Write the index to ``path`` atomically in the format read by ``load``."""
+        arrays = {
+            'name_rows': self._name_rows,
+            'gram_counts': self._gram_counts,
+            'name_hashes': self._name_hashes,
+            'name_ids': self._name_ids,
+            'phonetic_hashes': self._phonetic_hashes,
+            'phonetic_ids': self._phonetic_ids,
+            'gram_hashes': self._gram_hashes,
+            'posting_offsets': self._posting_offsets,
+            'posting_ids': self._posting_ids,
+        }
+        for key, values in (('names', self.names), ('sorted_names', self._sorted_names), ('phonetic_keys', self._phonetic_keys)):
+            arrays[f'{key}_data'], arrays[f'{key}_offsets'] = _StringTable.pack(values)
+        arrays['rows_data'], arrays['rows_offsets'] = _StringTable.pack(
+            json.dumps(row, default=str, separators=(',', ':')) for row in self.rows
+        )
+
+        layout = {}
+        offset = 0
+        for key, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            arrays[key] = values
+            layout[key] = {'dtype': values.dtype.str, 'count': int(values.size), 'offset': offset}
+            offset = _align(offset + values.nbytes)
+        header = json.dumps({
+            'version': INDEX_FORMAT_VERSION,
+            'name': self.name,
+            'signature': self.signature,
+            'rows': len(self.rows),
+            'names': len(self.names),
+            'arrays': layout,
+        }).encode('utf-8')
+        data_start = _align(len(INDEX_MAGIC) + 8 + len(header))
+
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(INDEX_MAGIC + len(header).to_bytes(8, 'little') + header)
+                for key, values in arrays.items():
+                    f.seek(data_start + layout[key]['offset'])
+                    f.write(values.tobytes())
+                f.truncate(data_start + offset)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> 'SanctionsNameIndex':
+        """Memory-map an index written by ``save``; raises ValueError for an unreadable file."""
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        prefix = len(INDEX_MAGIC) + 8
+        if buffer[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f'{path} is not a sanctions index file')
+        header_length = int.from_bytes(buffer[len(INDEX_MAGIC):prefix], 'little')
+        header = json.loads(buffer[prefix:prefix + header_length])
+        if header.get('version') != INDEX_FORMAT_VERSION:
+            raise ValueError(f'{path} has index format {header.get("version")}, expected {INDEX_FORMAT_VERSION}')
+
+        data_start = _align(prefix + header_length)
+        arrays = {
+            key: np.frombuffer(buffer, dtype=np.dtype(spec['dtype']), count=spec['count'], offset=data_start + spec['offset'])
+            for key, spec in header['arrays'].items()
+        }
+        index = cls.__new__(cls)
+        index.name = header['name']
+        index.signature = header['signature']
+        index.rows = _JsonRows(arrays['rows_data'], arrays['rows_offsets'])
+        index.names = _StringTable(arrays['names_data'], arrays['names_offsets'])
+        index._sorted_names = _StringTable(arrays['sorted_names_data'], arrays['sorted_names_offsets'])
+        index._phonetic_keys = _StringTable(arrays['phonetic_keys_data'], arrays['phonetic_keys_offsets'])
+        index._attach(arrays)
+        # The arrays are views of the mapping; keep it open for the life of the index.
+        index._buffer = buffer
+        logger.info(f'Loaded {index.name} name index {index.signature[:12]}: {header["rows"]} rows, {header["names"]} names from {path}')
+        return index
+
+    def _lookup(self, hashes: np.ndarray, ids: np.ndarray, key: str) -> np.ndarray:
+        key_hash = _hash64([key])[0]
+        return ids[np.searchsorted(hashes, key_hash, 'left'):np.searchsorted(hashes, key_hash, 'right')]
+
+    def _candidates(self, query: str) -> set:
+        query_grams = name_trigrams(query)
+        candidates = set(self._lookup(self._phonetic_hashes, self._phonetic_ids, phonetic_key(query)).tolist())
+        if not len(self.names) or not len(self._gram_hashes):
+            return candidates
+
+        gram_hashes = _hash64(list(query_grams))
+        positions = np.minimum(np.searchsorted(self._gram_hashes, gram_hashes), len(self._gram_hashes) - 1)
+        positions = positions[self._gram_hashes[positions] == gram_hashes]
+        if not len(positions):
+            return candidates
+
+        shared = np.bincount(
+            np.concatenate([
+                self._posting_ids[self._posting_offsets[position]:self._posting_offsets[position + 1]]
+                for position in positions
+            ]),
+            minlength=len(self.names),
+        )
+        dice = 2 * shared / (len(query_grams) + self._gram_counts)
+        ids = np.flatnonzero(dice >= TRIGRAM_MIN_DICE)
+        if len(ids) > MAX_CANDIDATES:
+            ids = ids[np.argpartition(-dice[ids], MAX_CANDIDATES)[:MAX_CANDIDATES]]
+        candidates.update(ids.tolist())
+        return candidates
+
+    def search(
+        self,
+        name: str,
+        threshold: float = FUZZY_THRESHOLD,
+        limit: int | None = 10,
+        fuzzy: bool = True,
+        normalized: bool = False,
+    ) -> list[dict]:
+        """
+        Return ranked hits as ``{'row', 'name', 'score', 'match_type'}``.
+
+        ``match_type`` is 'exact' (score 1.0), 'fuzzy' (Jaro-Winkler of the
+        names, of their sorted tokens or token by token, scaled by
+        ``token_coverage``, reaches ``threshold``) or 'phonetic' (same phonetic
+        key and a score of at least PHONETIC_THRESHOLD). With ``fuzzy=False``
+        only exact hits are returned.
+        """
+        query = name if normalized else normalize_name(name)
+        if not query:
+            return []
+
+        best = {}
+        for name_id in self._lookup(self._name_hashes, self._name_ids, query).tolist():
+            if self.names[name_id] == query:
+                best.setdefault(int(self._name_rows[name_id]), (1.0, name_id, 'exact'))
+
+        if fuzzy:
+            query_sorted = ' '.join(sorted(query.split()))
+            query_key = phonetic_key(query)
+            for name_id in self._candidates(query):
+                row_id = int(self._name_rows[name_id])
+                if row_id in best and best[row_id][2] == 'exact':
+                    continue
+                candidate = self.names[name_id]
+                shorter, longer = sorted((len(query), len(candidate)))
+                if shorter < MIN_LENGTH_RATIO * longer:
+                    continue
+                score = max(
+                    jaro_winkler(query, candidate),
+                    jaro_winkler(query_sorted, self._sorted_names[name_id]),
+                )
+                if score < threshold and ' ' in query:
+                    score = max(score, token_similarity(query, candidate))
+                score *= token_coverage(query, candidate)
+                if score >= threshold:
+                    match_type = 'fuzzy'
+                elif query_key and query_key == self._phonetic_keys[name_id] and score >= PHONETIC_THRESHOLD:
+                    match_type = 'phonetic'
+                else:
+                    continue
+                if row_id not in best or score > best[row_id][0]:
+                    best[row_id] = (score, name_id, match_type)
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [
+            {'row': self.rows[row_id], 'name': self.names[name_id], 'score': round(score, 4), 'match_type': match_type}
+            for row_id, (score, name_id, match_type) in ranked
+        ]
+
+
+SANCTIONS_LISTS = ('ofac', 'uk', 'un')
+
+def sanctions_list_entries(list_name: str, rows):
+    """
+    Yield the ``(name, row)`` pairs indexed for one list: the OFAC ``name``,
+    UK ``Name 1`` to ``Name 6``, or the UN ``name`` and its ``|``-separated
+    ``aliases``.
+    """
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        if list_name == 'uk':
+            for i in range(1, 7):
+                yield row.get(f'Name {i}', ''), row
+            continue
+        yield row.get('name', ''), row
+        aliases = row.get('aliases', '') if list_name == 'un' else ''
+        if isinstance(aliases, str) and aliases.strip():
+            for alias in aliases.split('|'):
+                yield alias, row
+
+def build_sanctions_list_index(list_name: str, rows, signature: str = '') -> SanctionsNameIndex:
+    if list_name not in SANCTIONS_LISTS:
+        raise ValueError(f'Unknown sanctions list {list_name}, expected one of {SANCTIONS_LISTS}')
+    return SanctionsNameIndex(sanctions_list_entries(list_name, rows), name=list_name, signature=signature)
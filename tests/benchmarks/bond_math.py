@@ -0,0 +1,139 @@
+"""
+Golden fixture and benchmark for the vectorized bond metrics in
+src.utils.bond_math, checked against the row-wise scalar versions.
+"""
+from src.utils.bond_math import (
+    get_bond_duration,
+    get_bond_duration_array,
+    get_bond_price_cluster,
+    get_bond_price_cluster_array,
+    get_bond_ytm,
+    get_bond_ytm_array,
+    get_current_yield,
+    get_current_yield_array,
+    get_first_valid_price,
+    get_first_valid_price_array,
+    get_years_to_date,
+    get_years_to_date_array,
+)
+import numpy as np
+import pandas as pd
+import time
+
+GOLDEN_BONDS = [
+    # maturity, coupon (%), ask, bid, last, frequency
+    ('2031-06-15', 5.0, 101.25, 100.75, 101.0, 2),
+    ('2045-11-01', 3.375, 82.5, 82.0, None, 2),
+    ('2028-03-31', 0.0, 91.2, 90.8, 91.0, 0),
+    ('2036-01-15', 7.25, 0, 104.1, 104.0, 4),
+    ('2027-09-30', 4.5, None, None, 99.5, 1),
+    ('2054-05-15', 2.0, 55.0, 54.5, 54.75, 12),
+    ('2020-01-01', 6.0, 100.0, 99.0, 99.5, 2),
+    (None, 5.0, 100.0, 99.0, 99.5, 2),
+    ('2033-02-28', None, 98.0, 97.5, 97.75, 2),
+    ('2030-12-31', 6.5, None, None, None, 2),
+    ('2029-07-01', 8.0, -5.0, 95.0, 95.0, None),
+    ('2040-10-10', 4.0, 130.0, 129.0, 129.5, 2),
+    ('2026-12-15', 9.875, 60.0, 0, 0, 2),
+]
+
+def golden_frame(rows=GOLDEN_BONDS) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=['Maturity', 'Coupon', 'Ask', 'Bid', 'Last', 'Frequency'])
+    df['Maturity'] = pd.to_datetime(df['Maturity'], errors='coerce')
+    for column in ['Coupon', 'Ask', 'Bid', 'Last', 'Frequency']:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    return df
+
+def scalar_metrics(df: pd.DataFrame, today: pd.Timestamp) -> dict:
+    price = df.apply(lambda row: get_first_valid_price(row['Ask'], row['Bid'], row['Last']), axis=1)
+    years = df['Maturity'].apply(lambda maturity: get_years_to_date(today, maturity))
+    return {
+        'CY': df.apply(lambda row: get_current_yield(row['Coupon'], row['Last'], row['Ask'], row['Bid']), axis=1),
+        'Price': price,
+        'Price Cluster': price.apply(get_bond_price_cluster),
+        'Duration': pd.Series([
+            get_bond_duration(maturity, coupon / 100, p, frequency)
+            for maturity, coupon, p, frequency in zip(df['Maturity'], df['Coupon'], price, df['Frequency'])
+        ]),
+        'Years to Maturity': years,
+        'YTM': pd.Series([get_bond_ytm(p, coupon, y) for p, coupon, y in zip(price, df['Coupon'], years)]),
+    }
+
+def array_metrics(df: pd.DataFrame, today: pd.Timestamp) -> dict:
+    price = get_first_valid_price_array(df['Ask'], df['Bid'], df['Last'])
+    years = get_years_to_date_array(today, df['Maturity'])
+    return {
+        'CY': get_current_yield_array(df['Coupon'], df['Last'], df['Ask'], df['Bid']),
+        'Price': price,
+        'Price Cluster': get_bond_price_cluster_array(price),
+        'Duration': get_bond_duration_array(df['Maturity'], df['Coupon'] / 100, price, df['Frequency']),
+        'Years to Maturity': years,
+        'YTM': get_bond_ytm_array(price, df['Coupon'], years),
+    }
+
+def compare_metrics(df: pd.DataFrame, rtol: float = 1e-12) -> dict:
+    """Compute every metric both ways; returns the mismatching row count per metric."""
+    today = pd.Timestamp.today()
+    scalar = scalar_metrics(df, today)
+    vectorized = array_metrics(df, today)
+    mismatches = {}
+    for name, expected in scalar.items():
+        actual = vectorized[name]
+        if name == 'Price Cluster':
+            expected_values = [value if isinstance(value, str) else None for value in expected]
+            mismatches[name] = sum(a != b for a, b in zip(expected_values, actual))
+            continue
+        expected_values = pd.to_numeric(pd.Series(expected), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        same = np.isclose(expected_values, actual, rtol=rtol, atol=0, equal_nan=True)
+        mismatches[name] = int((~same).sum())
+    return mismatches
+
+def make_bond_universe(size: int = 10_000, seed: int = 7) -> pd.DataFrame:
+    """Synthetic bond snapshot with the gaps and zeros real IBKR snapshots contain."""
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp.today().normalize()
+    maturity = today + pd.to_timedelta(rng.integers(-365, 365 * 30, size), unit='D')
+    coupon = np.round(rng.uniform(0, 10, size), 3)
+    ask = np.round(rng.uniform(40, 140, size), 3)
+    bid = ask - np.round(rng.uniform(0, 2, size), 3)
+    last = (ask + bid) / 2
+    for values, share in ((ask, 0.1), (bid, 0.05), (last, 0.2), (coupon, 0.03)):
+        values[rng.random(size) < share] = np.nan
+    ask[rng.random(size) < 0.05] = 0
+    frequency = rng.choice([1, 2, 2, 2, 4, 12, 0, np.nan], size)
+    df = pd.DataFrame({
+        'Maturity': maturity, 'Coupon': coupon, 'Ask': ask, 'Bid': bid, 'Last': last, 'Frequency': frequency,
+    })
+    df.loc[rng.random(size) < 0.02, 'Maturity'] = pd.NaT
+    return df
+
+def benchmark(size: int = 10_000, seed: int = 7) -> dict:
+    """
+    Time the row-wise and the vectorized metrics on a synthetic universe.
+
+    Run with ``python -m tests.benchmarks.bond_math``. Scalar duration failures are
+    logged once per bond, as in production, so expect log output.
+    """
+    df = make_bond_universe(size, seed)
+    today = pd.Timestamp.today()
+
+    started = time.perf_counter()
+    scalar_metrics(df, today)
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    array_metrics(df, today)
+    vectorized_seconds = time.perf_counter() - started
+
+    return {
+        'bonds': size,
+        'scalar_ms': round(scalar_seconds * 1000, 1),
+        'vectorized_ms': round(vectorized_seconds * 1000, 1),
+        'speedup': round(scalar_seconds / vectorized_seconds, 1) if vectorized_seconds else None,
+        'golden_fixture_mismatches': compare_metrics(golden_frame()),
+        'universe_mismatches': compare_metrics(df),
+    }
+
+
+if __name__ == '__main__':
+    print(benchmark())
@@ -0,0 +1,94 @@
+"""
+Synthetic sanctions list and contact names for src.utils.sanctions_matching,
+and a benchmark of the index against a brute-force Jaro-Winkler scan.
+"""
+from src.utils.sanctions_matching import SanctionsNameIndex, jaro_winkler, normalize_name
+import random
+import time
+
+_SYLLABLES = [
+    'al', 'ab', 'ad', 'ah', 'am', 'an', 'ar', 'as', 'ba', 'be', 'bo', 'da', 'di', 'el', 'fa', 'ga', 'ha', 'he',
+    'hu', 'ib', 'is', 'ja', 'ka', 'ki', 'ko', 'la', 'li', 'lo', 'ma', 'mi', 'mo', 'mu', 'na', 'ni', 'no', 'ol',
+    'ra', 'ri', 'ro', 'sa', 'se', 'si', 'so', 'ta', 'ti', 'to', 'va', 'vi', 'ya', 'yu', 'za', 'zi',
+]
+_TRANSLITERATIONS = [('ph', 'f'), ('k', 'q'), ('ou', 'u'), ('i', 'y'), ('ee', 'i'), ('c', 'k'), ('v', 'w'), ('dh', 'd')]
+
+def random_name(rng: random.Random) -> str:
+    return ' '.join(
+        ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+        for _ in range(rng.randint(2, 3))
+    )
+
+def name_variant(name: str, rng: random.Random) -> str:
+    """Spelling variant of a name: transliteration swaps, one typo and sometimes reordered tokens."""
+    for source, target in _TRANSLITERATIONS:
+        if source in name and rng.random() < 0.5:
+            name = name.replace(source, target, 1)
+    position = rng.randrange(len(name))
+    if name[position] != ' ':
+        name = name[:position] + rng.choice('aeioulnrst') + name[position + 1:]
+    tokens = name.split()
+    if len(tokens) > 1 and rng.random() < 0.3:
+        tokens.reverse()
+    return ' '.join(tokens)
+
+def make_screening_universe(list_size: int = 30_000, contacts: int = 800, variant_share: float = 0.1, seed: int = 7):
+    """Synthetic sanctions list and contact names; a share of contacts are variants of listed names."""
+    rng = random.Random(seed)
+    rows = [{'name': random_name(rng), 'id': i} for i in range(list_size)]
+    names = []
+    expected = []
+    for _ in range(contacts):
+        if rng.random() < variant_share:
+            row = rng.choice(rows)
+            names.append(name_variant(row['name'], rng))
+            expected.append(row['id'])
+        else:
+            names.append(random_name(rng))
+            expected.append(None)
+    return rows, names, expected
+
+def benchmark(list_size: int = 30_000, contacts: int = 800, brute_force_sample: int = 20, seed: int = 7) -> dict:
+    """
+    Screen synthetic contacts against a synthetic list with the index, and
+    estimate a brute-force Jaro-Winkler scan from a sample of the contacts.
+
+    Recall is the share of injected variants whose source row is among the
+    hits at the default thresholds. Run with
+    ``python -m tests.benchmarks.sanctions_matching``.
+    """
+    rows, names, expected = make_screening_universe(list_size, contacts, seed=seed)
+
+    started = time.perf_counter()
+    index = SanctionsNameIndex(((row['name'], row) for row in rows), name='benchmark')
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = [index.search(name) for name in names]
+    search_seconds = time.perf_counter() - started
+
+    variants = [(hits, row_id) for hits, row_id in zip(results, expected) if row_id is not None]
+    found = sum(any(hit['row']['id'] == row_id for hit in hits) for hits, row_id in variants)
+    false_positive_contacts = sum(bool(hits) for hits, row_id in zip(results, expected) if row_id is None)
+
+    sample = names[:brute_force_sample]
+    started = time.perf_counter()
+    for name in sample:
+        query = normalize_name(name)
+        for candidate in index.names:
+            jaro_winkler(query, candidate)
+    brute_force_seconds = (time.perf_counter() - started) / max(len(sample), 1) * len(names)
+
+    return {
+        'list_names': len(index),
+        'contacts': len(names),
+        'build_seconds': round(build_seconds, 2),
+        'search_seconds': round(search_seconds, 2),
+        'brute_force_seconds_estimate': round(brute_force_seconds, 1),
+        'variant_recall': round(found / len(variants), 4) if variants else None,
+        'contacts_with_hits_not_injected': false_positive_contacts,
+    }
+
+
+if __name__ == '__main__':
+    print(benchmark())
@@ -0,0 +1,79 @@
+from src.utils import bond_math
+from tests.benchmarks.bond_math import compare_metrics, golden_frame, make_bond_universe
+import numpy as np
+
+
+def test_vectorized_metrics_match_scalar_on_golden_fixture():
+    mismatches = compare_metrics(golden_frame())
+    assert mismatches == {name: 0 for name in mismatches}
+
+
+def test_vectorized_metrics_match_scalar_on_synthetic_universe():
+    mismatches = compare_metrics(make_bond_universe(size=500, seed=11))
+    assert mismatches == {name: 0 for name in mismatches}
+
+
+def test_cash_flow_blocks_stay_within_the_cell_cap(monkeypatch):
+    monkeypatch.setattr(bond_math, 'CASH_FLOW_MAX_CELLS', 80)
+    remaining = np.array([1, 40, 3, 40, 1, 1, 12, 60, 2, 2])
+    blocks = list(bond_math._cash_flow_blocks(remaining))
+    assert sorted(np.concatenate([block for block, _ in blocks]).tolist()) == list(range(len(remaining)))
+    for block, width in blocks:
+        assert width == remaining[block].max()
+        assert len(block) == 1 or len(block) * width <= 80
+
+
+def test_par_bond_yields_its_coupon():
+    result = bond_math.solve_bond_analytics(
+        maturity_date=['2036-01-15'], coupon=[5.0], clean_price=[100.0], frequency=[2], settlement='2026-01-15',
+    )
+    assert result['converged'][0]
+    assert result['accrued_interest'][0] == 0
+    assert abs(result['ytm'][0] - 0.05) < 1e-9
+    # 20 semi-annual periods at 2.5%: modified duration (1 - 1.025**-20) / 0.05.
+    assert abs(result['modified_duration'][0] - 7.79458) < 1e-4
+    assert abs(result['macaulay_duration'][0] - 7.98944) < 1e-4
+
+
+def test_zero_coupon_yield():
+    # 100 / 1.03**20 = 55.3676: 6% compounded semi-annually over 10 years.
+    result = bond_math.solve_bond_analytics(
+        maturity_date=['2036-01-15'], coupon=[0.0], clean_price=[100 / 1.03 ** 20], frequency=[0], settlement='2026-01-15',
+    )
+    assert abs(result['ytm'][0] - 0.06) < 1e-9
+    assert abs(result['macaulay_duration'][0] - 10.0) < 1e-9
+
+
+def test_accrued_interest_by_day_count():
+    # Previous coupon 2026-01-15, next 2026-07-15: 60 of 180 days in 30/360,
+    # 59 of 181 actual days in ACT/ACT.
+    result = bond_math.solve_bond_analytics(
+        maturity_date=['2036-07-15', '2036-07-15'],
+        coupon=[5.0, 5.0],
+        clean_price=[100.0, 100.0],
+        frequency=[2, 2],
+        day_count=['30/360', 'ACT/ACT'],
+        settlement='2026-03-15',
+    )
+    np.testing.assert_allclose(result['accrued_interest'], [2.5 * 60 / 180, 2.5 * 59 / 181], rtol=1e-12)
+    np.testing.assert_allclose(result['dirty_price'], 100 + result['accrued_interest'], rtol=1e-12)
+
+
+def test_prices_outside_the_yield_bracket_are_nan():
+    result = bond_math.solve_bond_analytics(
+        maturity_date=['2036-01-15', '2036-01-15', '2036-01-15'],
+        coupon=[5.0, 5.0, 5.0],
+        clean_price=[1e6, 0.01, 100.0],
+        frequency=[2, 2, 2],
+        settlement='2026-01-15',
+    )
+    assert np.isnan(result['ytm'][:2]).all() and np.isnan(result['modified_duration'][:2]).all()
+    assert result['converged'].tolist() == [False, False, True]
+
+
+def test_day_count_conventions():
+    day_count = bond_math.get_day_count_array(
+        ['Semi-Annual', 'Semi-Annual', 'Semi-Annual ACT/ACT', 'Quarterly Actual/360', None],
+        ['ACME 5 01/15/36', 'UST 4 1/4 02/15/34', 'ACME 5 01/15/36', 'ACME 5 01/15/36', 'US TREASURY N/B'],
+    )
+    assert day_count.tolist() == ['30/360', 'ACT/ACT', 'ACT/ACT', 'ACT/360', 'ACT/ACT']
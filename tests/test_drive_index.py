@@ -0,0 +1,183 @@
+from src.utils.connectors.drive_index import DriveFolderIndex
+
+import threading
+
+
+class _FakeRequest:
+  def __init__(self, result):
+    self._result = result
+
+  def execute(self):
+    return self._result
+
+
+class FakeDriveService:
+  """
+  In-memory stand-in for the subset of the Drive v3 API used by DriveFolderIndex.
+
+  Mutate it with add_file/update_file/delete_file; each mutation is appended
+  to the changes feed exactly as Drive would report it.
+  """
+
+  def __init__(self):
+    self.files_by_id = {}
+    self.change_log = []
+    self.on_list = None
+
+  def add_file(self, file):
+    self.files_by_id[file['id']] = dict(file)
+    self.change_log.append({'fileId': file['id'], 'removed': False, 'file': dict(file)})
+
+  def update_file(self, file_id, **changes):
+    self.files_by_id[file_id].update(changes)
+    self.change_log.append({'fileId': file_id, 'removed': False, 'file': dict(self.files_by_id[file_id])})
+
+  def delete_file(self, file_id):
+    self.files_by_id.pop(file_id, None)
+    self.change_log.append({'fileId': file_id, 'removed': True})
+
+  def files(self):
+    return self
+
+  def changes(self):
+    return _FakeChanges(self)
+
+  def list(self, q='', pageToken=None, **kwargs):
+    folder_id = q.split("'")[1] if "'" in q else None
+    listed = [dict(f) for f in self.files_by_id.values() if folder_id in (f.get('parents') or [])]
+    if self.on_list:
+      self.on_list()
+    return _FakeRequest({'files': listed})
+
+
+class _FakeChanges:
+  def __init__(self, service):
+    self._service = service
+
+  def getStartPageToken(self, **kwargs):
+    return _FakeRequest({'startPageToken': str(len(self._service.change_log))})
+
+  def list(self, pageToken, **kwargs):
+    start = int(pageToken)
+    if start > len(self._service.change_log):
+      raise _InvalidToken()
+    return _FakeRequest({
+      'changes': self._service.change_log[start:],
+      'newStartPageToken': str(len(self._service.change_log)),
+    })
+
+
+class _Response:
+  status = 410
+
+
+class _InvalidToken(Exception):
+  resp = _Response()
+
+
+def _index(service, **kwargs):
+  return DriveFolderIndex(lambda: service, refresh_interval=0, **kwargs)
+
+
+def _names(index, folder_id):
+  return sorted(file['name'] for file in index.list_folder(folder_id))
+
+
+def _seeded():
+  service = FakeDriveService()
+  service.add_file({'id': 'a', 'name': 'a.csv', 'parents': ['folder']})
+  service.add_file({'id': 'b', 'name': 'b.csv', 'parents': ['folder']})
+  service.add_file({'id': 'c', 'name': 'c.csv', 'parents': ['other']})
+  return service
+
+
+def test_replays_create():
+  service = _seeded()
+  index = _index(service)
+  assert _names(index, 'folder') == ['a.csv', 'b.csv']
+  service.add_file({'id': 'd', 'name': 'd.csv', 'parents': ['folder']})
+  assert _names(index, 'folder') == ['a.csv', 'b.csv', 'd.csv']
+  assert index.stats()['misses'] == 1
+
+
+def test_replays_rename():
+  service = _seeded()
+  index = _index(service)
+  _names(index, 'folder')
+  service.update_file('a', name='renamed.csv')
+  assert _names(index, 'folder') == ['b.csv', 'renamed.csv']
+
+
+def test_replays_move_between_indexed_folders():
+  service = _seeded()
+  index = _index(service)
+  _names(index, 'folder')
+  _names(index, 'other')
+  service.update_file('a', parents=['other'])
+  assert _names(index, 'folder') == ['b.csv']
+  assert _names(index, 'other') == ['a.csv', 'c.csv']
+
+
+def test_replays_trash_and_delete():
+  service = _seeded()
+  index = _index(service)
+  _names(index, 'folder')
+  service.update_file('a', trashed=True)
+  service.delete_file('b')
+  assert _names(index, 'folder') == []
+
+
+def test_changes_during_cold_listing_are_not_lost():
+  service = _seeded()
+  index = _index(service)
+  _names(index, 'other')
+
+  def change_and_refresh_during_listing():
+    # A concurrent writer renames a listed file and a refresh replays it
+    # before the cold listing of 'folder' is published.
+    service.on_list = None
+    service.update_file('a', name='renamed.csv')
+    service.add_file({'id': 'd', 'name': 'd.csv', 'parents': ['folder']})
+    refresher = threading.Thread(target=index.refresh, kwargs={'force': True})
+    refresher.start()
+    refresher.join()
+
+  service.on_list = change_and_refresh_during_listing
+  # The listing snapshot predates the changes; the buffered replay fixes it up.
+  assert _names(index, 'folder') == ['b.csv', 'd.csv', 'renamed.csv']
+  assert index.stats()['misses'] == 2
+
+
+def test_transient_error_keeps_index():
+  service = _seeded()
+  index = _index(service)
+  _names(index, 'folder')
+
+  def fail(*args, **kwargs):
+    raise ConnectionError('network down')
+
+  service.changes = lambda: type('Broken', (), {'list': fail})()
+  assert index.refresh(force=True) == 0
+  assert index.stats()['resets'] == 0
+  assert index.stats()['folders'] == 1
+
+
+def test_invalid_token_resets_index():
+  service = _seeded()
+  index = _index(service)
+  _names(index, 'folder')
+  index._page_token = '999'
+  assert index.refresh(force=True) == 0
+  assert index.stats()['resets'] == 1
+  assert index.stats()['folders'] == 0
+  assert _names(index, 'folder') == ['a.csv', 'b.csv']
+
+
+def test_state_survives_restart(tmp_path):
+  service = _seeded()
+  state_path = str(tmp_path / 'index.json')
+  _names(_index(service, state_path=state_path), 'folder')
+  service.update_file('b', name='renamed.csv')
+  restarted = _index(service, state_path=state_path)
+  assert _names(restarted, 'folder') == ['a.csv', 'renamed.csv']
+  assert restarted.stats()['misses'] == 0
@@ -0,0 +1,55 @@
+from src.utils.sanctions_matching import SanctionsNameIndex
+from tests.benchmarks.sanctions_matching import make_screening_universe
+
+LISTED_NAMES = ['HAMAS', 'BANCO NACIONAL DE CUBA', 'MARIA GARCIA', 'JOHN SMITH', 'OSAMA BIN LADEN', 'MUHAMMAD AL ZAWAHIRI']
+
+# query -> expected (listed name, match type) hits at the default thresholds.
+# Only exact hits may escalate a screening; the rest are potential matches.
+GOLDEN_QUERIES = {
+    'john  smith': [('john smith', 'exact')],
+    'Hamad': [],
+    'Banco Nacional de Costa Rica': [],
+    'Maria Garcia Lopez': [('maria garcia', 'fuzzy')],
+    'Joanna Smith': [('john smith', 'phonetic')],
+    'Usama bin Laden': [('osama bin laden', 'fuzzy')],
+    'Mohammed al-Zawahiri': [('muhammad al zawahiri', 'fuzzy')],
+    'Ayman Zawahiri': [],
+    'Jane Doe': [],
+}
+
+
+def _golden_index():
+    return SanctionsNameIndex(((name, {'name': name, 'id': i}) for i, name in enumerate(LISTED_NAMES)), name='golden')
+
+
+def _hits(index, query):
+    return [(hit['name'], hit['match_type']) for hit in index.search(query)]
+
+
+def test_golden_queries():
+    index = _golden_index()
+    assert {query: _hits(index, query) for query in GOLDEN_QUERIES} == GOLDEN_QUERIES
+
+
+def test_exact_only_search_ignores_near_misses():
+    index = _golden_index()
+    assert _hits(index, 'Joanna Smith') and not index.search('Joanna Smith', fuzzy=False)
+    assert [hit['row']['id'] for hit in index.search('John Smith', fuzzy=False)] == [3]
+
+
+def test_saved_index_searches_like_the_built_one(tmp_path):
+    rows, names, _ = make_screening_universe(list_size=2_000, contacts=200, variant_share=0.3, seed=5)
+    built = SanctionsNameIndex(((row['name'], row) for row in rows), name='built', signature='golden')
+    path = str(tmp_path / 'index.idx')
+    built.save(path)
+    loaded = SanctionsNameIndex.load(path)
+    assert loaded.signature == 'golden'
+    assert [built.search(name) for name in names] == [loaded.search(name) for name in names]
+
+
+def test_variant_recall_on_synthetic_universe():
+    rows, names, expected = make_screening_universe(list_size=3_000, contacts=300, variant_share=0.3, seed=3)
+    index = SanctionsNameIndex(((row['name'], row) for row in rows), name='synthetic')
+    variants = [(index.search(name), row_id) for name, row_id in zip(names, expected) if row_id is not None]
+    found = sum(any(hit['row']['id'] == row_id for hit in hits) for hits, row_id in variants)
+    assert found / len(variants) >= 0.85
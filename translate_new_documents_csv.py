@@ -585,10 +585,26 @@ def read_translation_batch(
 
     # Match new_documents_ocr.py's database sources, but request no document
     # payload because completed OCR text is already in document_processing.
-    documents = db.read(table="document", query={}, exclude_columns=["data"]) or []
+    documents = db.read(
+        table="document",
+        query={},
+        columns=["id", "sha1_checksum", "file_name", "mime_type"],
+    ) or []
+    # Only completed rows can feed a translation; the OCR writers store the
+    # status in lowercase, so the filter is pushed to the database.
     processing_rows = db.read(
         table="document_processing",
-        query={"process_type": PROCESS_TYPE},
+        query={"process_type": PROCESS_TYPE, "status": "completed"},
+        columns=[
+            "id",
+            "document_id",
+            "status",
+            "output_text",
+            "provider",
+            "source_language",
+            "created",
+            "updated",
+        ],
     ) or []
 
     completed_processing_by_document_id: dict[str, dict] = {}
@@ -640,7 +656,7 @@ def read_translation_batch(
     )
     return eligible[:BATCH_SIZE], metadata_by_document_id, {
         "database_documents": len(documents),
-        "text_extraction_rows": len(processing_rows),
+        "completed_text_extraction_rows": len(processing_rows),
         "documents_with_completed_ocr": documents_with_completed_ocr,
         "previously_attempted_in_csv": len(attempted_document_ids),
         "previously_clean_completed_in_csv": len(completed_document_ids),